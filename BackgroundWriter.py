@@ -0,0 +1,108 @@
+import os
+import threading
+import time
+
+
+def replace_file(path, write, mode='w', **kwargs):
+    # write(f) fills a temp file next to path; it is fsynced and renamed over
+    # path, so a crash leaves either the old file or the new one, never half
+    path = os.fspath(path)
+    tmp_file = path + '.tmp'
+    with open(tmp_file, mode, **kwargs) as f:
+        write(f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_file, path)
+    sync_directory(os.path.dirname(path) or '.')
+
+
+def sync_directory(path):
+    # Makes a rename durable; not every platform can fsync a directory
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class BackgroundWriter:
+    # Group commit on a daemon thread. submit() queues an item and returns at
+    # once; the thread lets a burst gather for up to `interval` seconds and
+    # hands everything queued to commit(items) as one write. A failed commit
+    # keeps its items and is retried on the next round; flush() and close()
+    # raise the error instead of waiting on it.
+    def __init__(self, commit, interval=0.5):
+        self.commit = commit
+        self.interval = interval
+        self.error = None
+        self._items = []
+        self._busy = False
+        self._waiters = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, item):
+        with self._cond:
+            self._items.append(item)
+            self._cond.notify_all()
+
+    def flush(self):
+        # Block until everything submitted so far is on disk
+        with self._cond:
+            self._waiters += 1
+            self._cond.notify_all()
+            try:
+                while self._items or self._busy:
+                    if self.error is not None and not self._busy:
+                        raise self.error
+                    self._cond.wait()
+            finally:
+                self._waiters -= 1
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            with self._cond:
+                self._closed = True
+                self._cond.notify_all()
+            self._thread.join()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._items and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                # Gather the rest of the burst unless someone is waiting
+                deadline = time.monotonic() + self.interval
+                while not self._waiters and not self._closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                items, self._items = self._items, []
+                self._busy = True
+
+            try:
+                self.commit(items)
+                error = None
+            except Exception as e:
+                error = e
+
+            with self._cond:
+                self._busy = False
+                self.error = error
+                if error is not None:
+                    self._items[:0] = items
+                self._cond.notify_all()
+            if error is not None:
+                time.sleep(self.interval)
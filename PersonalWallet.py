@@ -2,14 +2,1541 @@ import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 import json
 import csv
-from datetime import datetime
+import bisect
+import io
+import itertools
+import base64
+import gc
+import heapq
+import mmap
+import os
+import struct
+import queue
+import threading
+import uuid
+import zlib
+from datetime import datetime, date, timedelta
 from pathlib import Path
-from collections import defaultdict
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from matplotlib.figure import Figure
+from collections import defaultdict, OrderedDict
+from array import array
+from calendar import monthrange
+from VirtualTreeview import VirtualTreeview
+from BackgroundWriter import BackgroundWriter, replace_file
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# matplotlib dominates cold start, so it is imported by load_matplotlib()
+# when a chart is first needed rather than at module load
+Figure = None
+FigureCanvasAgg = None
+colormaps = None
+
+
+def load_matplotlib():
+    global Figure, FigureCanvasAgg, colormaps
+    if Figure is None:
+        from matplotlib import cm
+        from matplotlib.backends.backend_agg import FigureCanvasAgg as canvas
+        from matplotlib.figure import Figure as figure
+        colormaps, FigureCanvasAgg = cm, canvas
+        Figure = figure  # set last: other threads test Figure
+
+
+def new_figure(width, height):
+    load_matplotlib()
+    return Figure(figsize=(width / 100, height / 100), dpi=100)
+
+
+class WalletAggregates:
+    # Running income/expense totals kept in step with the transaction list,
+    # so the dashboard never has to rescan the whole history. Budgets are
+    # answered by CategorySpending.
+    def __init__(self):
+        self.type_totals = defaultdict(float)
+
+    def add(self, t, sign=1):
+        self.type_totals[t['type']] += sign * t['amount']
+
+    def remove(self, t):
+        self.add(t, sign=-1)
+
+    def rebuild(self, transactions):
+        self.__init__()
+        for t in transactions:
+            self.add(t)
+
+    def add_summary(self, month, summary):
+        # Totals of a closed month that is not loaded (see month_summary)
+        for trans_type, category, total, count in summary['categories']:
+            self.type_totals[trans_type] += total
+
+    def total(self, trans_type):
+        return self.type_totals.get(trans_type, 0.0)
+
+
+class TimeRollups:
+    # Income/expense totals per day, ISO week, month, quarter and year, kept
+    # in step with the transaction list. Each level keeps its period keys
+    # sorted, so a date range maps to a slice with two bisects.
+    LEVELS = ('day', 'week', 'month', 'quarter', 'year')
+
+    # (longest visible span in days, level) for picking a readable resolution
+    LEVEL_SPANS = ((62, 'day'), (366, 'week'), (3 * 366, 'month'), (10 * 366, 'quarter'))
+
+    def __init__(self):
+        self.buckets = {level: {} for level in self.LEVELS}  # key -> [income, expense, count]
+        self.keys = {level: [] for level in self.LEVELS}
+
+    @staticmethod
+    def period_key(level, day):
+        if level == 'day':
+            return day.isoformat()
+        if level == 'week':
+            year, week, _ = day.isocalendar()
+            return f"{year}-W{week:02d}"
+        if level == 'month':
+            return f"{day.year}-{day.month:02d}"
+        if level == 'quarter':
+            return f"{day.year}-Q{(day.month - 1) // 3 + 1}"
+        return str(day.year)
+
+    def add(self, t, sign=1):
+        try:
+            day = date.fromisoformat(t['date'])
+        except (TypeError, ValueError):
+            return  # undated rows cannot be placed on the time axis
+        amount = sign * t['amount']
+        if t['type'] == 'income':
+            self.add_totals(day, amount, 0.0, sign)
+        else:
+            self.add_totals(day, 0.0, amount, sign)
+
+    def add_summary(self, summary):
+        # Day totals of a closed month that is not loaded (see month_summary)
+        for day, (income, expense, count) in summary['days'].items():
+            try:
+                self.add_totals(date.fromisoformat(day), income, expense, count)
+            except ValueError:
+                pass
+
+    def add_totals(self, day, income, expense, count):
+        for level in self.LEVELS:
+            key = self.period_key(level, day)
+            buckets = self.buckets[level]
+            bucket = buckets.get(key)
+            if bucket is None:
+                bucket = buckets[key] = [0.0, 0.0, 0]
+                bisect.insort(self.keys[level], key)
+            bucket[0] += income
+            bucket[1] += expense
+            bucket[2] += count
+            if bucket[2] <= 0:
+                del buckets[key]
+                keys = self.keys[level]
+                del keys[bisect.bisect_left(keys, key)]
+
+    def remove(self, t):
+        self.add(t, sign=-1)
+
+    def rebuild(self, transactions):
+        self.__init__()
+        for t in transactions:
+            self.add(t)
+
+    def extent(self):
+        days = self.keys['day']
+        if not days:
+            return None
+        return date.fromisoformat(days[0]), date.fromisoformat(days[-1])
+
+    @classmethod
+    def pick_level(cls, start, end):
+        span = (end - start).days + 1
+        for longest, level in cls.LEVEL_SPANS:
+            if span <= longest:
+                return level
+        return 'year'
+
+    def series(self, level, start, end):
+        # (labels, income, expense) for the periods touching [start, end]
+        keys = self.keys[level]
+        lo = bisect.bisect_left(keys, self.period_key(level, start))
+        hi = bisect.bisect_right(keys, self.period_key(level, end))
+        buckets = self.buckets[level]
+        labels = keys[lo:hi]
+        return (labels,
+                [buckets[key][0] for key in labels],
+                [buckets[key][1] for key in labels])
+
+
+class FenwickTree:
+    # Binary indexed tree over day ordinals. Nodes live in a dict, so only
+    # the O(log N) nodes above each touched day take memory; point updates
+    # and prefix sums walk at most SIZE.bit_length() nodes.
+    SIZE = 1 << 22  # past date.max.toordinal()
+
+    def __init__(self):
+        self.nodes = {}
+
+    def add(self, i, amount):
+        nodes = self.nodes
+        while i <= self.SIZE:
+            nodes[i] = nodes.get(i, 0.0) + amount
+            i += i & -i
+
+    def prefix(self, i):
+        # Sum of positions 1..i
+        nodes = self.nodes
+        total = 0.0
+        while i > 0:
+            total += nodes.get(i, 0.0)
+            i -= i & -i
+        return total
+
+    def range_sum(self, lo, hi):
+        return self.prefix(hi) - self.prefix(lo - 1)
+
+
+class CategorySpending:
+    # Expense totals per category indexed by day, kept in step with the
+    # transaction list, so "spent on C between D1 and D2" is two prefix sums
+    # whatever the budget period.
+    def __init__(self):
+        self.trees = defaultdict(FenwickTree)
+
+    def add(self, t, sign=1):
+        if t['type'] != 'expense':
+            return
+        try:
+            day = date.fromisoformat(t['date']).toordinal()
+        except (TypeError, ValueError):
+            return  # undated rows fall in no budget period
+        self.trees[t['category']].add(day, sign * t['amount'])
+
+    def remove(self, t):
+        self.add(t, sign=-1)
+
+    def rebuild(self, transactions):
+        self.__init__()
+        for t in transactions:
+            self.add(t)
+
+    def add_summary(self, month, summary):
+        # Per-day spending of a closed month that is not loaded (see
+        # month_summary). Manifests written before it was kept only have
+        # monthly totals, which are placed on the first of the month.
+        spending = summary.get('spending')
+        if spending is None:
+            first = date.fromisoformat(month + '-01').toordinal()
+            for trans_type, category, total, count in summary['categories']:
+                if trans_type == 'expense':
+                    self.trees[category].add(first, total)
+            return
+        for category, days in spending.items():
+            tree = self.trees[category]
+            for day, amount in days.items():
+                try:
+                    tree.add(date.fromisoformat(day).toordinal(), amount)
+                except ValueError:
+                    pass
+
+    def spent(self, category, start, end):
+        # Expenses in category from start to end, both dates inclusive
+        tree = self.trees.get(category)
+        if tree is None:
+            return 0.0
+        return tree.range_sum(start.toordinal(), end.toordinal())
+
+
+class RecurringRules:
+    # Recurring transactions kept as rules -- type, category, amount,
+    # frequency, start and optional end date -- and never as rows. The k-th
+    # occurrence of a rule is computed from its schedule, so counts and
+    # totals over a date range are arithmetic, and occurrence rows are
+    # generated only for the range actually being shown.
+    FREQUENCIES = {'daily': (1, 0), 'weekly': (7, 0), 'monthly': (0, 1), 'yearly': (0, 12)}
+
+    def __init__(self, rules=None):
+        self.rules = rules if rules is not None else {}  # id -> rule
+
+    @classmethod
+    def step(cls, rule):
+        # (days, months) between occurrences
+        days, months = cls.FREQUENCIES[rule['frequency']]
+        interval = rule.get('interval', 1)
+        return days * interval, months * interval
+
+    @staticmethod
+    def ended(rule, day):
+        # A copy of rule that stops on day, unless it already ended earlier;
+        # never before its start
+        end = min(rule.get('end') or day.isoformat(), day.isoformat())
+        return dict(rule, end=max(rule['start'], end))
+
+    @classmethod
+    def occurrence(cls, rule, k):
+        start = date.fromisoformat(rule['start'])
+        days, months = cls.step(rule)
+        if days:
+            return start + timedelta(days=k * days)
+        # Month steps keep the start day, clamped to shorter months
+        month = start.month - 1 + k * months
+        year, month = start.year + month // 12, month % 12 + 1
+        return date(year, month, min(start.day, monthrange(year, month)[1]))
+
+    @classmethod
+    def last_index(cls, rule, day):
+        # Index of the last occurrence on or before day; -1 if there is none
+        start = date.fromisoformat(rule['start'])
+        if rule.get('end'):
+            day = min(day, date.fromisoformat(rule['end']))
+        if day < start:
+            return -1
+        days, months = cls.step(rule)
+        if days:
+            return (day - start).days // days
+        k = ((day.year - start.year) * 12 + day.month - start.month) // months
+        if cls.occurrence(rule, k) > day:
+            k -= 1
+        return k
+
+    @classmethod
+    def index_range(cls, rule, start, end):
+        # (lo, hi) so that occurrences lo..hi-1 fall in [start, end]; a start
+        # of None means from the first occurrence
+        lo = 0 if start is None else cls.last_index(rule, start - timedelta(days=1)) + 1
+        return lo, max(lo, cls.last_index(rule, end) + 1)
+
+    @classmethod
+    def row(cls, rule, k):
+        # The k-th occurrence as a transaction dict; its timestamp is its
+        # date so it sorts among the stored rows
+        day = cls.occurrence(rule, k).isoformat()
+        return {'id': f"{rule['id']}:{day}", 'type': rule['type'], 'amount': rule['amount'],
+                'category': rule['category'], 'date': day, 'description': rule['description'],
+                'timestamp': day, 'rule': rule['id']}
+
+    def occurrences(self, start, end, newest_first=False):
+        # Occurrence rows of every rule in [start, end], merged by date
+        streams = []
+        for rule in self.rules.values():
+            lo, hi = self.index_range(rule, start, end)
+            ks = range(hi - 1, lo - 1, -1) if newest_first else range(lo, hi)
+            streams.append(self.row(rule, k) for k in ks)
+        return heapq.merge(*streams, key=lambda t: t['date'], reverse=newest_first)
+
+    def count(self, rule, start, end):
+        lo, hi = self.index_range(rule, start, end)
+        return hi - lo
+
+    def total(self, trans_type, start, end):
+        return sum(rule['amount'] * self.count(rule, start, end)
+                   for rule in self.rules.values() if rule['type'] == trans_type)
+
+    def spent(self, category, start, end):
+        return sum(rule['amount'] * self.count(rule, start, end)
+                   for rule in self.rules.values()
+                   if rule['type'] == 'expense' and rule['category'] == category)
+
+    def extent(self, end):
+        # (first, last) occurrence dates up to end, or None
+        days = []
+        for rule in self.rules.values():
+            lo, hi = self.index_range(rule, None, end)
+            if hi > lo:
+                days += [self.occurrence(rule, lo), self.occurrence(rule, hi - 1)]
+        return (min(days), max(days)) if days else None
+
+    # The summaries below fold rule occurrences into the dicts built by
+    # monthly_summary and category_summary, one month at a time
+    def add_monthly(self, monthly_data, start, end):
+        for rule in self.rules.values():
+            lo, hi = self.index_range(rule, start, end)
+            if hi <= lo:
+                continue
+            first, last = self.occurrence(rule, lo), self.occurrence(rule, hi - 1)
+            month = first.replace(day=1)
+            while month <= last:
+                next_month = (month + timedelta(days=31)).replace(day=1)
+                count = self.count(rule, max(month, first), min(next_month - timedelta(days=1), last))
+                if count:
+                    data = monthly_data.setdefault(month.strftime("%Y-%m"),
+                                                   {'income': 0, 'expense': 0, 'count': 0})
+                    data['income' if rule['type'] == 'income' else 'expense'] += rule['amount'] * count
+                    data['count'] += count
+                month = next_month
+        return monthly_data
+
+    def add_categories(self, by_category, trans_type, start, end):
+        for rule in self.rules.values():
+            if rule['type'] != trans_type:
+                continue
+            count = self.count(rule, start, end)
+            if count:
+                data = by_category.setdefault(rule['category'], {'total': 0, 'count': 0})
+                data['total'] += rule['amount'] * count
+                data['count'] += count
+        return by_category
+
+    def add_series(self, level, series, start, end):
+        # Adds the occurrences in [start, end] to a (labels, income, expense)
+        # series from TimeRollups.series; only this range is generated
+        if not self.rules:
+            return series
+        totals = {label: [income, expense] for label, income, expense in zip(*series)}
+        for t in self.occurrences(start, end):
+            bucket = totals.setdefault(
+                TimeRollups.period_key(level, date.fromisoformat(t['date'])), [0.0, 0.0])
+            bucket[0 if t['type'] == 'income' else 1] += t['amount']
+        labels = sorted(totals)
+        return (labels, [totals[label][0] for label in labels],
+                [totals[label][1] for label in labels])
+
+
+class RuleOccurrences:
+    # Read-only sequence of one rule's occurrences up to a date, newest
+    # first, for VirtualTreeview: rows are computed as they scroll into view
+    def __init__(self, rule, end):
+        self.rule = rule
+        self.lo, self.hi = RecurringRules.index_range(rule, None, end)
+
+    def __len__(self):
+        return self.hi - self.lo
+
+    def __getitem__(self, i):
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return RecurringRules.row(self.rule, self.hi - 1 - i)
+
+
+class TransactionColumns:
+    # Columnar copy of the transaction list for vectorized analytics:
+    # amounts, type codes, dictionary-encoded categories and day ordinals.
+    # Row i is transaction i; remove() mirrors the list's swap-delete.
+    TYPE_CODES = {'income': 0, 'expense': 1}
+    EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+    ARRAYS = ('_amount', '_type', '_category', '_day')
+
+    def __init__(self, capacity=1024):
+        self.size = 0
+        self.categories = []
+        self.category_codes = {}
+        self.shared = False  # a snapshot() still reads the arrays
+        self._amount = np.empty(capacity, dtype=np.float64)
+        self._type = np.empty(capacity, dtype=np.int8)
+        self._category = np.empty(capacity, dtype=np.int32)
+        self._day = np.empty(capacity, dtype=np.int32)
+
+    @classmethod
+    def build(cls, transactions):
+        columns = cls(max(1024, len(transactions)))
+        for t in transactions:
+            columns.append(t)
+        return columns
+
+    @classmethod
+    def concat(cls, parts):
+        # The rows of every part in turn, with the category codes remapped
+        columns = cls(max(1024, sum(part.size for part in parts)))
+        for part in parts:
+            start, end = columns.size, columns.size + part.size
+            codes = np.array([columns.category_code(c) for c in part.categories], dtype=np.int32)
+            columns._amount[start:end] = part._amount[:part.size]
+            columns._type[start:end] = part._type[:part.size]
+            columns._day[start:end] = part._day[:part.size]
+            if part.size:
+                columns._category[start:end] = codes[part._category[:part.size]]
+            columns.size = end
+        return columns
+
+    def append(self, t):
+        # Raises ValueError for dates the columns cannot represent
+        day = date.fromisoformat(t['date']).toordinal()
+        if self.size == len(self._amount):
+            self._grow()
+        self._write(self.size, t, day)
+        self.size += 1
+
+    def set(self, i, t):
+        # Row i after an edit of transaction i
+        day = date.fromisoformat(t['date']).toordinal()
+        self._unshare()
+        self._write(i, t, day)
+
+    def remove(self, i):
+        # The last row takes the freed slot, as in remove_transaction
+        self._unshare()
+        last = self.size - 1
+        for name in self.ARRAYS:
+            column = getattr(self, name)
+            column[i] = column[last]
+        self.size = last
+
+    def snapshot(self):
+        # The first `size` rows as they are now, for a worker. Appends only
+        # write past them; set() and remove() copy the arrays first.
+        view = TransactionColumns.__new__(TransactionColumns)
+        view.__dict__.update(self.__dict__)
+        self.shared = True
+        return view
+
+    def category_code(self, category):
+        code = self.category_codes.get(category)
+        if code is None:
+            code = self.category_codes[category] = len(self.categories)
+            self.categories.append(category)
+        return code
+
+    def _write(self, i, t, day):
+        self._amount[i] = t['amount']
+        self._type[i] = self.TYPE_CODES.get(t['type'], 1)
+        self._category[i] = self.category_code(t['category'])
+        self._day[i] = day
+
+    def _unshare(self):
+        if self.shared:
+            for name in self.ARRAYS:
+                setattr(self, name, getattr(self, name).copy())
+            self.shared = False
+
+    def _grow(self):
+        capacity = len(self._amount) * 2
+        for name in self.ARRAYS:
+            old = getattr(self, name)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, name, new)
+        self.shared = False  # snapshots keep the old arrays
+
+    # The reports read the first `size` rows once; run them on a
+    # snapshot() while the Tk thread keeps changing the columns
+    def months(self, size):
+        # Months since 1970-01 for every row
+        days = (self._day[:size] - self.EPOCH_ORDINAL).astype('datetime64[D]')
+        return days.astype('datetime64[M]').astype(np.int64)
+
+    def monthly_summary(self):
+        size = self.size
+        amount = self._amount[:size]
+        is_income = self._type[:size] == self.TYPE_CODES['income']
+        keys, inverse = np.unique(self.months(size), return_inverse=True)
+
+        income = np.bincount(inverse, weights=np.where(is_income, amount, 0.0), minlength=len(keys))
+        expense = np.bincount(inverse, weights=np.where(is_income, 0.0, amount), minlength=len(keys))
+        counts = np.bincount(inverse, minlength=len(keys))
+
+        labels = np.datetime_as_string(keys.astype('datetime64[M]'), unit='M')
+        return {
+            str(month): {'income': float(i), 'expense': float(e), 'count': int(c)}
+            for month, i, e, c in zip(labels, income, expense, counts)
+        }
+
+    def category_summary(self, trans_type):
+        size = self.size
+        categories = self.categories[:]
+        mask = self._type[:size] == self.TYPE_CODES[trans_type]
+        codes = self._category[:size][mask]
+        amounts = self._amount[:size][mask]
+
+        totals = np.bincount(codes, weights=amounts, minlength=len(categories))
+        counts = np.bincount(codes, minlength=len(categories))
+        return {
+            categories[code]: {'total': float(totals[code]), 'count': int(counts[code])}
+            for code in np.flatnonzero(counts)
+        }
+
+
+def draw_category_pie(fig, category_totals, title, colormap):
+    # colormap is a matplotlib colormap name such as 'Set3'
+    ax = fig.add_subplot(111)
+
+    categories = list(category_totals.keys())
+    amounts = list(category_totals.values())
+    colors = getattr(colormaps, colormap)(range(len(categories)))
+
+    wedges, texts, autotexts = ax.pie(amounts, labels=categories, autopct='%1.1f%%',
+                                       colors=colors, startangle=90)
+
+    # Make percentage text bold
+    for autotext in autotexts:
+        autotext.set_color('white')
+        autotext.set_fontweight('bold')
+
+    ax.set_title(title, fontsize=14, fontweight='bold')
+
+
+def draw_trend(fig, level, periods, income_values, expense_values):
+    ax = fig.add_subplot(111)
+
+    x = range(len(periods))
+    width = 0.35
+
+    ax.bar([i - width/2 for i in x], income_values, width, label='Income', color='#27ae60')
+    ax.bar([i + width/2 for i in x], expense_values, width, label='Expense', color='#e74c3c')
+
+    title = {'day': 'Daily', 'week': 'Weekly', 'month': 'Monthly',
+             'quarter': 'Quarterly', 'year': 'Yearly'}[level]
+    ax.set_xlabel(level.capitalize(), fontweight='bold')
+    ax.set_ylabel('Amount ($)', fontweight='bold')
+    ax.set_title(f'{title} Income vs Expense Trend', fontsize=14, fontweight='bold')
+    ax.set_xticks(x)
+    ax.set_xticklabels(periods, rotation=45, ha='right')
+    ax.legend()
+    ax.grid(axis='y', alpha=0.3)
+
+    fig.tight_layout()
+
+
+def render_png(fig):
+    # Agg rasterization; safe off the Tk thread since no GUI backend is involved
+    load_matplotlib()
+    buf = io.BytesIO()
+    FigureCanvasAgg(fig).print_png(buf)
+    return buf.getvalue()
+
+
+def monthly_summary(transactions, columns=None):
+    if columns is not None:
+        return columns.monthly_summary()
+
+    monthly_data = defaultdict(lambda: {'income': 0, 'expense': 0, 'count': 0})
+    for t in transactions:
+        month = t['date'][:7]  # YYYY-MM
+        if t['type'] == 'income':
+            monthly_data[month]['income'] += t['amount']
+        else:
+            monthly_data[month]['expense'] += t['amount']
+        monthly_data[month]['count'] += 1
+    return monthly_data
+
+
+def category_summary(transactions, trans_type, columns=None):
+    if columns is not None:
+        return columns.category_summary(trans_type)
+
+    by_category = defaultdict(lambda: {'total': 0, 'count': 0})
+    for t in transactions:
+        if t['type'] == trans_type:
+            by_category[t['category']]['total'] += t['amount']
+            by_category[t['category']]['count'] += 1
+    return by_category
+
+
+# Report text shared by the Tk windows and the WalletReport command line
+def monthly_stats_lines(monthly_data):
+    lines = ["Month      | Income    | Expense   | Balance   | Trans. Count\n",
+             "-" * 70 + "\n"]
+    for month in sorted(monthly_data.keys(), reverse=True):
+        data = monthly_data[month]
+        balance = data['income'] - data['expense']
+        lines.append(f"{month}  | ${data['income']:8.2f} | ${data['expense']:8.2f} | ${balance:8.2f} | {data['count']:6d}\n")
+    return lines
+
+
+def category_analysis_lines(by_category):
+    total = sum(data['total'] for data in by_category.values())
+    lines = ["Category      | Total      | Count | Avg/Trans | % of Total\n",
+             "-" * 70 + "\n"]
+    for category in sorted(by_category.keys(), key=lambda x: by_category[x]['total'], reverse=True):
+        data = by_category[category]
+        avg = data['total'] / data['count']
+        percentage = (data['total'] / total * 100) if total > 0 else 0
+        lines.append(f"{category:13} | ${data['total']:9.2f} | {data['count']:5d} | ${avg:8.2f} | {percentage:5.1f}%\n")
+    lines.append("-" * 70 + "\n")
+    lines.append(f"{'TOTAL':13} | ${total:9.2f}\n")
+    return lines
+
+
+# A budget is {'limit': amount, 'period': one of BUDGET_PERIODS}; custom
+# budgets also carry 'start' and 'end' dates (YYYY-MM-DD)
+BUDGET_PERIODS = ('weekly', 'monthly', 'quarterly', 'yearly', 'rolling30', 'custom')
+
+
+def normalize_budget(budget):
+    # Older versions stored a bare monthly limit
+    if isinstance(budget, dict):
+        return budget
+    return {'limit': float(budget), 'period': 'monthly'}
+
+
+def budget_window(budget, today):
+    # (start, end) dates, both inclusive, of the budget period containing today
+    period = budget.get('period', 'monthly')
+    if period == 'weekly':
+        start = today - timedelta(days=today.weekday())
+        return start, start + timedelta(days=6)
+    if period == 'rolling30':
+        return today - timedelta(days=29), today
+    if period == 'custom':
+        return date.fromisoformat(budget['start']), date.fromisoformat(budget['end'])
+    if period == 'quarterly':
+        start = today.replace(month=(today.month - 1) // 3 * 3 + 1, day=1)
+        months = 3
+    elif period == 'yearly':
+        start = today.replace(month=1, day=1)
+        months = 12
+    else:
+        start = today.replace(day=1)
+        months = 1
+    month = start.month - 1 + months
+    end = date(start.year + month // 12, month % 12 + 1, 1) - timedelta(days=1)
+    return start, end
+
+
+def budget_usage(category, budget, spending, today, recurring=None):
+    # (limit, start, end, spent) for the current period of one budget;
+    # recurring rules count the occurrences up to today
+    start, end = budget_window(budget, today)
+    spent = spending.spent(category, start, end)
+    if recurring is not None:
+        spent += recurring.spent(category, start, min(end, today))
+    return budget['limit'], start, end, spent
+
+
+def budget_status_lines(budgets, spending, today, recurring=None):
+    # (text, tag) pairs; the tag names the Text widget style, '' for plain
+    if not budgets:
+        return [("No budgets have been set yet.\n\n", '')]
+
+    lines = [(f"Budget Report as of {today.isoformat()}\n", 'title'), ("=" * 60 + "\n\n", '')]
+    total_budget = 0
+    total_spent = 0
+
+    for category, budget in budgets.items():
+        budget_limit, start, end, period_spending = budget_usage(category, budget, spending, today,
+                                                                 recurring)
+
+        total_budget += budget_limit
+        total_spent += period_spending
+
+        remaining = budget_limit - period_spending
+        percentage = (period_spending / budget_limit) * 100 if budget_limit > 0 else 0
+
+        lines.append((f"\n{category}\n", 'category'))
+        lines.append((f"  Period:        {budget['period']} ({start.isoformat()} to {end.isoformat()})\n", ''))
+        lines.append((f"  Budget Limit:  ${budget_limit:.2f}\n", ''))
+        lines.append((f"  Amount Spent:  ${period_spending:.2f}\n", ''))
+        lines.append((f"  Remaining:     ${remaining:.2f}\n", ''))
+        lines.append((f"  Usage:         {percentage:.1f}%\n", ''))
+
+        if period_spending > budget_limit:
+            lines.append((f"  Status:        ⚠️ EXCEEDED by ${period_spending - budget_limit:.2f}\n", 'exceeded'))
+        elif percentage >= 80:
+            lines.append((f"  Status:        ⚠️ Warning - Approaching limit\n", 'warning'))
+        else:
+            lines.append((f"  Status:        ✅ On track\n", 'ok'))
+
+    lines.append(("\n" + "=" * 60 + "\n", ''))
+    lines.append((f"\nTotal Budget:  ${total_budget:.2f}\n", 'bold'))
+    lines.append((f"Total Spent:   ${total_spent:.2f}\n", 'bold'))
+    lines.append((f"Total Remaining: ${total_budget - total_spent:.2f}\n", 'bold'))
+    return lines
+
+
+class TransactionSearchIndex:
+    # Inverted indexes for Search & Filter: description trigrams, type and
+    # category posting sets, all keyed by transaction id. A search intersects
+    # the postings and only verifies the substring on the survivors.
+    def __init__(self):
+        self.grams = defaultdict(set)
+        self.by_type = defaultdict(set)
+        self.by_category = defaultdict(set)
+        self.texts = {}  # id -> lowercased description
+
+    @staticmethod
+    def trigrams(text):
+        return {text[i:i + 3] for i in range(len(text) - 2)}
+
+    def add(self, t):
+        text = t['description'].lower()
+        self.texts[t['id']] = text
+        for gram in self.trigrams(text):
+            self.grams[gram].add(t['id'])
+        self.by_type[t['type']].add(t['id'])
+        self.by_category[t['category']].add(t['id'])
+
+    def remove(self, t):
+        text = self.texts.pop(t['id'], '')
+        for gram in self.trigrams(text):
+            postings = self.grams[gram]
+            postings.discard(t['id'])
+            if not postings:
+                del self.grams[gram]
+        self.by_type[t['type']].discard(t['id'])
+        self.by_category[t['category']].discard(t['id'])
+
+    def rebuild(self, transactions):
+        self.__init__()
+        for t in transactions:
+            self.add(t)
+
+    def search(self, search_term, type_filter, category_filter):
+        # Returns the matching ids, or None when nothing is filtered
+        filters = []
+        if type_filter != "all":
+            filters.append(self.by_type.get(type_filter, set()))
+        if category_filter != "all":
+            filters.append(self.by_category.get(category_filter, set()))
+        candidates = intersect(filters)
+
+        if not search_term:
+            return candidates
+
+        # Description matches: trigram postings, then verify the substring
+        if len(search_term) >= 3:
+            postings = [self.grams.get(g, set()) for g in self.trigrams(search_term)]
+            if candidates is not None:
+                postings.append(candidates)
+            pool = intersect(postings)
+        else:
+            pool = candidates if candidates is not None else self.texts.keys()
+        texts = self.texts
+        hits = {i for i in pool if search_term in texts[i]}
+
+        # Category name matches
+        for category, ids in self.by_category.items():
+            if search_term in category.lower():
+                hits |= ids if candidates is None else ids & candidates
+        return hits
+
+
+def intersect(sets):
+    # Intersection starting from the smallest set; None if there are no sets
+    if not sets:
+        return None
+    sets = sorted(sets, key=len)
+    result = set(sets[0])
+    for other in sets[1:]:
+        if not result:
+            break
+        result &= other
+    return result
+
+
+class BackgroundJob:
+    # Runs work(job) on a thread. The Tk side polls done/total for progress
+    # and sets cancelled to ask the work function to stop early.
+    def __init__(self, work):
+        self.done = 0
+        self.total = 0
+        self.cancelled = threading.Event()
+        self.finished = False
+        self.result = None
+        self.error = None
+        self.thread = threading.Thread(target=self._run, args=(work,), daemon=True)
+        self.thread.start()
+
+    def _run(self, work):
+        try:
+            self.result = work(self)
+        except Exception as e:
+            self.error = e
+        finally:
+            self.finished = True
+
+
+def write_atomically(filename, job, write, newline=None):
+    # write(f) streams into a temp file that replaces filename only if the
+    # job ran to completion
+    tmp_file = f"{filename}.tmp"
+    try:
+        with open(tmp_file, 'w', newline=newline) as f:
+            write(f)
+        if job.cancelled.is_set():
+            os.remove(tmp_file)
+            return False
+        os.replace(tmp_file, filename)
+        return True
+    except BaseException:
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+        raise
+
+
+class JsonStreamReader:
+    # Minimal incremental JSON reader: pulls chunks from a text file and
+    # decodes one value at a time, so only the current record is in memory
+    def __init__(self, f, chunk_size=1 << 16):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ''
+        self.pos = 0
+        self.chars_read = 0
+        self.decoder = json.JSONDecoder()
+
+    def fill(self):
+        more = self.f.read(self.chunk_size)
+        if not more:
+            return False
+        self.chars_read += len(more)
+        self.buf = self.buf[self.pos:] + more
+        self.pos = 0
+        return True
+
+    def peek(self):
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in ' \t\r\n':
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.fill():
+                raise ValueError("Unexpected end of JSON data")
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"Expected '{char}' at character {self.chars_read - len(self.buf) + self.pos}")
+        self.pos += 1
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+            except ValueError:
+                if not self.fill():
+                    raise
+                continue
+            # A number that ends the buffer may continue in the next chunk
+            if end == len(self.buf) and self.fill():
+                continue
+            self.pos = end
+            return value
+
+
+def iter_wallet_records(f):
+    # Yields ('transaction', t) for every entry of the top-level
+    # "transactions" array and (key, value) for the other top-level fields
+    reader = JsonStreamReader(f)
+    reader.expect('{')
+    if reader.peek() == '}':
+        return
+    while True:
+        key = reader.value()
+        reader.expect(':')
+        if key == 'transactions' and reader.peek() == '[':
+            reader.expect('[')
+            if reader.peek() == ']':
+                reader.expect(']')
+            else:
+                while True:
+                    yield 'transaction', reader.value()
+                    if reader.peek() != ',':
+                        reader.expect(']')
+                        break
+                    reader.expect(',')
+        else:
+            yield key, reader.value()
+        if reader.peek() != ',':
+            reader.expect('}')
+            return
+        reader.expect(',')
+
+
+def content_key(t):
+    # Identity of a transaction's content, used to spot duplicates on import
+    return (t['date'], t['type'], t['category'], float(t['amount']), t['description'])
+
+
+class WalletSnapshot:
+    # Binary working store. A fixed header and a JSON block (category table,
+    # budgets, rarely used fields) are followed by fixed-width columns --
+    # amount, day ordinal, category code, type code -- and a NUL-separated
+    # string heap holding each row's id, description and timestamp. Opened
+    # through mmap, the columns are typed memoryviews over the file itself;
+    # closed-month segments are the same layout, zlib-compressed.
+    MAGIC = b'WALLETB1'
+    BYTE_ORDER = 0x01020304
+    HEADER = struct.Struct('=8sIIQQ')  # magic, byte order, rows, meta bytes, heap bytes
+    TYPES = ('income', 'expense')
+    FIELDS = ('id', 'type', 'amount', 'category', 'date', 'description', 'timestamp')
+    HEAP_FIELDS = ('id', 'description', 'timestamp')
+
+    def __init__(self, buffer):
+        self._buffer = buffer
+        try:
+            self._view = memoryview(buffer)
+            magic, order, rows, meta_size, heap_size = self.HEADER.unpack_from(self._view)
+            if magic != self.MAGIC or order != self.BYTE_ORDER:
+                raise ValueError("not a wallet snapshot for this platform")
+            # A cut or padded file would otherwise load with rows missing
+            offset = self.HEADER.size
+            if len(self._view) != offset + meta_size + (-meta_size % 8) + rows * 15 + heap_size:
+                raise ValueError("wallet snapshot is truncated or damaged")
+            self.rows = rows
+            self.meta = json.loads(bytes(self._view[offset:offset + meta_size]))
+            offset += meta_size + (-meta_size % 8)
+
+            sections = []
+            for code, width in (('d', 8), ('i', 4), ('H', 2), ('B', 1)):
+                sections.append(self._view[offset:offset + rows * width].cast(code))
+                offset += rows * width
+            self.amounts, self.days, self.category_codes, self.type_codes = sections
+            self.heap = self._view[offset:offset + heap_size]
+        except Exception:
+            self.close()
+            raise
+
+    @classmethod
+    def open(cls, path):
+        with open(path, 'rb') as f:
+            return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    @classmethod
+    def is_snapshot(cls, path):
+        with open(path, 'rb') as f:
+            return f.read(len(cls.MAGIC)) == cls.MAGIC
+
+    def close(self):
+        # Views must be released before the map can close
+        for name in ('amounts', 'days', 'category_codes', 'type_codes', 'heap', '_view'):
+            view = self.__dict__.pop(name, None)
+            if view is not None:
+                view.release()
+        if isinstance(self._buffer, mmap.mmap):
+            self._buffer.close()
+
+    def records(self):
+        # Materialize the rows as the transaction dicts the app works with
+        categories = self.meta['categories']
+        days = self.days.tolist()
+        day_text = {day: date.fromordinal(day).isoformat() for day in set(days) if day > 0}
+        strings = str(self.heap, 'utf-8').split('\0') if self.rows else []
+        if len(strings) != 3 * self.rows:
+            raise ValueError("wallet snapshot string heap does not match its rows")
+        # Only new, acyclic dicts are created here; collector passes over
+        # them would cost more than building them
+        collecting = gc.isenabled()
+        gc.disable()
+        try:
+            transactions = [
+                {'id': id_, 'type': self.TYPES[type_code], 'amount': amount,
+                 'category': categories[category_code], 'date': day_text.get(day, ''),
+                 'description': description, 'timestamp': timestamp}
+                for id_, type_code, amount, category_code, day, description, timestamp in zip(
+                    strings[0::3], self.type_codes.tolist(), self.amounts.tolist(),
+                    self.category_codes.tolist(), days, strings[1::3], strings[2::3])
+            ]
+        finally:
+            if collecting:
+                gc.enable()
+        for row, fields in self.meta['extras'].items():
+            transactions[int(row)].update(fields)
+        return transactions
+
+    @classmethod
+    def load(cls, path):
+        snapshot = cls.open(path)
+        try:
+            return snapshot.records(), snapshot.meta['budgets'], snapshot.meta.get('rules', {})
+        finally:
+            snapshot.close()
+
+    @classmethod
+    def write(cls, f, transactions, budgets, months=None, rules=None):
+        amounts, days = array('d'), array('i')
+        category_codes, type_codes = array('H'), array('B')
+        categories, codes = [], {}
+        strings, extras = [], {}
+
+        for row, t in enumerate(transactions):
+            # Anything the columns cannot hold exactly is kept in extras
+            extra = {key: value for key, value in t.items() if key not in cls.FIELDS}
+
+            amount = t.get('amount')
+            if isinstance(amount, (int, float)) and not isinstance(amount, bool):
+                amounts.append(amount)
+            else:
+                amounts.append(0.0)
+                extra['amount'] = amount
+
+            try:
+                day = date.fromisoformat(t['date']).toordinal()
+                if date.fromordinal(day).isoformat() != t['date']:
+                    raise ValueError
+            except (KeyError, TypeError, ValueError):
+                day = 0
+                extra['date'] = t.get('date')
+            days.append(day)
+
+            category = t.get('category')
+            if isinstance(category, str):
+                if category not in codes:
+                    codes[category] = len(categories)
+                    categories.append(category)
+                category_codes.append(codes[category])
+            else:
+                category_codes.append(0)
+                extra['category'] = category
+                if not categories:
+                    categories.append('')
+
+            if t.get('type') in cls.TYPES:
+                type_codes.append(cls.TYPES.index(t['type']))
+            else:
+                type_codes.append(0)
+                extra['type'] = t.get('type')
+
+            for field in cls.HEAP_FIELDS:
+                value = t.get(field)
+                if isinstance(value, str) and '\0' not in value:
+                    strings.append(value)
+                else:
+                    strings.append('')
+                    extra[field] = value
+
+            if extra:
+                extras[str(row)] = extra
+
+        meta = {'categories': categories, 'budgets': budgets, 'extras': extras,
+                'last_updated': datetime.now().isoformat()}
+        if months is not None:
+            meta['months'] = months
+        if rules:
+            meta['rules'] = rules
+        meta = json.dumps(meta).encode('utf-8')
+        heap = '\0'.join(strings).encode('utf-8')
+        f.write(cls.HEADER.pack(cls.MAGIC, cls.BYTE_ORDER, len(transactions), len(meta), len(heap)))
+        f.write(meta + b'\0' * (-len(meta) % 8))
+        for column in (amounts, days, category_codes, type_codes):
+            column.tofile(f)
+        f.write(heap)
+
+
+def read_snapshot(path):
+    # Binary snapshots are the working store; JSON ones are still accepted
+    # so older data files and exports load the same way
+    if WalletSnapshot.is_snapshot(path):
+        return WalletSnapshot.load(path)
+    with open(path, 'r') as f:
+        data = json.load(f)
+    return data.get('transactions', []), data.get('budgets', {}), data.get('rules', {})
+
+
+def current_month():
+    return datetime.now().strftime("%Y-%m")
+
+
+def closed_month(date_text, current):
+    # 'YYYY-MM' of a dated transaction before the current month, else None
+    month = date_text[:7] if isinstance(date_text, str) else ''
+    if (len(month) == 7 and month[4] == '-' and month[:4].isdigit()
+            and month[5:].isdigit() and month < current):
+        return month
+    return None
+
+
+def month_summary(transactions):
+    # Totals kept in the manifest for a closed month, so the dashboard,
+    # budgets and trend can count it without loading its rows
+    days = defaultdict(lambda: [0.0, 0.0, 0])
+    categories = defaultdict(lambda: [0.0, 0])
+    spending = defaultdict(lambda: defaultdict(float))  # category -> day -> expense
+    for t in transactions:
+        day = days[t['date']]
+        day[0 if t['type'] == 'income' else 1] += t['amount']
+        day[2] += 1
+        category = categories[(t['type'], t['category'])]
+        category[0] += t['amount']
+        category[1] += 1
+        if t['type'] == 'expense':
+            spending[t['category']][t['date']] += t['amount']
+    return {
+        'count': len(transactions),
+        'days': dict(days),
+        'categories': [[trans_type, category, total, count]
+                       for (trans_type, category), (total, count) in categories.items()],
+        'spending': {category: dict(by_day) for category, by_day in spending.items()},
+    }
+
+
+class WalletJournal:
+    # Month-partitioned snapshot plus an append-only log of the operations
+    # made since it was written. The hot snapshot holds the current month
+    # (and anything undated or in the future) along with a manifest of
+    # per-month totals; each closed month is an immutable compressed
+    # segment that is only read when the full history is needed. Saving a
+    # change queues one log record, which a writer thread appends and fsyncs
+    # together with the rest of its burst; compaction runs in the background
+    # and rewrites the hot snapshot plus only the segments whose months changed.
+    COMPACT_RECORDS = 1000
+    COMPACT_BYTES = 1024 * 1024
+    CACHE_MONTHS = 24  # closed months kept decompressed for analytics
+
+    def __init__(self, snapshot_file, legacy_file=None):
+        self.snapshot_file = Path(snapshot_file)
+        self.legacy_file = Path(legacy_file) if legacy_file is not None else None
+        self.journal_file = self.snapshot_file.with_suffix('.journal')
+        self.rotated_file = self.snapshot_file.with_suffix('.journal.old')
+        self.segment_dir = self.snapshot_file.with_suffix('.months')
+        self.records = 0
+        self.upgrade = False  # loaded from the legacy file; rewrite on compaction
+        self.rewrite_all = False
+        self.rolled = False   # the hot snapshot holds rows of a closed month
+        self.months = {}      # closed month -> summary, for every segment on disk
+        self.loaded = set()   # closed months whose rows are in the working set
+        self.dirty = set()    # closed months changed since the last compaction
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._compactor = None
+        self._writer = None  # started by the first append
+
+    @property
+    def history_loaded(self):
+        return not self.months.keys() - self.loaded
+
+    def load(self):
+        # Returns the hot rows; the closed months are only read as well when
+        # the log has changes to them
+        transactions, budgets, rules = [], {}, {}
+        self.months, self.loaded = {}, set()
+        source = self.snapshot_file
+        if not source.exists() and self.legacy_file is not None and self.legacy_file.exists():
+            source = self.legacy_file
+            self.upgrade = True
+        if source.exists():
+            if WalletSnapshot.is_snapshot(source):
+                snapshot = WalletSnapshot.open(source)
+                try:
+                    transactions = snapshot.records()
+                    budgets = snapshot.meta['budgets']
+                    rules = snapshot.meta.get('rules', {})
+                    self.months = snapshot.meta.get('months', {})
+                finally:
+                    snapshot.close()
+            else:
+                transactions, budgets, rules = read_snapshot(source)
+
+        # Rows of months that closed since the last write still sit in the
+        # hot snapshot; the next compaction moves them into segments
+        current = current_month()
+        self.rolled = any(closed_month(t['date'], current) for t in transactions)
+
+        # A rotated log only survives when compaction was interrupted; its
+        # operations may already be in the snapshot, so replay idempotently,
+        # with the whole history loaded and rewritten.
+        rotated = self._read_log(self.rotated_file)
+        records = self._read_log(self.journal_file)
+        months, undated = self._touched_months(rotated + records, current)
+        self.rewrite_all = bool(rotated) or undated
+        if not self.history_loaded and (self.rewrite_all or months & self.months.keys()):
+            transactions.extend(self.load_history({t['id'] for t in transactions}))
+        self.dirty = months
+
+        self._replay(rotated, transactions, budgets, rules, dedupe=True)
+        self._replay(records, transactions, budgets, rules)
+        self.records = len(records)
+        budgets = {category: normalize_budget(budget) for category, budget in budgets.items()}
+        return transactions, budgets, rules
+
+    def set_aside(self):
+        # After a failed load: rename the store's files to *.corrupt so the
+        # empty wallet the app goes on with cannot overwrite them. Returns
+        # the new paths.
+        self.months, self.loaded, self.dirty = {}, set(), set()
+        self.upgrade = self.rewrite_all = self.rolled = False
+        self.records = 0
+        paths = [self.snapshot_file, self.journal_file, self.rotated_file, self.segment_dir]
+        if not self.snapshot_file.exists() and self.legacy_file is not None:
+            paths.append(self.legacy_file)  # the file load() read instead
+        moved = []
+        for path in paths:
+            if not path.exists():
+                continue
+            backup = path.with_name(path.name + '.corrupt')
+            n = 1
+            while backup.exists():
+                backup = path.with_name(f'{path.name}.corrupt{n}')
+                n += 1
+            os.replace(path, backup)
+            moved.append(backup)
+        return moved
+
+    def load_history(self, loaded_ids=()):
+        # Rows of the closed months not yet in the working set; from here
+        # on the caller's working set is the complete history
+        if self._compactor is not None:
+            self._compactor.join()
+        rows = []
+        for month in sorted(self.months.keys() - self.loaded):
+            rows.extend(t for t in self._read_segment(month) if t['id'] not in loaded_ids)
+        self.loaded = set(self.months)
+        with self._cache_lock:
+            self._cache.clear()
+        return rows
+
+    def discard_history(self):
+        # The working set replaces everything; the next write drops the
+        # segments it does not cover
+        self.loaded = set(self.months)
+        with self._cache_lock:
+            self._cache.clear()
+
+    def history_summaries(self):
+        # (month, summary) for the closed months outside the working set
+        return [(month, self.months[month]) for month in sorted(self.months.keys() - self.loaded)]
+
+    def iter_history(self):
+        # Rows of the closed months outside the working set, read through
+        # a bounded cache; for read-only passes such as analytics
+        for month, _ in self.history_summaries():
+            yield from self.month_rows(month)
+
+    def month_rows(self, month):
+        with self._cache_lock:
+            rows = self._cache.get(month)
+            if rows is not None:
+                self._cache.move_to_end(month)
+                return rows
+        rows = self._read_segment(month)
+        with self._cache_lock:
+            self._cache[month] = rows
+            while len(self._cache) > self.CACHE_MONTHS:
+                self._cache.popitem(last=False)
+        return rows
+
+    def is_closed(self, date_text):
+        return closed_month(date_text, current_month()) is not None
+
+    def touch(self, t):
+        # Called for every row added, changed or removed in the working set
+        month = closed_month(t['date'], current_month())
+        if month is not None:
+            self.dirty.add(month)
+
+    def _segment_file(self, month):
+        return self.segment_dir / f"{month}.wbin.z"
+
+    def _read_segment(self, month):
+        with open(self._segment_file(month), 'rb') as f:
+            snapshot = WalletSnapshot(zlib.decompress(f.read()))
+        try:
+            return snapshot.records()
+        finally:
+            snapshot.close()
+
+    def _read_log(self, path):
+        records = []
+        if path.exists():
+            with open(path, 'r') as f:
+                for line in f:
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        break  # torn final write
+        return records
+
+    def _touched_months(self, records, current):
+        # Closed months the records change, and whether any record could
+        # not be placed (deletes, and the date an update moved a row from,
+        # written before records carried it)
+        months, undated = set(), False
+        for record in records:
+            if record.get('op') == 'add':
+                month = closed_month(record['transaction'].get('date'), current)
+            elif record.get('op') == 'update':
+                if 'date' not in record:
+                    undated = True
+                old_month = closed_month(record.get('date'), current)
+                if old_month is not None:
+                    months.add(old_month)
+                month = closed_month(record['transaction'].get('date'), current)
+            elif record.get('op') == 'delete':
+                if 'date' not in record:
+                    undated = True
+                month = closed_month(record.get('date'), current)
+            else:
+                continue
+            if month is not None:
+                months.add(month)
+        return months, undated
+
+    def _replay(self, records, transactions, budgets, rules, dedupe=False):
+        positions = {t['id']: i for i, t in enumerate(transactions)}
+        for record in records:
+            op = record.get('op')
+            if op == 'add':
+                t = record['transaction']
+                if dedupe and t['id'] in positions:
+                    continue
+                positions[t['id']] = len(transactions)
+                transactions.append(t)
+            elif op == 'update':
+                t = record['transaction']
+                if t['id'] in positions:
+                    transactions[positions[t['id']]] = t
+            elif op == 'delete':
+                i = positions.pop(record['id'], None)
+                if i is not None:
+                    last = transactions.pop()
+                    if i < len(transactions):
+                        transactions[i] = last
+                        positions[last['id']] = i
+            elif op == 'budget':
+                # Records of older versions carry a bare monthly 'limit'
+                budget = record.get('budget', record.get('limit'))
+                if budget is None:
+                    budgets.pop(record['category'], None)
+                else:
+                    budgets[record['category']] = normalize_budget(budget)
+            elif op == 'rule':
+                if record.get('rule') is None:
+                    rules.pop(record['id'], None)
+                else:
+                    rules[record['id']] = record['rule']
+
+    def append(self, op, **fields):
+        record = {'op': op}
+        record.update(fields)
+        self._log_writer().submit(json.dumps(record) + '\n')
+        self.records += 1
+
+    def append_transactions(self, transactions):
+        # A batch of 'add' records in a single write
+        self._log_writer().submit(''.join(json.dumps({'op': 'add', 'transaction': t}) + '\n'
+                                          for t in transactions))
+        self.records += len(transactions)
+
+    def _log_writer(self):
+        if self._writer is None:
+            self._writer = BackgroundWriter(self._write_log)
+        return self._writer
+
+    def _write_log(self, chunks):
+        # A failed append (a full disk, say) is cut back to where it began:
+        # the writer retries the whole batch, and a torn line left in front
+        # of it would stop load() from replaying anything after it
+        data = ''.join(chunks).encode('utf-8')
+        with open(self.journal_file, 'ab', buffering=0) as f:
+            start = os.fstat(f.fileno()).st_size
+            try:
+                view = memoryview(data)
+                while view:
+                    view = view[f.write(view):]
+                os.fsync(f.fileno())
+            except OSError:
+                f.truncate(start)
+                raise
+
+    def flush(self):
+        if self._writer is not None:
+            self._writer.flush()
+
+    def close(self):
+        # Everything queued and any running compaction reach the disk
+        try:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+        finally:
+            if self._compactor is not None:
+                self._compactor.join()
+
+    def needs_compaction(self):
+        if self.upgrade or self.rolled or self.rotated_file.exists():
+            return True
+        if self.records >= self.COMPACT_RECORDS:
+            return True
+        return self.journal_file.exists() and self.journal_file.stat().st_size >= self.COMPACT_BYTES
+
+    def compact(self, transactions, budgets, rules):
+        if self._compactor is not None and self._compactor.is_alive():
+            return
+
+        # Start a fresh log; everything in the rotated one goes into the snapshot
+        self.flush()
+        if self.journal_file.exists():
+            if self.rotated_file.exists():
+                with open(self.rotated_file, 'a') as dst, open(self.journal_file, 'r') as src:
+                    dst.write(src.read())
+                self.journal_file.unlink()
+            else:
+                os.replace(self.journal_file, self.rotated_file)
+        self.records = 0
+
+        months = None if self.upgrade or self.rewrite_all else self.dirty
+        self.dirty = set()
+        self._compactor = threading.Thread(
+            target=self._write_snapshot,
+            args=(list(transactions), dict(budgets), dict(rules), months, self.history_loaded, True),
+            daemon=True
+        )
+        self._compactor.start()
+
+    def write_snapshot(self, transactions, budgets, rules):
+        # Synchronous rewrite of every month present in transactions
+        self.flush()
+        if self._compactor is not None:
+            self._compactor.join()
+        self._write_snapshot(transactions, budgets, rules, None, self.history_loaded, False)
+        for path in (self.journal_file, self.rotated_file):
+            if path.exists():
+                path.unlink()
+        self.records = 0
+        self.dirty = set()
+
+    def _write_snapshot(self, transactions, budgets, rules, months, complete, drop_rotated):
+        # months: closed months to rewrite (None for all present). With the
+        # complete history in hand, segments for months that no longer
+        # have any rows are removed.
+        current = current_month()
+        hot, closed = [], defaultdict(list)
+        for t in transactions:
+            month = closed_month(t['date'], current)
+            if month is None:
+                hot.append(t)
+            else:
+                closed[month].append(t)
+
+        manifest = dict(self.months)
+        write = {month for month in closed
+                 if months is None or month in months or month not in manifest}
+        stale = manifest.keys() - closed.keys() if complete else set()
+
+        # Segments first: until the hot snapshot is replaced, the old
+        # manifest and the rotated log still describe a consistent state
+        self.segment_dir.mkdir(exist_ok=True)
+        for month in sorted(write):
+            buf = io.BytesIO()
+            WalletSnapshot.write(buf, closed[month], {})
+            replace_file(self._segment_file(month),
+                         lambda f: f.write(zlib.compress(buf.getvalue())), 'wb')
+            manifest[month] = month_summary(closed[month])
+        for month in stale:
+            manifest.pop(month)
+
+        replace_file(self.snapshot_file,
+                     lambda f: WalletSnapshot.write(f, hot, budgets, manifest, rules), 'wb')
+
+        for month in stale:
+            segment = self._segment_file(month)
+            if segment.exists():
+                segment.unlink()
+        with self._cache_lock:
+            for month in write | stale:
+                self._cache.pop(month, None)
+        self.loaded = (self.loaded | write) - stale
+        self.months = manifest
+        self.upgrade = self.rewrite_all = self.rolled = False
+        if drop_rotated and self.rotated_file.exists():
+            self.rotated_file.unlink()
+
 
 class AdvancedWallet:
+    FILTER_DELAY_MS = 250   # debounce for search-as-you-type
+    FILTER_POLL_MS = 20     # how often filter results are collected
+    FILTER_CHUNK = 500      # rows delivered to the tree per chunk
+    CHART_CACHE_SIZE = 16   # rendered charts (and their data) kept in memory
+
+    # chart type -> (message when there is nothing to draw)
+    CHART_EMPTY_MESSAGES = {
+        'expense': "No expense transactions to display!",
+        'income': "No income transactions to display!",
+        'trend': "No transactions to display!",
+    }
+
     def __init__(self, root):
         self.root = root
         self.root.title("Personal Wallet - Advanced Version")
@@ -17,15 +1544,7 @@ class AdvancedWallet:
         self.root.configure(bg='#f0f0f0')
 
         # Data
-        self.transactions = []
-        self.budgets = {}
-        self.data_file = Path("wallet_data_v2.json")
-        self.load_data()
-
-        # Categories
-        self.income_categories = ["Salary", "Freelance", "Investment", "Gift", "Other"]
-        self.expense_categories = ["Food", "Transport", "Shopping", "Bills",
-                                   "Entertainment", "Healthcare", "Other"]
+        self.init_data(Path("wallet_data_v2.wbin"), legacy_file=Path("wallet_data_v2.json"))
 
         # Search filters
         self.search_var = tk.StringVar()
@@ -36,6 +1555,48 @@ class AdvancedWallet:
         self.create_menu()
         self.create_widgets()
         self.update_all()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+
+    def init_data(self, data_file, legacy_file=None):
+        # Everything but the Tk window and its variables: the working set,
+        # its indexes and the state of the Transactions tab's filter
+        self.transactions = []
+        self.budgets = {}
+        self.aggregates = WalletAggregates()
+        self.rollups = TimeRollups()
+        self.spending = CategorySpending()
+        self.recurring = RecurringRules()
+        self.trend_range = None  # (start, end) dates shown by the trend; None = all
+        self.columns = None  # built on first use by analytics_columns()
+        # Guarded by chart_lock; see join_columns()
+        self.month_columns = {}      # closed month on disk -> (summary, columns)
+        self.history_columns = None  # (key, columns) for working set + closed months
+        self.search_index = TransactionSearchIndex()
+        self.by_date = []  # sorted (date, id) pairs
+        self.content_index = {}  # content_key -> id
+        self.data_version = 0    # bumped on every change; keys the chart caches
+        self.chart_images = OrderedDict()  # (chart, version, day, width, height) -> PNG
+        self.chart_data = OrderedDict()    # (chart, (version, day)) -> grouped totals
+        self.chart_lock = threading.Lock()
+        self.chart_generation = 0
+        # Binary working store; the JSON file of older versions is read once
+        # and rewritten in the binary format
+        self.data_file = Path(data_file)
+        self.journal = WalletJournal(self.data_file, legacy_file=legacy_file)
+        self.positions = {}  # transaction id -> index in self.transactions
+        self.load_data()
+        self.rebuild_indexes()
+        self.active_filter = None  # (search, type, category) shown in trans_tree
+        self.trans_tree = None     # built with the Transactions tab
+        self.filter_after = None       # pending debounced apply_filter
+        self.filter_generation = 0     # bumped to cancel an in-flight filter
+        self.filter_running = False
+        self.filter_results = queue.Queue()
+
+        # Categories
+        self.income_categories = ["Salary", "Freelance", "Investment", "Gift", "Other"]
+        self.expense_categories = ["Food", "Transport", "Shopping", "Bills",
+                                   "Entertainment", "Healthcare", "Other"]
 
     def create_menu(self):
         menubar = tk.Menu(self.root)
@@ -47,14 +1608,17 @@ class AdvancedWallet:
         file_menu.add_command(label="Export JSON", command=self.export_json)
         file_menu.add_command(label="Import JSON", command=self.import_json)
         file_menu.add_command(label="Export CSV", command=self.export_csv)
+        file_menu.add_command(label="Import Bank CSV", command=self.import_bank_csv)
         file_menu.add_separator()
-        file_menu.add_command(label="Exit", command=self.root.quit)
+        file_menu.add_command(label="Exit", command=self.on_close)
 
         # Budget Menu
         budget_menu = tk.Menu(menubar, tearoff=0)
         menubar.add_cascade(label="Budget", menu=budget_menu)
         budget_menu.add_command(label="Set Budget", command=self.open_budget_window)
         budget_menu.add_command(label="View Budget Status", command=self.show_budget_status)
+        budget_menu.add_separator()
+        budget_menu.add_command(label="Recurring Transactions", command=self.open_recurring_window)
 
         # Analytics Menu
         analytics_menu = tk.Menu(menubar, tearoff=0)
@@ -68,18 +1632,29 @@ class AdvancedWallet:
         self.notebook = ttk.Notebook(self.root)
         self.notebook.pack(fill='both', expand=True, padx=10, pady=10)
 
-        # Tab 1: Dashboard
-        self.create_dashboard_tab()
-
-        # Tab 2: Transactions
-        self.create_transactions_tab()
-
-        # Tab 3: Analytics
-        self.create_analytics_tab()
-
-    def create_dashboard_tab(self):
-        dashboard_frame = tk.Frame(self.notebook, bg='white')
-        self.notebook.add(dashboard_frame, text="📊 Dashboard")
+        # Each tab gets an empty frame now and its contents the first time
+        # it is selected, so the window appears before the heavy tabs exist
+        self.tab_builders = [self.create_dashboard_tab,
+                             self.create_transactions_tab,
+                             self.create_analytics_tab]
+        self.tab_frames = []
+        for text in ("📊 Dashboard", "💳 Transactions", "📈 Analytics"):
+            frame = tk.Frame(self.notebook, bg='white')
+            self.notebook.add(frame, text=text)
+            self.tab_frames.append(frame)
+        self.built_tabs = set()
+        self.build_tab(0)
+        self.notebook.bind('<<NotebookTabChanged>>', self.on_tab_changed)
+
+    def on_tab_changed(self, event=None):
+        self.build_tab(self.notebook.index('current'))
+
+    def build_tab(self, index):
+        if index not in self.built_tabs:
+            self.built_tabs.add(index)
+            self.tab_builders[index](self.tab_frames[index])
+
+    def create_dashboard_tab(self, dashboard_frame):
 
         # Title
         title_frame = tk.Frame(dashboard_frame, bg='#2c3e50', height=60)
@@ -140,9 +1715,7 @@ class AdvancedWallet:
         self.budget_text = tk.Text(budget_frame, font=('Arial', 10), height=15, wrap='word')
         self.budget_text.pack(fill='both', expand=True, padx=10, pady=10)
 
-    def create_transactions_tab(self):
-        trans_frame = tk.Frame(self.notebook, bg='white')
-        self.notebook.add(trans_frame, text="💳 Transactions")
+    def create_transactions_tab(self, trans_frame):
 
         # Top Frame: Add Transaction
         add_frame = tk.LabelFrame(trans_frame, text="Add New Transaction",
@@ -207,17 +1780,20 @@ class AdvancedWallet:
         search_entry = tk.Entry(filter_controls, textvariable=self.search_var,
                                font=('Arial', 10), width=20)
         search_entry.pack(side='left', padx=5)
+        self.search_var.trace_add('write', self.schedule_filter)
 
         tk.Label(filter_controls, text="Type:", font=('Arial', 10), bg='white').pack(side='left', padx=(20,5))
         type_filter = ttk.Combobox(filter_controls, textvariable=self.filter_type_var,
                                   values=["all", "income", "expense"], width=10, state='readonly')
         type_filter.pack(side='left', padx=5)
+        type_filter.bind('<<ComboboxSelected>>', self.schedule_filter)
 
         tk.Label(filter_controls, text="Category:", font=('Arial', 10), bg='white').pack(side='left', padx=(20,5))
         all_cats = ["all"] + self.income_categories + self.expense_categories
         cat_filter = ttk.Combobox(filter_controls, textvariable=self.filter_category_var,
                                  values=list(set(all_cats)), width=15, state='readonly')
         cat_filter.pack(side='left', padx=5)
+        cat_filter.bind('<<ComboboxSelected>>', self.schedule_filter)
 
         tk.Button(filter_controls, text="Apply Filter", font=('Arial', 10),
                  bg='#16a085', fg='white', command=self.apply_filter).pack(side='left', padx=20)
@@ -233,9 +1809,12 @@ class AdvancedWallet:
         tree_scroll = tk.Scrollbar(list_frame)
         tree_scroll.pack(side='right', fill='y')
 
-        self.trans_tree = ttk.Treeview(list_frame, yscrollcommand=tree_scroll.set,
-                                       columns=("Date", "Type", "Category", "Amount", "Description"),
-                                       show='headings', height=15)
+        # Only the visible rows are materialized; the item iid is the transaction id
+        self.trans_tree = VirtualTreeview(list_frame, self.transaction_row,
+                                          key=lambda t: t['id'],
+                                          yscrollcommand=tree_scroll.set,
+                                          columns=("Date", "Type", "Category", "Amount", "Description"),
+                                          show='headings', height=15)
         self.trans_tree.pack(fill='both', expand=True, padx=10, pady=10)
         tree_scroll.config(command=self.trans_tree.yview)
 
@@ -256,22 +1835,30 @@ class AdvancedWallet:
         self.trans_tree.tag_configure('income', foreground='#27ae60')
         self.trans_tree.tag_configure('expense', foreground='#e74c3c')
 
-        # Delete button
-        tk.Button(list_frame, text="Delete Selected", font=('Arial', 10, 'bold'),
-                 bg='#e74c3c', fg='white', command=self.delete_transaction).pack(pady=5)
+        # Edit / Delete buttons
+        button_row = tk.Frame(list_frame, bg='white')
+        button_row.pack(pady=5)
+        tk.Button(button_row, text="Edit Selected", font=('Arial', 10, 'bold'),
+                 bg='#f39c12', fg='white', command=self.edit_transaction).pack(side='left', padx=5)
+        tk.Button(button_row, text="Delete Selected", font=('Arial', 10, 'bold'),
+                 bg='#e74c3c', fg='white', command=self.delete_transaction).pack(side='left', padx=5)
+
+        self.load_history()  # the list covers every month
+        self.refresh_transaction_tree()
 
-    def create_analytics_tab(self):
-        analytics_frame = tk.Frame(self.notebook, bg='white')
-        self.notebook.add(analytics_frame, text="📈 Analytics")
+    def create_analytics_tab(self, analytics_frame):
+        # Warm matplotlib up while the user picks a chart
+        BackgroundJob(lambda job: load_matplotlib())
 
         # Chart Frame
         chart_frame = tk.Frame(analytics_frame, bg='white')
         chart_frame.pack(fill='both', expand=True, padx=10, pady=10)
 
-        # Create figure for chart
-        self.fig = Figure(figsize=(10, 6), dpi=100)
-        self.canvas = FigureCanvasTkAgg(self.fig, master=chart_frame)
-        self.canvas.get_tk_widget().pack(fill='both', expand=True)
+        # Charts are rendered off-thread to PNG and shown as an image
+        self.chart_label = tk.Label(chart_frame, bg='white', font=('Arial', 11),
+                                    text="Choose a chart below")
+        self.chart_label.pack(fill='both', expand=True)
+        self.chart_image = None
 
         # Button Frame
         button_frame = tk.Frame(analytics_frame, bg='white')
@@ -287,6 +1874,16 @@ class AdvancedWallet:
                  bg='#3498db', fg='white', command=self.show_monthly_trend,
                  width=20).pack(side='left', padx=5)
 
+        # Zoom/pan for the trend; the resolution follows the visible range
+        for text, command in (("▶", lambda: self.pan_trend(1)),
+                              ("Zoom Out", lambda: self.zoom_trend(2)),
+                              ("Zoom In", lambda: self.zoom_trend(0.5)),
+                              ("◀", lambda: self.pan_trend(-1))):
+            tk.Button(button_frame, text=text, font=('Arial', 10),
+                     command=command).pack(side='right', padx=2)
+        tk.Button(button_frame, text="All", font=('Arial', 10),
+                 command=self.reset_trend).pack(side='right', padx=2)
+
     def update_categories(self):
         if self.type_var.get() == "income":
             self.category_combo['values'] = self.income_categories
@@ -298,7 +1895,6 @@ class AdvancedWallet:
         try:
             amount = float(self.amount_entry.get())
             category = self.category_var.get()
-            date = self.date_entry.get()
             description = self.desc_entry.get()
             trans_type = self.type_var.get()
 
@@ -310,19 +1906,34 @@ class AdvancedWallet:
                 messagebox.showwarning("Warning", "Amount must be greater than 0!")
                 return
 
+            # Month partitioning and every date index trust the ISO form
+            try:
+                day = date.fromisoformat(self.date_entry.get().strip()).isoformat()
+            except ValueError:
+                messagebox.showerror("Error", "Please enter a valid date (YYYY-MM-DD)!")
+                return
+
+            # A closed month is rewritten whole, so its rows must be loaded
+            if self.journal.is_closed(day):
+                self.load_history()
+
             transaction = {
-                'id': datetime.now().timestamp(),
+                'id': str(uuid.uuid4()),
                 'type': trans_type,
                 'amount': amount,
                 'category': category,
-                'date': date,
+                'date': day,
                 'description': description,
                 'timestamp': datetime.now().isoformat()
             }
 
+            self.positions[transaction['id']] = len(self.transactions)
             self.transactions.append(transaction)
-            self.save_data()
-            self.update_all()
+            self.index_add(transaction)
+            self.append_column(transaction)
+            self.journal.append('add', transaction=transaction)
+            self.compact_if_needed()
+            self.update_all(('add', transaction))
 
             # Clear form
             self.amount_entry.delete(0, 'end')
@@ -342,43 +1953,44 @@ class AdvancedWallet:
 
     def check_budget_alert(self, category, amount):
         if category in self.budgets:
-            budget_limit = self.budgets[category]
-            current_month = datetime.now().strftime("%Y-%m")
-
-            # Calculate current month spending for this category
-            monthly_spending = sum(
-                t['amount'] for t in self.transactions
-                if t['type'] == 'expense' and t['category'] == category
-                and t['date'].startswith(current_month)
-            )
+            # Spending for this category in the current budget period
+            budget_limit, start, end, period_spending = budget_usage(
+                category, self.budgets[category], self.spending, date.today(), self.recurring)
 
-            percentage = (monthly_spending / budget_limit) * 100
+            percentage = (period_spending / budget_limit) * 100 if budget_limit > 0 else 0
 
-            if monthly_spending > budget_limit:
+            if period_spending > budget_limit:
                 messagebox.showwarning(
                     "Budget Exceeded!",
-                    f"You have exceeded your budget for {category}!\n"
+                    f"You have exceeded your {self.budgets[category]['period']} budget for {category}!\n"
                     f"Budget: ${budget_limit:.2f}\n"
-                    f"Spent: ${monthly_spending:.2f}\n"
-                    f"Over by: ${monthly_spending - budget_limit:.2f}"
+                    f"Spent: ${period_spending:.2f}\n"
+                    f"Over by: ${period_spending - budget_limit:.2f}"
                 )
             elif percentage >= 80:
                 messagebox.showinfo(
                     "Budget Warning",
-                    f"You have used {percentage:.1f}% of your {category} budget.\n"
+                    f"You have used {percentage:.1f}% of your {self.budgets[category]['period']} {category} budget.\n"
                     f"Budget: ${budget_limit:.2f}\n"
-                    f"Spent: ${monthly_spending:.2f}\n"
-                    f"Remaining: ${budget_limit - monthly_spending:.2f}"
+                    f"Spent: ${period_spending:.2f}\n"
+                    f"Remaining: ${budget_limit - period_spending:.2f}"
                 )
 
-    def update_all(self):
+    def update_all(self, change=None):
+        # change is an (op, transaction) pair for a single add/delete, or
+        # ('update', edited, replaced); without one the list is rebuilt
+        if change is None:
+            self.refresh_transaction_tree()
+        else:
+            self.apply_tree_change(*change)
         self.update_dashboard()
-        self.refresh_transaction_tree()
         self.update_budget_alerts()
 
     def update_dashboard(self):
-        total_income = sum(t['amount'] for t in self.transactions if t['type'] == 'income')
-        total_expense = sum(t['amount'] for t in self.transactions if t['type'] == 'expense')
+        # Recurring rules count every occurrence up to today
+        today = date.today()
+        total_income = self.aggregates.total('income') + self.recurring.total('income', None, today)
+        total_expense = self.aggregates.total('expense') + self.recurring.total('expense', None, today)
         balance = total_income - total_expense
 
         self.dash_income_label.config(text=f"${total_income:.2f}")
@@ -387,9 +1999,9 @@ class AdvancedWallet:
 
         # Update recent transactions
         self.recent_listbox.delete(0, 'end')
-        sorted_trans = sorted(self.transactions, key=lambda x: x['timestamp'], reverse=True)[:5]
-
-        for t in sorted_trans:
+        recent = heapq.merge(self.ordered, self.recurring.occurrences(None, today, newest_first=True),
+                             key=lambda t: t['timestamp'], reverse=True)
+        for t in itertools.islice(recent, 5):
             sign = "+" if t['type'] == 'income' else "-"
             display = f"{t['date']} | {t['category']:12} | {sign}${t['amount']:.2f}"
             self.recent_listbox.insert('end', display)
@@ -404,25 +2016,22 @@ class AdvancedWallet:
             self.budget_text.insert('end', "No budgets set. Go to Budget > Set Budget to create one.\n\n")
             return
 
-        current_month = datetime.now().strftime("%Y-%m")
-        self.budget_text.insert('end', f"Budget Status for {current_month}:\n\n", 'title')
+        today = date.today()
+        self.budget_text.insert('end', f"Budget Status for {today.isoformat()}:\n\n", 'title')
 
-        for category, budget_limit in self.budgets.items():
-            monthly_spending = sum(
-                t['amount'] for t in self.transactions
-                if t['type'] == 'expense' and t['category'] == category
-                and t['date'].startswith(current_month)
-            )
+        for category, budget in self.budgets.items():
+            budget_limit, start, end, period_spending = budget_usage(
+                category, budget, self.spending, today, self.recurring)
 
-            remaining = budget_limit - monthly_spending
-            percentage = (monthly_spending / budget_limit) * 100 if budget_limit > 0 else 0
+            remaining = budget_limit - period_spending
+            percentage = (period_spending / budget_limit) * 100 if budget_limit > 0 else 0
 
-            status_text = f"📊 {category}:\n"
+            status_text = f"📊 {category} ({budget['period']}, {start.isoformat()} to {end.isoformat()}):\n"
             status_text += f"   Budget: ${budget_limit:.2f}\n"
-            status_text += f"   Spent: ${monthly_spending:.2f} ({percentage:.1f}%)\n"
+            status_text += f"   Spent: ${period_spending:.2f} ({percentage:.1f}%)\n"
             status_text += f"   Remaining: ${remaining:.2f}\n"
 
-            if monthly_spending > budget_limit:
+            if period_spending > budget_limit:
                 status_text += "   ⚠️ EXCEEDED!\n\n"
                 self.budget_text.insert('end', status_text, 'exceeded')
             elif percentage >= 80:
@@ -438,62 +2047,181 @@ class AdvancedWallet:
         self.budget_text.tag_config('warning', foreground='#e67e22')
         self.budget_text.tag_config('ok', foreground='#27ae60')
 
-    def refresh_transaction_tree(self):
-        # Clear existing items
-        for item in self.trans_tree.get_children():
-            self.trans_tree.delete(item)
+    def transaction_row(self, t):
+        sign = "+" if t['type'] == 'income' else "-"
+        amount_str = f"{sign}${t['amount']:.2f}"
+        tag = 'income' if t['type'] == 'income' else 'expense'
+        values = (t['date'], t['type'].capitalize(), t['category'], amount_str, t['description'])
+        return values, (tag,)
+
+    def rebuild_order(self):
+        # All transactions, newest first; kept sorted by apply_tree_change
+        self.ordered = sorted(self.transactions, key=lambda x: x['timestamp'], reverse=True)
+
+    def order_position(self, rows, t):
+        # Binary search for the slot of t in a newest-first list
+        lo, hi = 0, len(rows)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if rows[mid]['timestamp'] >= t['timestamp']:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def row_index(self, rows, t):
+        # Index of t itself among the rows that share its timestamp
+        i = self.order_position(rows, t) - 1
+        while i >= 0 and rows[i]['timestamp'] == t['timestamp']:
+            if rows[i] is t:
+                return i
+            i -= 1
+        return None
+
+    def apply_tree_change(self, op, t, replaced=None):
+        # Without a filter the tree shows self.ordered itself, so the tree
+        # operation also keeps the ordered list up to date. An update swaps
+        # the edited record in for the one it replaced; the timestamp, and
+        # so the row's place, is unchanged.
+        if self.trans_tree is None or self.active_filter is not None:
+            if op == 'add':
+                self.ordered.insert(self.order_position(self.ordered, t), t)
+            elif op == 'delete':
+                i = self.row_index(self.ordered, t)
+                if i is not None:
+                    del self.ordered[i]
+            elif op == 'update':
+                i = self.row_index(self.ordered, replaced)
+                if i is not None:
+                    self.ordered[i] = t
+            if self.trans_tree is None:
+                return  # the Transactions tab shows self.ordered once built
+            if self.filter_running:
+                # The rows still arriving may predate this change; start over
+                self.apply_filter()
+                return
 
-        # Sort transactions by date (newest first)
-        sorted_trans = sorted(self.transactions, key=lambda x: x['timestamp'], reverse=True)
+        rows = self.trans_tree.rows
+        if op == 'add':
+            if self.active_filter is None or self.transaction_matches(t, *self.active_filter):
+                self.trans_tree.insert_row(self.order_position(rows, t), t)
+        elif op == 'delete':
+            i = self.row_index(rows, t)
+            if i is not None:
+                self.trans_tree.remove_row(i)
+        elif op == 'update':
+            # An edit can move the row in or out of the active filter
+            i = self.row_index(rows, replaced)
+            shown = self.active_filter is None or self.transaction_matches(t, *self.active_filter)
+            if i is not None and shown:
+                self.trans_tree.update_row(i, t)
+            elif i is not None:
+                self.trans_tree.remove_row(i)
+            elif shown:
+                self.trans_tree.insert_row(self.order_position(rows, t), t)
 
-        for t in sorted_trans:
-            sign = "+" if t['type'] == 'income' else "-"
-            amount_str = f"{sign}${t['amount']:.2f}"
-            tag = 'income' if t['type'] == 'income' else 'expense'
+    def refresh_transaction_tree(self):
+        if self.trans_tree is None:
+            return
+        self.filter_generation += 1
+        self.filter_running = False
+        self.active_filter = None
+        self.trans_tree.set_rows(self.ordered)
+
+    def transaction_matches(self, t, search_term, type_filter, category_filter):
+        if type_filter != "all" and t['type'] != type_filter:
+            return False
+        if category_filter != "all" and t['category'] != category_filter:
+            return False
+        if search_term:
+            return search_term in t['description'].lower() or search_term in t['category'].lower()
+        return True
 
-            self.trans_tree.insert('', 'end', values=(
-                t['date'], t['type'].capitalize(), t['category'],
-                amount_str, t['description']
-            ), tags=(tag,))
+    def schedule_filter(self, *args):
+        # Coalesce keystrokes and combobox changes into one apply_filter
+        if self.filter_after is not None:
+            self.root.after_cancel(self.filter_after)
+        self.filter_after = self.root.after(self.FILTER_DELAY_MS, self.apply_filter)
 
     def apply_filter(self):
-        # Clear existing items
-        for item in self.trans_tree.get_children():
-            self.trans_tree.delete(item)
+        if self.filter_after is not None:
+            self.root.after_cancel(self.filter_after)
+            self.filter_after = None
 
         search_term = self.search_var.get().lower()
         type_filter = self.filter_type_var.get()
         category_filter = self.filter_category_var.get()
+        if not search_term and type_filter == "all" and category_filter == "all":
+            self.refresh_transaction_tree()
+            return
 
-        filtered_trans = self.transactions
-
-        # Apply type filter
-        if type_filter != "all":
-            filtered_trans = [t for t in filtered_trans if t['type'] == type_filter]
-
-        # Apply category filter
-        if category_filter != "all":
-            filtered_trans = [t for t in filtered_trans if t['category'] == category_filter]
-
-        # Apply search filter
-        if search_term:
-            filtered_trans = [
-                t for t in filtered_trans
-                if search_term in t['description'].lower() or search_term in t['category'].lower()
-            ]
-
-        # Display filtered results
-        sorted_trans = sorted(filtered_trans, key=lambda x: x['timestamp'], reverse=True)
-
-        for t in sorted_trans:
-            sign = "+" if t['type'] == 'income' else "-"
-            amount_str = f"{sign}${t['amount']:.2f}"
-            tag = 'income' if t['type'] == 'income' else 'expense'
+        # Matching runs on a worker; rows reach the tree in chunks, and a
+        # newer query makes the worker and the poller drop out
+        self.filter_generation += 1
+        self.filter_running = True
+        self.active_filter = (search_term, type_filter, category_filter)
+        self.trans_tree.set_rows([])
+        # The worker walks a copy of the ordered list; a change made while it
+        # runs restarts the filter (see apply_tree_change)
+        threading.Thread(target=self.filter_worker,
+                         args=(self.filter_generation, list(self.ordered), self.active_filter),
+                         daemon=True).start()
+        self.root.after(self.FILTER_POLL_MS, self.poll_filter_results, self.filter_generation)
+
+    def filter_worker(self, generation, ordered, criteria):
+        try:
+            for chunk in self.filtered_chunks(ordered, *criteria):
+                if generation != self.filter_generation:
+                    return
+                self.filter_results.put((generation, chunk))
+        except (RuntimeError, KeyError, IndexError):
+            pass  # an index changed underneath us; that change restarts the filter
+        finally:
+            self.filter_results.put((generation, None))
+
+    def filtered_chunks(self, ordered, search_term, type_filter, category_filter):
+        ids = self.search_index.search(search_term, type_filter, category_filter)
+        if len(ids) * 8 > len(ordered):
+            # Large result sets are cheaper to pick out of the ordered list
+            # than to sort, and the first chunk is ready almost at once
+            chunk = []
+            for t in ordered:
+                if t['id'] in ids:
+                    chunk.append(t)
+                    if len(chunk) == self.FILTER_CHUNK:
+                        yield chunk
+                        chunk = []
+            if chunk:
+                yield chunk
+            return
 
-            self.trans_tree.insert('', 'end', values=(
-                t['date'], t['type'].capitalize(), t['category'],
-                amount_str, t['description']
-            ), tags=(tag,))
+        matches = []
+        transactions, positions = self.transactions, self.positions
+        for i in ids:
+            position = positions.get(i)
+            t = transactions[position] if position is not None else None
+            if t is None or t['id'] != i:
+                return  # deleted or moved since the search; the change restarts the filter
+            matches.append(t)
+        matches.sort(key=lambda x: x['timestamp'], reverse=True)
+        for start in range(0, len(matches), self.FILTER_CHUNK):
+            yield matches[start:start + self.FILTER_CHUNK]
+
+    def poll_filter_results(self, generation):
+        if generation != self.filter_generation:
+            return
+        while True:
+            try:
+                result_generation, chunk = self.filter_results.get_nowait()
+            except queue.Empty:
+                break
+            if result_generation != self.filter_generation:
+                continue
+            if chunk is None:
+                self.filter_running = False
+                return
+            self.trans_tree.extend_rows(chunk)
+        self.root.after(self.FILTER_POLL_MS, self.poll_filter_results, generation)
 
     def clear_filter(self):
         self.search_var.set("")
@@ -502,43 +2230,115 @@ class AdvancedWallet:
         self.refresh_transaction_tree()
 
     def delete_transaction(self):
-        selection = self.trans_tree.selection()
+        selection = self.trans_tree.selected_rows()
         if not selection:
             messagebox.showwarning("Warning", "Please select a transaction to delete!")
             return
 
         if messagebox.askyesno("Confirm", "Are you sure you want to delete this transaction?"):
-            item = self.trans_tree.item(selection[0])
-            values = item['values']
-
-            # Find and remove transaction
-            date, trans_type, category, amount_str, description = values
-            trans_type = trans_type.lower()
-            amount = float(amount_str.replace('+', '').replace('-', '').replace('$', ''))
-
-            for t in self.transactions:
-                if (t['date'] == date and t['type'] == trans_type and
-                    t['category'] == category and t['amount'] == amount):
-                    self.transactions.remove(t)
-                    break
+            t = self.remove_transaction(selection[0]['id'])
+            self.index_remove(t)
+            self.journal.append('delete', id=t['id'], date=t['date'])
 
-            self.save_data()
-            self.update_all()
+            self.compact_if_needed()
+            self.update_all(('delete', t))
             messagebox.showinfo("Success", "Transaction deleted successfully!")
 
+    def remove_transaction(self, trans_id):
+        # O(1): the last transaction takes the freed slot
+        i = self.positions.pop(trans_id)
+        t = self.transactions[i]
+        last = self.transactions.pop()
+        if last is not t:
+            self.transactions[i] = last
+            self.positions[last['id']] = i
+        if self.columns is not None:
+            self.columns.remove(i)
+        return t
+
+    def edit_transaction(self):
+        selection = self.trans_tree.selected_rows()
+        if not selection:
+            messagebox.showwarning("Warning", "Please select a transaction to edit!")
+            return
+        t = self.transactions[self.positions[selection[0]['id']]]
+
+        edit_win = tk.Toplevel(self.root)
+        edit_win.title("Edit Transaction")
+        edit_win.geometry("400x260")
+        edit_win.configure(bg='white')
+
+        form = tk.Frame(edit_win, bg='white')
+        form.pack(fill='both', expand=True, padx=20, pady=20)
+
+        categories = self.income_categories if t['type'] == 'income' else self.expense_categories
+        fields = {}
+        for row, (label, key) in enumerate([("Amount:", 'amount'), ("Category:", 'category'),
+                                            ("Date:", 'date'), ("Description:", 'description')]):
+            tk.Label(form, text=label, font=('Arial', 10), bg='white',
+                     width=12, anchor='w').grid(row=row, column=0, pady=5)
+            if key == 'category':
+                widget = ttk.Combobox(form, values=categories, font=('Arial', 10),
+                                      width=22, state='readonly')
+                widget.set(t['category'])
+            else:
+                widget = tk.Entry(form, font=('Arial', 10), width=25)
+                widget.insert(0, str(t[key]))
+            widget.grid(row=row, column=1, pady=5)
+            fields[key] = widget
+
+        def save_edit():
+            try:
+                amount = float(fields['amount'].get())
+            except ValueError:
+                messagebox.showerror("Error", "Please enter a valid amount!")
+                return
+            if amount <= 0:
+                messagebox.showwarning("Warning", "Amount must be greater than 0!")
+                return
+
+            try:
+                day = date.fromisoformat(fields['date'].get().strip()).isoformat()
+            except ValueError:
+                messagebox.showerror("Error", "Please enter a valid date (YYYY-MM-DD)!")
+                return
+
+            # The edit is a new record in t's slot: a compaction running on
+            # the writer may still be serializing t itself
+            edited = dict(t, amount=amount, category=fields['category'].get(),
+                          date=day, description=fields['description'].get())
+            self.index_remove(t)
+            self.transactions[self.positions[t['id']]] = edited
+            self.index_add(edited)
+            self.update_column(edited)
+            self.journal.append('update', transaction=edited, date=t['date'])
+            self.compact_if_needed()
+            self.update_all(('update', edited, t))
+            edit_win.destroy()
+
+        tk.Button(edit_win, text="Save Changes", font=('Arial', 11, 'bold'),
+                 bg='#27ae60', fg='white', command=save_edit, width=20).pack(pady=10)
+
     def open_budget_window(self):
         budget_win = tk.Toplevel(self.root)
-        budget_win.title("Set Monthly Budget")
-        budget_win.geometry("400x500")
+        budget_win.title("Set Budget")
+        budget_win.geometry("640x500")
         budget_win.configure(bg='white')
 
-        tk.Label(budget_win, text="Set Monthly Budget by Category",
+        tk.Label(budget_win, text="Set Budget by Category",
                 font=('Arial', 14, 'bold'), bg='white').pack(pady=20)
 
         budget_frame = tk.Frame(budget_win, bg='white')
         budget_frame.pack(fill='both', expand=True, padx=20, pady=10)
 
-        budget_entries = {}
+        header = tk.Frame(budget_frame, bg='white')
+        header.pack(fill='x')
+        for text, width in (("Category", 15), ("Limit", 12), ("Period", 11),
+                            ("Start", 12), ("End", 12)):
+            tk.Label(header, text=text, font=('Arial', 10, 'bold'), bg='white',
+                    width=width, anchor='w').pack(side='left', padx=(0, 6))
+
+        budget_entries = {}  # category -> (limit, period, start, end) widgets
 
         for category in self.expense_categories:
             cat_frame = tk.Frame(budget_frame, bg='white')
@@ -547,30 +2347,68 @@ class AdvancedWallet:
             tk.Label(cat_frame, text=f"{category}:", font=('Arial', 10),
                     bg='white', width=15, anchor='w').pack(side='left')
 
-            entry = tk.Entry(cat_frame, font=('Arial', 10), width=15)
-            entry.pack(side='left', padx=10)
-
-            # Set current budget value if exists
-            if category in self.budgets:
-                entry.insert(0, str(self.budgets[category]))
-
-            budget_entries[category] = entry
+            entry = tk.Entry(cat_frame, font=('Arial', 10), width=12)
+            entry.pack(side='left', padx=(0, 6))
+            period_var = tk.StringVar(value='monthly')
+            period_combo = ttk.Combobox(cat_frame, textvariable=period_var, values=BUDGET_PERIODS,
+                                        state='readonly', width=10)
+            period_combo.pack(side='left', padx=(0, 6))
+            # Start and end only apply to custom periods
+            start_entry = tk.Entry(cat_frame, font=('Arial', 10), width=12)
+            start_entry.pack(side='left', padx=(0, 6))
+            end_entry = tk.Entry(cat_frame, font=('Arial', 10), width=12)
+            end_entry.pack(side='left')
+
+            # Set current budget values if exists
+            budget = self.budgets.get(category)
+            if budget is not None:
+                entry.insert(0, str(budget['limit']))
+                period_var.set(budget['period'])
+                start_entry.insert(0, budget.get('start', ''))
+                end_entry.insert(0, budget.get('end', ''))
+
+            def update_dates(event=None, var=period_var, entries=(start_entry, end_entry)):
+                for date_entry in entries:
+                    date_entry.config(state='normal' if var.get() == 'custom' else 'disabled')
+
+            period_combo.bind('<<ComboboxSelected>>', update_dates)
+            update_dates()
+            budget_entries[category] = (entry, period_var, start_entry, end_entry)
 
         def save_budgets():
             try:
-                for category, entry in budget_entries.items():
+                budgets = {}
+                for category, (entry, period_var, start_entry, end_entry) in budget_entries.items():
                     value = entry.get()
-                    if value:
-                        self.budgets[category] = float(value)
-                    elif category in self.budgets:
-                        del self.budgets[category]
-
-                self.save_data()
-                self.update_budget_alerts()
-                messagebox.showinfo("Success", "Budgets saved successfully!")
-                budget_win.destroy()
+                    if not value:
+                        budgets[category] = None
+                        continue
+                    budget = {'limit': float(value), 'period': period_var.get()}
+                    if budget['period'] == 'custom':
+                        start = date.fromisoformat(start_entry.get().strip())
+                        end = date.fromisoformat(end_entry.get().strip())
+                        if end < start:
+                            raise ValueError
+                        budget['start'], budget['end'] = start.isoformat(), end.isoformat()
+                    budgets[category] = budget
             except ValueError:
-                messagebox.showerror("Error", "Please enter valid numbers!")
+                messagebox.showerror("Error", "Please enter valid numbers, and valid start and "
+                                              "end dates (YYYY-MM-DD) for custom periods!")
+                return
+
+            for category, budget in budgets.items():
+                if budget == self.budgets.get(category):
+                    continue
+                if budget is not None:
+                    self.budgets[category] = budget
+                else:
+                    del self.budgets[category]
+                self.journal.append('budget', category=category, budget=budget)
+
+            self.compact_if_needed()
+            self.update_budget_alerts()
+            messagebox.showinfo("Success", "Budgets saved successfully!")
+            budget_win.destroy()
 
         tk.Button(budget_win, text="Save Budgets", font=('Arial', 11, 'bold'),
                  bg='#27ae60', fg='white', command=save_budgets,
@@ -582,7 +2420,7 @@ class AdvancedWallet:
         status_win.geometry("600x500")
         status_win.configure(bg='white')
 
-        tk.Label(status_win, text="Monthly Budget Status",
+        tk.Label(status_win, text="Budget Status",
                 font=('Arial', 16, 'bold'), bg='white').pack(pady=20)
 
         # Create text widget with scrollbar
@@ -598,47 +2436,9 @@ class AdvancedWallet:
         scrollbar.config(command=text_widget.yview)
 
         # Generate report
-        current_month = datetime.now().strftime("%Y-%m")
-
-        if not self.budgets:
-            text_widget.insert('end', "No budgets have been set yet.\n\n")
-        else:
-            text_widget.insert('end', f"Budget Report for {current_month}\n", 'title')
-            text_widget.insert('end', "=" * 60 + "\n\n")
-
-            total_budget = 0
-            total_spent = 0
-
-            for category, budget_limit in self.budgets.items():
-                monthly_spending = sum(
-                    t['amount'] for t in self.transactions
-                    if t['type'] == 'expense' and t['category'] == category
-                    and t['date'].startswith(current_month)
-                )
-
-                total_budget += budget_limit
-                total_spent += monthly_spending
-
-                remaining = budget_limit - monthly_spending
-                percentage = (monthly_spending / budget_limit) * 100 if budget_limit > 0 else 0
-
-                text_widget.insert('end', f"\n{category}\n", 'category')
-                text_widget.insert('end', f"  Budget Limit:  ${budget_limit:.2f}\n")
-                text_widget.insert('end', f"  Amount Spent:  ${monthly_spending:.2f}\n")
-                text_widget.insert('end', f"  Remaining:     ${remaining:.2f}\n")
-                text_widget.insert('end', f"  Usage:         {percentage:.1f}%\n")
-
-                if monthly_spending > budget_limit:
-                    text_widget.insert('end', f"  Status:        ⚠️ EXCEEDED by ${monthly_spending - budget_limit:.2f}\n", 'exceeded')
-                elif percentage >= 80:
-                    text_widget.insert('end', f"  Status:        ⚠️ Warning - Approaching limit\n", 'warning')
-                else:
-                    text_widget.insert('end', f"  Status:        ✅ On track\n", 'ok')
-
-            text_widget.insert('end', "\n" + "=" * 60 + "\n")
-            text_widget.insert('end', f"\nTotal Budget:  ${total_budget:.2f}\n", 'bold')
-            text_widget.insert('end', f"Total Spent:   ${total_spent:.2f}\n", 'bold')
-            text_widget.insert('end', f"Total Remaining: ${total_budget - total_spent:.2f}\n", 'bold')
+        for text, tag in budget_status_lines(self.budgets, self.spending, date.today(),
+                                             self.recurring):
+            text_widget.insert('end', text, tag)
 
         # Configure tags
         text_widget.tag_config('title', font=('Arial', 12, 'bold'))
@@ -650,119 +2450,336 @@ class AdvancedWallet:
 
         text_widget.config(state='disabled')
 
-    def show_expense_chart(self):
-        expenses = [t for t in self.transactions if t['type'] == 'expense']
-
-        if not expenses:
-            messagebox.showinfo("No Data", "No expense transactions to display!")
-            return
-
-        # Calculate expenses by category
-        category_totals = defaultdict(float)
-        for t in expenses:
-            category_totals[t['category']] += t['amount']
-
-        # Clear previous chart
-        self.fig.clear()
-        ax = self.fig.add_subplot(111)
-
-        # Create pie chart
-        categories = list(category_totals.keys())
-        amounts = list(category_totals.values())
-        colors = plt.cm.Set3(range(len(categories)))
-
-        wedges, texts, autotexts = ax.pie(amounts, labels=categories, autopct='%1.1f%%',
-                                           colors=colors, startangle=90)
-
-        # Make percentage text bold
-        for autotext in autotexts:
-            autotext.set_color('white')
-            autotext.set_fontweight('bold')
-
-        ax.set_title('Expense Distribution by Category', fontsize=14, fontweight='bold')
-
-        self.canvas.draw()
+    def open_recurring_window(self):
+        rules_win = tk.Toplevel(self.root)
+        rules_win.title("Recurring Transactions")
+        rules_win.geometry("900x650")
+        rules_win.configure(bg='white')
+
+        tk.Label(rules_win, text="Recurring Transactions",
+                font=('Arial', 14, 'bold'), bg='white').pack(pady=10)
+
+        # Top: new rule form
+        form = tk.LabelFrame(rules_win, text="New Rule", font=('Arial', 11, 'bold'), bg='white')
+        form.pack(fill='x', padx=20, pady=5)
+
+        row1 = tk.Frame(form, bg='white')
+        row1.pack(fill='x', padx=10, pady=5)
+        tk.Label(row1, text="Type:", font=('Arial', 10), bg='white').pack(side='left')
+        type_var = tk.StringVar(value='expense')
+        type_combo = ttk.Combobox(row1, textvariable=type_var, values=['income', 'expense'],
+                                  width=10, state='readonly')
+        type_combo.pack(side='left', padx=5)
+        tk.Label(row1, text="Category:", font=('Arial', 10), bg='white').pack(side='left', padx=(15, 0))
+        category_var = tk.StringVar()
+        category_combo = ttk.Combobox(row1, textvariable=category_var, width=15, state='readonly')
+        category_combo.pack(side='left', padx=5)
+        tk.Label(row1, text="Amount:", font=('Arial', 10), bg='white').pack(side='left', padx=(15, 0))
+        amount_entry = tk.Entry(row1, font=('Arial', 10), width=12)
+        amount_entry.pack(side='left', padx=5)
+        tk.Label(row1, text="Description:", font=('Arial', 10), bg='white').pack(side='left', padx=(15, 0))
+        desc_entry = tk.Entry(row1, font=('Arial', 10), width=25)
+        desc_entry.pack(side='left', padx=5)
+
+        def update_rule_categories(event=None):
+            category_combo['values'] = (self.income_categories if type_var.get() == 'income'
+                                        else self.expense_categories)
+            category_combo.set('')
+
+        type_combo.bind('<<ComboboxSelected>>', update_rule_categories)
+        update_rule_categories()
+
+        row2 = tk.Frame(form, bg='white')
+        row2.pack(fill='x', padx=10, pady=5)
+        tk.Label(row2, text="Every:", font=('Arial', 10), bg='white').pack(side='left')
+        interval_spin = tk.Spinbox(row2, from_=1, to=99, width=4, font=('Arial', 10))
+        interval_spin.pack(side='left', padx=5)
+        frequency_var = tk.StringVar(value='monthly')
+        ttk.Combobox(row2, textvariable=frequency_var, values=list(RecurringRules.FREQUENCIES),
+                     width=10, state='readonly').pack(side='left', padx=5)
+        tk.Label(row2, text="Start:", font=('Arial', 10), bg='white').pack(side='left', padx=(15, 0))
+        start_entry = tk.Entry(row2, font=('Arial', 10), width=12)
+        start_entry.insert(0, date.today().isoformat())
+        start_entry.pack(side='left', padx=5)
+        tk.Label(row2, text="End (optional):", font=('Arial', 10), bg='white').pack(side='left', padx=(15, 0))
+        end_entry = tk.Entry(row2, font=('Arial', 10), width=12)
+        end_entry.pack(side='left', padx=5)
+
+        # Middle: the rules
+        list_frame = tk.LabelFrame(rules_win, text="Rules", font=('Arial', 11, 'bold'), bg='white')
+        list_frame.pack(fill='both', expand=True, padx=20, pady=5)
+        rules_tree = ttk.Treeview(list_frame, columns=("Type", "Category", "Amount", "Schedule",
+                                                       "Start", "End", "Description"),
+                                  show='headings', height=6)
+        for column, width in (("Type", 70), ("Category", 110), ("Amount", 90), ("Schedule", 110),
+                              ("Start", 90), ("End", 90), ("Description", 220)):
+            rules_tree.heading(column, text=column)
+            rules_tree.column(column, width=width)
+        rules_tree.pack(fill='both', expand=True, padx=10, pady=5)
+        rules_tree.tag_configure('income', foreground='#27ae60')
+        rules_tree.tag_configure('expense', foreground='#e74c3c')
+
+        # Bottom: occurrences of the selected rule, computed as they scroll into view
+        occ_frame = tk.LabelFrame(rules_win, text="Occurrences to Date",
+                                  font=('Arial', 11, 'bold'), bg='white')
+        occ_frame.pack(fill='both', expand=True, padx=20, pady=5)
+        occ_scroll = tk.Scrollbar(occ_frame)
+        occ_scroll.pack(side='right', fill='y')
+        occ_tree = VirtualTreeview(occ_frame, self.transaction_row, key=lambda t: t['id'],
+                                   yscrollcommand=occ_scroll.set,
+                                   columns=("Date", "Type", "Category", "Amount", "Description"),
+                                   show='headings', height=6)
+        for column in ("Date", "Type", "Category", "Amount", "Description"):
+            occ_tree.heading(column, text=column)
+        occ_tree.pack(fill='both', expand=True, padx=10, pady=5)
+        occ_scroll.config(command=occ_tree.yview)
+        occ_tree.tag_configure('income', foreground='#27ae60')
+        occ_tree.tag_configure('expense', foreground='#e74c3c')
+
+        def refresh_rules():
+            rules_tree.delete(*rules_tree.get_children())
+            for rule_id, rule in self.recurring.rules.items():
+                interval = rule.get('interval', 1)
+                schedule = rule['frequency'] if interval == 1 else f"every {interval} {rule['frequency']}"
+                rules_tree.insert('', 'end', iid=rule_id, tags=(rule['type'],), values=(
+                    rule['type'].capitalize(), rule['category'], f"${rule['amount']:.2f}", schedule,
+                    rule['start'], rule.get('end') or '', rule['description']))
+            occ_tree.set_rows([])
+
+        def show_occurrences(event=None):
+            selected = rules_tree.selection()
+            rule = self.recurring.rules.get(selected[0]) if selected else None
+            occ_tree.set_rows(RuleOccurrences(rule, date.today()) if rule else [])
+
+        rules_tree.bind('<<TreeviewSelect>>', show_occurrences)
+
+        def add_rule():
+            try:
+                amount = float(amount_entry.get())
+                interval = int(interval_spin.get())
+                start = date.fromisoformat(start_entry.get().strip())
+                end = end_entry.get().strip()
+                end = date.fromisoformat(end).isoformat() if end else None
+            except ValueError:
+                messagebox.showerror("Error", "Please enter a valid amount, interval and dates (YYYY-MM-DD)!")
+                return
+            if not category_var.get():
+                messagebox.showwarning("Warning", "Please select a category!")
+                return
+            if amount <= 0 or interval < 1 or (end is not None and end < start.isoformat()):
+                messagebox.showwarning("Warning", "Amount and interval must be positive and the end "
+                                                  "must not be before the start!")
+                return
+            rule_id = str(uuid.uuid4())
+            self.save_rule(rule_id, {'id': rule_id, 'type': type_var.get(), 'amount': amount,
+                                     'category': category_var.get(), 'description': desc_entry.get(),
+                                     'frequency': frequency_var.get(), 'interval': interval,
+                                     'start': start.isoformat(), 'end': end})
+            amount_entry.delete(0, 'end')
+            desc_entry.delete(0, 'end')
+            refresh_rules()
+
+        def end_rule():
+            # Stops a rule today; its earlier occurrences still count
+            for rule_id in rules_tree.selection():
+                self.save_rule(rule_id, RecurringRules.ended(self.recurring.rules[rule_id], date.today()))
+            refresh_rules()
+
+        def delete_rule():
+            selected = rules_tree.selection()
+            if not selected:
+                messagebox.showwarning("Warning", "Please select a rule to delete!")
+                return
+            if messagebox.askyesno("Confirm", "Delete the selected rules and all their occurrences?"):
+                for rule_id in selected:
+                    self.save_rule(rule_id, None)
+                refresh_rules()
+
+        tk.Button(row2, text="Add Rule", font=('Arial', 10, 'bold'), bg='#3498db', fg='white',
+                 command=add_rule, width=12).pack(side='left', padx=20)
+
+        button_row = tk.Frame(list_frame, bg='white')
+        button_row.pack(pady=5)
+        tk.Button(button_row, text="End Today", font=('Arial', 10, 'bold'),
+                 bg='#f39c12', fg='white', command=end_rule).pack(side='left', padx=5)
+        tk.Button(button_row, text="Delete Rule", font=('Arial', 10, 'bold'),
+                 bg='#e74c3c', fg='white', command=delete_rule).pack(side='left', padx=5)
+
+        refresh_rules()
+
+    def save_rule(self, rule_id, rule):
+        # Add, replace or (with rule=None) remove a rule; one journal record
+        if rule is None:
+            self.recurring.rules.pop(rule_id, None)
+        else:
+            self.recurring.rules[rule_id] = rule
+        self.journal.append('rule', id=rule_id, rule=rule)
+        self.data_version += 1
+        self.compact_if_needed()
+        self.update_dashboard()
+        self.update_budget_alerts()
 
-        # Switch to analytics tab
-        self.notebook.select(2)
+    def show_expense_chart(self):
+        self.show_chart('expense')
 
     def show_income_chart(self):
-        incomes = [t for t in self.transactions if t['type'] == 'income']
+        self.show_chart('income')
 
-        if not incomes:
-            messagebox.showinfo("No Data", "No income transactions to display!")
+    def show_monthly_trend(self):
+        self.show_chart('trend')
+
+    def trend_extent(self):
+        # First and last day with stored rows or rule occurrences up to today
+        extents = [extent for extent in (self.rollups.extent(), self.recurring.extent(date.today()))
+                   if extent is not None]
+        if not extents:
+            return None
+        return min(start for start, end in extents), max(end for start, end in extents)
+
+    def visible_trend_range(self):
+        extent = self.trend_extent()
+        if extent is None or self.trend_range is None:
+            return extent
+        return self.trend_range
+
+    def zoom_trend(self, factor):
+        visible = self.visible_trend_range()
+        if visible is None:
             return
+        start, end = visible
+        half = max((end - start) * factor / 2, timedelta(days=3))
+        center = start + (end - start) / 2
+        self.trend_range = (center - half, center + half)
+        self.show_chart('trend')
+
+    def pan_trend(self, direction):
+        visible = self.visible_trend_range()
+        if visible is None:
+            return
+        start, end = visible
+        shift = max((end - start) / 2, timedelta(days=1)) * direction
+        self.trend_range = (start + shift, end + shift)
+        self.show_chart('trend')
 
-        # Calculate income by category
-        category_totals = defaultdict(float)
-        for t in incomes:
-            category_totals[t['category']] += t['amount']
-
-        # Clear previous chart
-        self.fig.clear()
-        ax = self.fig.add_subplot(111)
-
-        # Create pie chart
-        categories = list(category_totals.keys())
-        amounts = list(category_totals.values())
-        colors = plt.cm.Set2(range(len(categories)))
-
-        wedges, texts, autotexts = ax.pie(amounts, labels=categories, autopct='%1.1f%%',
-                                           colors=colors, startangle=90)
-
-        for autotext in autotexts:
-            autotext.set_color('white')
-            autotext.set_fontweight('bold')
-
-        ax.set_title('Income Distribution by Category', fontsize=14, fontweight='bold')
+    def reset_trend(self):
+        self.trend_range = None
+        self.show_chart('trend')
 
-        self.canvas.draw()
+    def show_chart(self, chart):
         self.notebook.select(2)
-
-    def show_monthly_trend(self):
-        if not self.transactions:
-            messagebox.showinfo("No Data", "No transactions to display!")
+        self.build_tab(2)
+        self.root.update_idletasks()
+        width = max(self.chart_label.winfo_width(), 400)
+        height = max(self.chart_label.winfo_height(), 300)
+
+        # The trend is read straight from the rollups (a bisect and a slice)
+        # plus the rule occurrences inside the visible range, so it is keyed
+        # by its range and level rather than grouped again
+        series = None
+        today = date.today()
+        if chart == 'trend':
+            visible = self.visible_trend_range()
+            if visible is None:
+                series = ('month', [], [], [])
+            else:
+                level = TimeRollups.pick_level(*visible)
+                series = (level,) + self.recurring.add_series(
+                    level, self.rollups.series(level, *visible), visible[0], min(visible[1], today))
+                chart = ('trend', level) + visible
+
+        key = (chart, self.data_version, today, width, height)
+        png = self.chart_images.get(key)
+        if png is not None:
+            self.chart_images.move_to_end(key)
+            self.display_chart(png)
             return
 
-        # Group by month
-        monthly_income = defaultdict(float)
-        monthly_expense = defaultdict(float)
-
-        for t in self.transactions:
-            month = t['date'][:7]  # YYYY-MM
-            if t['type'] == 'income':
-                monthly_income[month] += t['amount']
+        # Hand the worker stable inputs without walking the rows here: a
+        # snapshot of the working set's columns and the closed months still
+        # on disk, which the worker joins to them (the plain rows only when
+        # there are no columns), and a copy of the rules. The trend needs
+        # none of it, nor does a grouping that is already cached.
+        version = (self.data_version, today)
+        transactions, columns, months = None, None, []
+        with self.chart_lock:
+            grouped = (chart, version) in self.chart_data
+        if series is None and not grouped:
+            columns = self.working_columns()
+            if columns is None:
+                transactions = self.analytics_rows()
             else:
-                monthly_expense[month] += t['amount']
-
-        # Get all months and sort
-        all_months = sorted(set(list(monthly_income.keys()) + list(monthly_expense.keys())))
-
-        income_values = [monthly_income[m] for m in all_months]
-        expense_values = [monthly_expense[m] for m in all_months]
-
-        # Clear previous chart
-        self.fig.clear()
-        ax = self.fig.add_subplot(111)
-
-        # Create bar chart
-        x = range(len(all_months))
-        width = 0.35
-
-        ax.bar([i - width/2 for i in x], income_values, width, label='Income', color='#27ae60')
-        ax.bar([i + width/2 for i in x], expense_values, width, label='Expense', color='#e74c3c')
+                columns = columns.snapshot()
+                if not self.journal.history_loaded:
+                    months = self.journal.history_summaries()
+        recurring = RecurringRules(dict(self.recurring.rules))
+        self.chart_generation += 1
+        job = BackgroundJob(lambda job: self.render_chart(
+            chart, version, transactions, columns, width, height, series, recurring, months))
+        self.root.after(30, self.poll_chart, job, key, self.chart_generation)
+
+    def render_chart(self, chart, version, transactions, columns, width, height,
+                     series=None, recurring=None, months=()):
+        # Runs on a worker: group (or reuse the cached grouping), then rasterize
+        if series is not None:
+            if not series[1]:
+                return None
+            fig = new_figure(width, height)
+            draw_trend(fig, *series)
+            return render_png(fig)
+
+        data_key = (chart, version)
+        with self.chart_lock:
+            data = self.chart_data.get(data_key)
+        if data is None:
+            plain = []
+            if months:
+                columns, plain = self.join_columns(version[0], columns, months)
+            summary = category_summary(transactions, chart, columns)
+            # Closed months the columns could not hold are grouped row by row
+            rows = itertools.chain.from_iterable(self.journal.month_rows(month) for month in plain)
+            for category, totals in category_summary(rows, chart).items():
+                entry = summary.setdefault(category, {'total': 0, 'count': 0})
+                entry['total'] += totals['total']
+                entry['count'] += totals['count']
+            if recurring is not None:
+                summary = recurring.add_categories(summary, chart, None, version[1])
+            data = {category: totals['total'] for category, totals in summary.items()}
+            with self.chart_lock:
+                self.chart_data[data_key] = data
+                while len(self.chart_data) > self.CHART_CACHE_SIZE:
+                    self.chart_data.popitem(last=False)
+
+        if not data:
+            return None
+
+        fig = new_figure(width, height)
+        if chart == 'expense':
+            draw_category_pie(fig, data, 'Expense Distribution by Category', 'Set3')
+        else:
+            draw_category_pie(fig, data, 'Income Distribution by Category', 'Set2')
+        return render_png(fig)
+
+    def poll_chart(self, job, key, generation):
+        if generation != self.chart_generation:
+            return  # a newer chart request replaced this one
+        if not job.finished:
+            self.root.after(30, self.poll_chart, job, key, generation)
+            return
 
-        ax.set_xlabel('Month', fontweight='bold')
-        ax.set_ylabel('Amount ($)', fontweight='bold')
-        ax.set_title('Monthly Income vs Expense Trend', fontsize=14, fontweight='bold')
-        ax.set_xticks(x)
-        ax.set_xticklabels(all_months, rotation=45, ha='right')
-        ax.legend()
-        ax.grid(axis='y', alpha=0.3)
+        if job.error is not None:
+            messagebox.showerror("Error", f"Failed to draw chart: {str(job.error)}")
+        elif job.result is None:
+            chart = key[0] if isinstance(key[0], str) else key[0][0]
+            messagebox.showinfo("No Data", self.CHART_EMPTY_MESSAGES[chart])
+        else:
+            self.chart_images[key] = job.result
+            while len(self.chart_images) > self.CHART_CACHE_SIZE:
+                self.chart_images.popitem(last=False)
+            self.display_chart(job.result)
 
-        self.fig.tight_layout()
-        self.canvas.draw()
-        self.notebook.select(2)
+    def display_chart(self, png):
+        self.chart_image = tk.PhotoImage(data=base64.b64encode(png))
+        self.chart_label.config(image=self.chart_image, text='')
 
     def show_monthly_stats(self):
         stats_win = tk.Toplevel(self.root)
@@ -785,27 +2802,13 @@ class AdvancedWallet:
         text_widget.pack(side='left', fill='both', expand=True)
         scrollbar.config(command=text_widget.yview)
 
-        # Group transactions by month
-        monthly_data = defaultdict(lambda: {'income': 0, 'expense': 0, 'count': 0})
-
-        for t in self.transactions:
-            month = t['date'][:7]
-            if t['type'] == 'income':
-                monthly_data[month]['income'] += t['amount']
-            else:
-                monthly_data[month]['expense'] += t['amount']
-            monthly_data[month]['count'] += 1
+        # Group transactions by month, with rule occurrences up to today
+        columns = self.analytics_columns()
+        monthly_data = monthly_summary(self.analytics_rows() if columns is None else (), columns)
+        monthly_data = self.recurring.add_monthly(monthly_data, None, date.today())
 
         # Display statistics
-        text_widget.insert('end', "Month      | Income    | Expense   | Balance   | Trans. Count\n")
-        text_widget.insert('end', "-" * 70 + "\n")
-
-        for month in sorted(monthly_data.keys(), reverse=True):
-            data = monthly_data[month]
-            balance = data['income'] - data['expense']
-
-            line = f"{month}  | ${data['income']:8.2f} | ${data['expense']:8.2f} | ${balance:8.2f} | {data['count']:6d}\n"
-            text_widget.insert('end', line)
+        text_widget.insert('end', ''.join(monthly_stats_lines(monthly_data)))
 
         text_widget.config(state='disabled')
 
@@ -829,27 +2832,12 @@ class AdvancedWallet:
         expense_text = tk.Text(expense_frame, font=('Courier', 10), wrap='word')
         expense_text.pack(fill='both', expand=True, padx=10, pady=10)
 
-        expense_by_cat = defaultdict(lambda: {'total': 0, 'count': 0})
-        for t in self.transactions:
-            if t['type'] == 'expense':
-                expense_by_cat[t['category']]['total'] += t['amount']
-                expense_by_cat[t['category']]['count'] += 1
-
-        total_expense = sum(data['total'] for data in expense_by_cat.values())
+        columns = self.analytics_columns()
+        expense_by_cat = category_summary(self.analytics_rows() if columns is None else (),
+                                          'expense', columns)
+        expense_by_cat = self.recurring.add_categories(expense_by_cat, 'expense', None, date.today())
 
-        expense_text.insert('end', "Category      | Total      | Count | Avg/Trans | % of Total\n")
-        expense_text.insert('end', "-" * 70 + "\n")
-
-        for category in sorted(expense_by_cat.keys(), key=lambda x: expense_by_cat[x]['total'], reverse=True):
-            data = expense_by_cat[category]
-            avg = data['total'] / data['count']
-            percentage = (data['total'] / total_expense * 100) if total_expense > 0 else 0
-
-            line = f"{category:13} | ${data['total']:9.2f} | {data['count']:5d} | ${avg:8.2f} | {percentage:5.1f}%\n"
-            expense_text.insert('end', line)
-
-        expense_text.insert('end', "-" * 70 + "\n")
-        expense_text.insert('end', f"{'TOTAL':13} | ${total_expense:9.2f}\n")
+        expense_text.insert('end', ''.join(category_analysis_lines(expense_by_cat)))
         expense_text.config(state='disabled')
 
         # Income analysis
@@ -859,27 +2847,11 @@ class AdvancedWallet:
         income_text = tk.Text(income_frame, font=('Courier', 10), wrap='word')
         income_text.pack(fill='both', expand=True, padx=10, pady=10)
 
-        income_by_cat = defaultdict(lambda: {'total': 0, 'count': 0})
-        for t in self.transactions:
-            if t['type'] == 'income':
-                income_by_cat[t['category']]['total'] += t['amount']
-                income_by_cat[t['category']]['count'] += 1
-
-        total_income = sum(data['total'] for data in income_by_cat.values())
+        income_by_cat = category_summary(self.analytics_rows() if columns is None else (),
+                                         'income', columns)
+        income_by_cat = self.recurring.add_categories(income_by_cat, 'income', None, date.today())
 
-        income_text.insert('end', "Category      | Total      | Count | Avg/Trans | % of Total\n")
-        income_text.insert('end', "-" * 70 + "\n")
-
-        for category in sorted(income_by_cat.keys(), key=lambda x: income_by_cat[x]['total'], reverse=True):
-            data = income_by_cat[category]
-            avg = data['total'] / data['count']
-            percentage = (data['total'] / total_income * 100) if total_income > 0 else 0
-
-            line = f"{category:13} | ${data['total']:9.2f} | {data['count']:5d} | ${avg:8.2f} | {percentage:5.1f}%\n"
-            income_text.insert('end', line)
-
-        income_text.insert('end', "-" * 70 + "\n")
-        income_text.insert('end', f"{'TOTAL':13} | ${total_income:9.2f}\n")
+        income_text.insert('end', ''.join(category_analysis_lines(income_by_cat)))
         income_text.config(state='disabled')
 
     def export_json(self):
@@ -889,38 +2861,348 @@ class AdvancedWallet:
             initialfile=f"wallet_export_{datetime.now().strftime('%Y%m%d')}.json"
         )
         if filename:
-            try:
-                data = {
-                    'transactions': self.transactions,
-                    'budgets': self.budgets,
-                    'export_date': datetime.now().isoformat()
-                }
-                with open(filename, 'w') as f:
-                    json.dump(data, f, indent=2)
-                messagebox.showinfo("Success", f"Data exported to {filename}")
-            except Exception as e:
-                messagebox.showerror("Error", f"Failed to export: {str(e)}")
+            # The worker streams one transaction at a time from these copies
+            self.load_history()
+            transactions = list(self.transactions)
+            budgets = dict(self.budgets)
+            rules = dict(self.recurring.rules)
+
+            def write(f, job):
+                f.write('{\n  "transactions": [')
+                for i, t in enumerate(transactions):
+                    if job.cancelled.is_set():
+                        return
+                    f.write(',\n    ' if i else '\n    ')
+                    f.write(json.dumps(t))
+                    job.done += 1
+                f.write('\n  ],\n')
+                f.write(f'  "budgets": {json.dumps(budgets)},\n')
+                f.write(f'  "rules": {json.dumps(rules)},\n')
+                f.write(f'  "export_date": {json.dumps(datetime.now().isoformat())}\n}}\n')
+
+            self.start_export(filename, len(transactions), write, "Failed to export")
 
     def import_json(self):
         filename = filedialog.askopenfilename(
             filetypes=[("JSON files", "*.json"), ("All files", "*.*")]
         )
-        if filename:
+        if not filename:
+            return
+
+        merge = messagebox.askyesnocancel(
+            "Import",
+            "Merge the file into the current data?\n\n"
+            "Yes: add new transactions and skip duplicates\n"
+            "No: replace all current data"
+        )
+        if merge is None:
+            return
+        if merge:
+            self.load_history()  # duplicates are found against every month
+
+        def work(job):
+            job.total = os.path.getsize(filename)
+            new_transactions, budgets, rules = [], None, None
+            counts = {'added': 0, 'skipped': 0, 'conflicting': 0}
+            seen = set()
+            with open(filename, 'r') as f:
+                for key, value in iter_wallet_records(f):
+                    if job.cancelled.is_set():
+                        return None
+                    if key == 'budgets':
+                        budgets = value
+                    elif key == 'rules':
+                        rules = value
+                    if key != 'transaction':
+                        continue
+                    job.done = f.buffer.tell()
+                    if merge:
+                        status = self.classify_import(value, seen)
+                        counts[status] += 1
+                        if status != 'added':
+                            continue
+                    new_transactions.append(value)
+            return new_transactions, budgets, rules, counts
+
+        def on_finish(job):
+            if job.error is not None:
+                messagebox.showerror("Error", f"Failed to import: {str(job.error)}")
+            elif job.result is not None:
+                if merge:
+                    self.merge_import(*job.result)
+                else:
+                    self.replace_import(*job.result)
+
+        self.show_job_progress(BackgroundJob(work), "Importing...", on_finish)
+
+    def classify_import(self, t, seen):
+        # Runs on the import worker; only reads the indexes
+        key = content_key(t)
+        if key in seen or key in self.content_index:
+            return 'skipped'
+        trans_id = t.get('id')
+        if isinstance(trans_id, str) and trans_id in self.positions:
+            return 'conflicting'  # same id, different content: keep ours
+        seen.add(key)
+        return 'added'
+
+    def merge_import(self, new_transactions, budgets, rules, counts):
+        # Commit the batch: one journal write and one refresh
+        added = []
+        for t in new_transactions:
+            if content_key(t) in self.content_index:
+                counts['added'] -= 1
+                counts['skipped'] += 1
+                continue
+            if not isinstance(t.get('id'), str) or t['id'] in self.positions:
+                t['id'] = str(uuid.uuid4())
+            added.append(t)
+        self.add_transactions_batch(added)
+
+        # Imported budgets only fill in categories without one
+        for category, budget in (budgets or {}).items():
+            if category not in self.budgets:
+                self.budgets[category] = normalize_budget(budget)
+                self.journal.append('budget', category=category, budget=self.budgets[category])
+
+        # Likewise rules, matched by id
+        for rule_id, rule in (rules or {}).items():
+            if rule_id not in self.recurring.rules:
+                self.recurring.rules[rule_id] = rule
+                self.journal.append('rule', id=rule_id, rule=rule)
+        self.data_version += 1
+
+        self.compact_if_needed()
+        self.update_all()
+        messagebox.showinfo(
+            "Import Complete",
+            f"Added: {counts['added']}\n"
+            f"Skipped (duplicates): {counts['skipped']}\n"
+            f"Conflicting (kept existing): {counts['conflicting']}"
+        )
+
+    def add_transactions_batch(self, transactions):
+        for t in transactions:
+            self.positions[t['id']] = len(self.transactions)
+            self.transactions.append(t)
+            self.index_add(t)
+            self.append_column(t)
+        if transactions:
+            self.journal.append_transactions(transactions)
+            # One merge of the sorted batch into the newest-first list
+            batch = sorted(transactions, key=lambda x: x['timestamp'], reverse=True)
+            self.ordered[:] = list(heapq.merge(self.ordered, batch,
+                                               key=lambda x: x['timestamp'], reverse=True))
+
+    def import_bank_csv(self):
+        filename = filedialog.askopenfilename(
+            filetypes=[("CSV files", "*.csv"), ("All files", "*.*")]
+        )
+        if not filename:
+            return
+        try:
+            with open(filename, 'r', newline='', encoding='utf-8-sig') as f:
+                header = next(csv.reader(f), None)
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to read CSV: {str(e)}")
+            return
+        if not header:
+            messagebox.showwarning("No Data", "The CSV file is empty!")
+            return
+        self.load_history()  # reconciliation looks at every month
+
+        map_win = tk.Toplevel(self.root)
+        map_win.title("Import Bank Statement")
+        map_win.geometry("480x560")
+        map_win.configure(bg='white')
+
+        tk.Label(map_win, text="Map Statement Columns",
+                font=('Arial', 14, 'bold'), bg='white').pack(pady=15)
+
+        form = tk.Frame(map_win, bg='white')
+        form.pack(fill='x', padx=20)
+
+        def guess(*names):
+            for column in header:
+                if column.strip().lower() in names:
+                    return column
+            return ''
+
+        none_option = "(none)"
+        choices = {}
+        fields = [
+            ("Date column:", 'date', guess('date', 'transaction date', 'posting date')),
+            ("Amount column:", 'amount', guess('amount', 'value', 'sum')),
+            ("Description column:", 'description', guess('description', 'details', 'memo', 'payee')),
+            ("Type column:", 'type', guess('type')),
+            ("Category column:", 'category', guess('category')),
+        ]
+        for row, (label, key, default) in enumerate(fields):
+            tk.Label(form, text=label, font=('Arial', 10), bg='white',
+                     width=18, anchor='w').grid(row=row, column=0, pady=4)
+            combo = ttk.Combobox(form, values=[none_option] + header, width=25, state='readonly')
+            combo.set(default or none_option)
+            combo.grid(row=row, column=1, pady=4)
+            choices[key] = combo
+
+        tk.Label(form, text="Date format:", font=('Arial', 10), bg='white',
+                 width=18, anchor='w').grid(row=len(fields), column=0, pady=4)
+        format_entry = tk.Entry(form, font=('Arial', 10), width=27)
+        format_entry.insert(0, "%Y-%m-%d")
+        format_entry.grid(row=len(fields), column=1, pady=4)
+
+        tk.Label(form, text="Match window (± days):", font=('Arial', 10), bg='white',
+                 width=18, anchor='w').grid(row=len(fields) + 1, column=0, pady=4)
+        window_spin = tk.Spinbox(form, from_=0, to=30, width=25, font=('Arial', 10))
+        window_spin.delete(0, 'end')
+        window_spin.insert(0, "3")
+        window_spin.grid(row=len(fields) + 1, column=1, pady=4)
+
+        tk.Label(map_win, text="Category rules (one 'keyword = Category' per line):",
+                 font=('Arial', 10), bg='white').pack(anchor='w', padx=20, pady=(10, 0))
+        rules_text = tk.Text(map_win, font=('Courier', 10), height=8, width=50)
+        rules_text.pack(padx=20, pady=5)
+        rules_text.insert('1.0', "salary = Salary\nrestaurant = Food\nuber = Transport\n")
+
+        def start():
+            mapping = {key: combo.get() for key, combo in choices.items()
+                       if combo.get() != none_option}
+            if 'date' not in mapping or 'amount' not in mapping:
+                messagebox.showwarning("Warning", "Please map the date and amount columns!")
+                return
             try:
-                with open(filename, 'r') as f:
-                    data = json.load(f)
-                    if 'transactions' in data:
-                        self.transactions = data['transactions']
-                    if 'budgets' in data:
-                        self.budgets = data['budgets']
-
-                    self.save_data()
-                    self.update_all()
-                    messagebox.showinfo("Success", "Data imported successfully!")
-            except Exception as e:
-                messagebox.showerror("Error", f"Failed to import: {str(e)}")
+                window_days = int(window_spin.get())
+            except ValueError:
+                messagebox.showerror("Error", "Please enter a valid number of days!")
+                return
+
+            rules = []
+            for line in rules_text.get('1.0', 'end').splitlines():
+                keyword, _, category = line.partition('=')
+                if keyword.strip() and category.strip():
+                    rules.append((keyword.strip().lower(), category.strip()))
+
+            map_win.destroy()
+            self.run_bank_csv_import(filename, mapping, format_entry.get(), rules, window_days)
+
+        tk.Button(map_win, text="Import", font=('Arial', 11, 'bold'),
+                 bg='#27ae60', fg='white', command=start, width=20).pack(pady=10)
+
+    def run_bank_csv_import(self, filename, mapping, date_format, rules, window_days):
+        batch_size = 1000
+
+        def parse_row(row):
+            # A short row (a trailing "End of statement", say) has None for
+            # the cells it lacks; those read as empty and fail below
+            def cell(column):
+                return (row.get(mapping[column]) or '') if column in mapping else ''
+
+            amount = float(cell('amount').replace(',', '').replace('$', '').strip())
+            if amount == 0:
+                raise ValueError("zero amount")
+            description = cell('description')
+            trans_type = cell('type').strip().lower()
+            if trans_type not in ('income', 'expense'):
+                trans_type = 'expense' if amount < 0 else 'income'
+
+            category = cell('category').strip()
+            if not category:
+                text = description.lower()
+                category = next((c for keyword, c in rules if keyword in text), "Other")
+
+            return {
+                'id': str(uuid.uuid4()),
+                'type': trans_type,
+                'amount': abs(amount),
+                'category': category,
+                'date': datetime.strptime(cell('date').strip(), date_format).strftime("%Y-%m-%d"),
+                'description': description.strip(),
+                'timestamp': datetime.now().isoformat()
+            }
+
+        def work(job):
+            job.total = os.path.getsize(filename)
+            new_transactions = []
+            counts = {'matched': 0, 'invalid': 0}
+            matched_ids = set()
+            with open(filename, 'r', newline='', encoding='utf-8-sig') as f:
+                batch = []
+                for row in csv.DictReader(f):
+                    batch.append(row)
+                    if len(batch) < batch_size:
+                        continue
+                    if job.cancelled.is_set():
+                        return None
+                    self.reconcile_rows(batch, parse_row, window_days, matched_ids,
+                                        new_transactions, counts)
+                    job.done = f.buffer.tell()
+                    batch = []
+                self.reconcile_rows(batch, parse_row, window_days, matched_ids,
+                                    new_transactions, counts)
+            return new_transactions, counts
+
+        def on_finish(job):
+            if job.error is not None:
+                messagebox.showerror("Error", f"Failed to import CSV: {str(job.error)}")
+            elif job.result is not None:
+                new_transactions, counts = job.result
+                self.add_transactions_batch(new_transactions)
+                self.compact_if_needed()
+                self.update_all()
+                messagebox.showinfo(
+                    "Import Complete",
+                    f"Added: {len(new_transactions)}\n"
+                    f"Already recorded: {counts['matched']}\n"
+                    f"Unreadable rows: {counts['invalid']}"
+                )
+
+        self.show_job_progress(BackgroundJob(work), "Importing statement...", on_finish)
+
+    def reconcile_rows(self, rows, parse_row, window_days, matched_ids, new_transactions, counts):
+        # Runs on the import worker. A statement line that has an existing
+        # transaction of the same type and amount within ±window_days is
+        # already recorded; each existing transaction absorbs one line at most.
+        window = timedelta(days=window_days)
+        for row in rows:
+            try:
+                t = parse_row(row)
+                day = datetime.strptime(t['date'], "%Y-%m-%d")
+            except (ValueError, KeyError, TypeError):
+                counts['invalid'] += 1
+                continue
+
+            low = (day - window).strftime("%Y-%m-%d")
+            high = (day + window).strftime("%Y-%m-%d")
+            start = bisect.bisect_left(self.by_date, (low,))
+            end = bisect.bisect_right(self.by_date, (high, '\uffff'))
+            for _, trans_id in self.by_date[start:end]:
+                position = self.positions.get(trans_id)
+                if position is None or trans_id in matched_ids:
+                    continue
+                existing = self.transactions[position]
+                if existing['type'] == t['type'] and abs(existing['amount'] - t['amount']) < 0.005:
+                    matched_ids.add(trans_id)
+                    counts['matched'] += 1
+                    break
+            else:
+                new_transactions.append(t)
+
+    def replace_import(self, transactions, budgets, rules, counts):
+        self.journal.discard_history()
+        self.transactions = transactions
+        if budgets is not None:
+            self.budgets = {category: normalize_budget(budget) for category, budget in budgets.items()}
+        if rules is not None:
+            self.recurring = RecurringRules(rules)
+
+        self.index_transactions()
+        self.rebuild_indexes()
+        self.save_data()
+        self.update_all()
+        messagebox.showinfo("Success", "Data imported successfully!")
 
     def export_csv(self):
+        self.load_history()
         if not self.transactions:
             messagebox.showwarning("No Data", "No transactions to export!")
             return
@@ -932,40 +3214,252 @@ class AdvancedWallet:
         )
 
         if filename:
-            try:
-                with open(filename, 'w', newline='') as f:
-                    writer = csv.writer(f)
-                    writer.writerow(['Date', 'Type', 'Category', 'Amount', 'Description', 'Timestamp'])
+            # by_date is already in date order, so there is nothing to sort
+            rows = [self.transactions[self.positions[trans_id]] for _, trans_id in self.by_date]
+
+            def write(f, job):
+                writer = csv.writer(f)
+                writer.writerow(['Date', 'Type', 'Category', 'Amount', 'Description', 'Timestamp'])
+                for t in rows:
+                    if job.cancelled.is_set():
+                        return
+                    writer.writerow([
+                        t['date'], t['type'], t['category'],
+                        t['amount'], t['description'], t['timestamp']
+                    ])
+                    job.done += 1
+
+            self.start_export(filename, len(rows), write, "Failed to export CSV", newline='')
+
+    def start_export(self, filename, total, write, error_text, newline=None):
+        job = BackgroundJob(lambda job: write_atomically(
+            filename, job, lambda f: write(f, job), newline=newline))
+        job.total = total
+
+        def on_finish(job):
+            if job.error is not None:
+                messagebox.showerror("Error", f"{error_text}: {str(job.error)}")
+            elif job.result:
+                messagebox.showinfo("Success", f"Data exported to {filename}")
 
-                    for t in sorted(self.transactions, key=lambda x: x['date']):
-                        writer.writerow([
-                            t['date'], t['type'], t['category'],
-                            t['amount'], t['description'], t['timestamp']
-                        ])
+        self.show_job_progress(job, "Exporting...", on_finish)
 
-                messagebox.showinfo("Success", f"Data exported to {filename}")
-            except Exception as e:
-                messagebox.showerror("Error", f"Failed to export CSV: {str(e)}")
+    def show_job_progress(self, job, title, on_finish):
+        progress_win = tk.Toplevel(self.root)
+        progress_win.title(title)
+        progress_win.geometry("360x130")
+        progress_win.configure(bg='white')
+        progress_win.transient(self.root)
+
+        status = tk.Label(progress_win, text="Starting...", font=('Arial', 10), bg='white')
+        status.pack(pady=(15, 5))
+        bar = ttk.Progressbar(progress_win, length=300, mode='determinate')
+        bar.pack(pady=5)
+
+        def cancel():
+            job.cancelled.set()
+            status.config(text="Cancelling...")
+
+        tk.Button(progress_win, text="Cancel", font=('Arial', 10),
+                 bg='#95a5a6', fg='white', command=cancel).pack(pady=5)
+        progress_win.protocol("WM_DELETE_WINDOW", cancel)
+
+        def poll():
+            if job.finished:
+                progress_win.destroy()
+                on_finish(job)
+                return
+            bar['maximum'] = max(job.total, 1)
+            bar['value'] = job.done
+            if not job.cancelled.is_set():
+                status.config(text=f"{job.done} of {job.total}")
+            self.root.after(100, poll)
+
+        poll()
+
+    # Derived structures that follow every add / delete / import
+    def index_add(self, t):
+        self.data_version += 1
+        bisect.insort(self.by_date, (t['date'], t['id']))
+        self.content_index[content_key(t)] = t['id']
+        self.aggregates.add(t)
+        self.rollups.add(t)
+        self.spending.add(t)
+        self.journal.touch(t)
+        self.search_index.add(t)
+
+    def index_remove(self, t):
+        self.data_version += 1
+        i = bisect.bisect_left(self.by_date, (t['date'], t['id']))
+        if i < len(self.by_date) and self.by_date[i] == (t['date'], t['id']):
+            del self.by_date[i]
+        if self.content_index.get(content_key(t)) == t['id']:
+            del self.content_index[content_key(t)]
+        self.aggregates.remove(t)
+        self.rollups.remove(t)
+        self.spending.remove(t)
+        self.journal.touch(t)
+        self.search_index.remove(t)
+
+    def rebuild_indexes(self):
+        self.data_version += 1
+        self.by_date = sorted((t['date'], t['id']) for t in self.transactions)
+        self.content_index = {content_key(t): t['id'] for t in self.transactions}
+        self.aggregates.rebuild(self.transactions)
+        self.rollups.rebuild(self.transactions)
+        self.spending.rebuild(self.transactions)
+        # Closed months that are not loaded count through their summaries
+        for month, summary in self.journal.history_summaries():
+            self.aggregates.add_summary(month, summary)
+            self.rollups.add_summary(summary)
+            self.spending.add_summary(month, summary)
+        self.columns = None
+        self.search_index.rebuild(self.transactions)
+        self.rebuild_order()
+
+    def load_history(self):
+        # Pull the closed months into the working set. Browsing, searching,
+        # editing, importing and exporting need every row; the dashboard,
+        # budgets and charts do not.
+        if self.journal.history_loaded:
+            return
+        rows = self.journal.load_history(self.positions)
+        for t in rows:
+            self.positions[t['id']] = len(self.transactions)
+            self.transactions.append(t)
+        self.rebuild_indexes()
+        self.update_all()
+
+    def analytics_rows(self):
+        # The working set plus, while only the hot months are loaded, the
+        # closed months read through the journal's bounded cache
+        rows = list(self.transactions)
+        if self.journal.history_loaded:
+            return rows
+        return itertools.chain(rows, self.journal.iter_history())
+
+    def working_columns(self):
+        # Columns of the working set, built on first use and then kept in
+        # step with it; None to use the plain loops
+        if np is None:
+            return None
+        if self.columns is None:
+            try:
+                self.columns = TransactionColumns.build(self.transactions)
+            except (ValueError, KeyError):
+                return None
+        return self.columns
+
+    def join_columns(self, version, columns, months):
+        # The working set's columns (or a snapshot() of them) joined with
+        # the closed months still on disk, as (columns, months left to the
+        # plain loops). Safe on a worker. A month's columns are built once
+        # and last as long as its manifest summary, which compaction
+        # replaces when it rewrites the month; a month the columns cannot
+        # hold is cached as None.
+        with self.chart_lock:
+            cache = self.month_columns
+            joined = self.history_columns
+        month_columns, plain = {}, []
+        for month, summary in months:
+            cached = cache.get(month)
+            if cached is None or cached[0] is not summary:
+                try:
+                    cached = (summary, TransactionColumns.build(self.journal.month_rows(month)))
+                except (ValueError, KeyError):
+                    cached = (summary, None)
+            month_columns[month] = cached
+            if cached[1] is None:
+                plain.append(month)
+
+        parts = [part for _, part in month_columns.values() if part is not None]
+        key = (version, tuple(map(id, parts)))
+        if joined is None or joined[0] != key:
+            joined = (key, TransactionColumns.concat([columns] + parts))
+        with self.chart_lock:
+            self.month_columns = month_columns
+            self.history_columns = joined
+        return joined[1], plain
+
+    def analytics_columns(self):
+        # Columnar store for the analytics views, or None to use the plain loops
+        columns = self.working_columns()
+        if columns is None or self.journal.history_loaded:
+            with self.chart_lock:
+                self.month_columns = {}
+                self.history_columns = None
+            return columns if self.transactions else None
+        columns, plain = self.join_columns(self.data_version, columns,
+                                           self.journal.history_summaries())
+        return None if plain else columns
+
+    # The columns follow self.transactions row for row; a transaction they
+    # cannot hold drops them, and analytics fall back to the plain loops
+    def append_column(self, transaction):
+        if self.columns is not None:
+            try:
+                self.columns.append(transaction)
+            except (ValueError, KeyError):
+                self.columns = None
+
+    def update_column(self, transaction):
+        if self.columns is not None:
+            try:
+                self.columns.set(self.positions[transaction['id']], transaction)
+            except (ValueError, KeyError):
+                self.columns = None
 
     def save_data(self):
-        data = {
-            'transactions': self.transactions,
-            'budgets': self.budgets,
-            'last_updated': datetime.now().isoformat()
-        }
-        with open(self.data_file, 'w') as f:
-            json.dump(data, f, indent=2)
+        self.journal.write_snapshot(self.transactions, self.budgets, self.recurring.rules)
+
+    def on_close(self):
+        # Queued journal records and a running compaction must reach the disk
+        try:
+            self.journal.close()
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to save data: {str(e)}")
+        self.root.destroy()
+
+    def compact_if_needed(self):
+        if self.journal.needs_compaction():
+            self.journal.compact(self.transactions, self.budgets, self.recurring.rules)
 
     def load_data(self):
-        if self.data_file.exists():
+        try:
+            self.transactions, self.budgets, rules = self.journal.load()
+        except (OSError, ValueError, KeyError, struct.error, zlib.error) as e:
+            self.transactions = []
+            self.budgets = {}
+            # Keep the unreadable files; the first save would replace them
             try:
-                with open(self.data_file, 'r') as f:
-                    data = json.load(f)
-                    self.transactions = data.get('transactions', [])
-                    self.budgets = data.get('budgets', {})
-            except:
-                self.transactions = []
-                self.budgets = {}
+                moved = self.journal.set_aside()
+            except OSError as move_error:
+                messagebox.showerror("Error", f"Failed to load wallet data: {str(e)}\n"
+                                              f"It could not be set aside either ({move_error}); "
+                                              f"the wallet will close without saving.")
+                raise SystemExit(1)
+            kept = "\n".join(str(path) for path in moved)
+            messagebox.showerror("Error", f"Failed to load wallet data: {str(e)}\n"
+                                          f"The unreadable files were kept as:\n{kept}")
+            return
+        self.recurring = RecurringRules(rules)
+
+        if self.index_transactions():
+            self.save_data()
+        else:
+            self.compact_if_needed()
+
+    def index_transactions(self):
+        # Rebuild the id index, giving older timestamp-based (float) or
+        # repeated ids a fresh uuid. Returns True if any id was replaced.
+        self.positions = {}
+        migrated = False
+        for i, t in enumerate(self.transactions):
+            if not isinstance(t.get('id'), str) or t['id'] in self.positions:
+                t['id'] = str(uuid.uuid4())
+                migrated = True
+            self.positions[t['id']] = i
+        return migrated
 
 if __name__ == "__main__":
     root = tk.Tk()
@@ -0,0 +1,169 @@
+import argparse
+import csv
+import json
+import random
+import statistics
+import subprocess
+import sys
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+sys.path.insert(0, str(HERE))
+from PersonalWallet import WalletJournal
+
+# Cold-start benchmark for PersonalWallet: each run is a fresh interpreter
+# that times the module import, building AdvancedWallet, and the first paint
+# (the root window becoming visible). Results can be appended to a CSV so
+# time-to-interactive is tracked from one change to the next.
+#
+#   python StartupBenchmark.py --runs 10 --record startup_times.csv
+#   python StartupBenchmark.py --wallet-dir /tmp/bench --seed 100000
+#
+# Without a display, --headless times the import and the data side of the
+# constructor (AdvancedWallet.init_data) only; first_paint is left empty.
+
+PROBE = r'''
+import json, sys, time
+start = time.perf_counter()
+sys.path.insert(0, sys.argv[1])
+import PersonalWallet
+imported = time.perf_counter()
+import tkinter as tk
+root = tk.Tk()
+app = PersonalWallet.AdvancedWallet(root)
+built = time.perf_counter()
+root.wait_visibility(root)
+root.update()
+painted = time.perf_counter()
+root.destroy()
+print(json.dumps({'import': imported - start, 'build': built - imported,
+                  'first_paint': painted - start,
+                  'matplotlib_loaded': 'matplotlib' in sys.modules}))
+'''
+
+HEADLESS_PROBE = r'''
+import json, sys, time
+from pathlib import Path
+start = time.perf_counter()
+sys.path.insert(0, sys.argv[1])
+import PersonalWallet
+imported = time.perf_counter()
+app = PersonalWallet.AdvancedWallet.__new__(PersonalWallet.AdvancedWallet)
+app.init_data(Path("wallet_data_v2.wbin"), legacy_file=Path("wallet_data_v2.json"))
+built = time.perf_counter()
+app.journal.close()
+print(json.dumps({'import': imported - start, 'build': built - imported,
+                  'matplotlib_loaded': 'matplotlib' in sys.modules}))
+'''
+
+FIELDS = ('import', 'build', 'first_paint')
+
+# The names AdvancedWallet uses in its working directory
+SNAPSHOT_FILE = 'wallet_data_v2.wbin'
+LEGACY_FILE = 'wallet_data_v2.json'
+
+
+def wallet_journal(wallet_dir):
+    return WalletJournal(wallet_dir / SNAPSHOT_FILE, legacy_file=wallet_dir / LEGACY_FILE)
+
+
+def seed_wallet(wallet_dir, count):
+    # count random transactions over the last three years, written the way
+    # the app saves: hot snapshot plus one segment per closed month
+    if (wallet_dir / SNAPSHOT_FILE).exists() or (wallet_dir / LEGACY_FILE).exists():
+        raise FileExistsError(f"{wallet_dir} already holds a wallet; seed an empty directory")
+    wallet_dir.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(0)
+    today = date.today()
+    transactions = []
+    for i in range(count):
+        day = today - timedelta(days=rng.randrange(3 * 365))
+        trans_type = 'income' if rng.random() < 0.2 else 'expense'
+        transactions.append({
+            'id': f'seed-{i}', 'type': trans_type, 'amount': round(rng.uniform(1, 500), 2),
+            'category': rng.choice(['Salary', 'Freelance'] if trans_type == 'income' else
+                                   ['Food', 'Transport', 'Shopping', 'Bills']),
+            'date': day.isoformat(), 'description': f'seeded {i}',
+            'timestamp': f'{day.isoformat()}T12:00:00.{i % 1000000:06d}'})
+    journal = wallet_journal(wallet_dir)
+    journal.write_snapshot(transactions, {}, {})
+    journal.close()
+
+
+def prepare_wallet(wallet_dir):
+    # Bring a legacy JSON file, a rolled-over month or a long journal to
+    # the compacted binary store first, so every timed run measures the
+    # same load instead of the first one paying for the conversion
+    journal = wallet_journal(wallet_dir)
+    try:
+        transactions, budgets, rules = journal.load()
+        if journal.needs_compaction():
+            journal.write_snapshot(transactions, budgets, rules)
+    finally:
+        journal.close()
+
+
+def run_once(wallet_dir, headless=False):
+    # The wallet loads its data file from the working directory
+    probe = HEADLESS_PROBE if headless else PROBE
+    result = subprocess.run([sys.executable, '-c', probe, str(HERE)],
+                            cwd=wallet_dir, capture_output=True, text=True, timeout=120)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr else
+                           f"probe exited with {result.returncode}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure PersonalWallet startup time.")
+    parser.add_argument('--runs', type=int, default=5, help="fresh processes to time (default: 5)")
+    parser.add_argument('--wallet-dir', type=Path, default=Path('.'),
+                        help=f"directory holding {SNAPSHOT_FILE} and its journal, or a legacy "
+                             f"{LEGACY_FILE} to convert first (default: current)")
+    parser.add_argument('--seed', type=int, metavar='N',
+                        help="first write N random transactions into an empty --wallet-dir")
+    parser.add_argument('--record', type=Path, help="append the medians to this CSV file")
+    parser.add_argument('--headless', action='store_true',
+                        help="time the import and the data load only, without a display")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.seed:
+            seed_wallet(args.wallet_dir, args.seed)
+        prepare_wallet(args.wallet_dir)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"cannot prepare {args.wallet_dir}: {e}", file=sys.stderr)
+        return 1
+
+    runs = []
+    for i in range(args.runs):
+        try:
+            runs.append(run_once(args.wallet_dir, args.headless))
+        except (RuntimeError, subprocess.TimeoutExpired) as e:
+            print(f"run {i + 1} failed: {e}", file=sys.stderr)
+            return 1
+        if runs[-1]['matplotlib_loaded']:
+            print("warning: matplotlib was imported during startup", file=sys.stderr)
+
+    fields = [field for field in FIELDS if field in runs[0]]
+    medians = {field: statistics.median(run[field] for run in runs) for field in fields}
+    for field in fields:
+        values = [run[field] for run in runs]
+        print(f"{field:12} median {medians[field] * 1000:8.1f} ms   "
+              f"min {min(values) * 1000:8.1f} ms   max {max(values) * 1000:8.1f} ms")
+
+    if args.record:
+        new_file = not args.record.exists()
+        with open(args.record, 'a', newline='') as f:
+            writer = csv.writer(f)
+            if new_file:
+                writer.writerow(['timestamp', 'runs'] + [f'{field}_ms' for field in FIELDS])
+            writer.writerow([datetime.now().isoformat(timespec='seconds'), len(runs)] +
+                            [round(medians[field] * 1000, 1) if field in medians else ''
+                             for field in FIELDS])
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,225 @@
+import argparse
+import bisect
+import datetime
+import json
+import sys
+from collections import defaultdict
+
+# Bitmap indexes over the to-do tasks. Every task owns a slot; each status,
+# category, priority and creation day has a Python int with the bits of its
+# tasks' slots set. A filter is an AND across fields of the ORs within a
+# field, and the result decodes to ids in the order the tasks were added.
+# The app keeps one up to date; scripts can build one from a task file:
+#
+#   python TaskIndex.py tasks_v6.db --status Pending --priority High --priority Urgent
+#   python TaskIndex.py tasks_v6.json --category Work --since 2024-01-01 --count
+
+STATUSES = ('Pending', 'Completed')
+
+
+def task_keys(task):
+    # (status, category, priority, created day) a task is indexed under
+    return ('Completed' if task.get('done') else 'Pending',
+            task.get('category', 'General'),
+            task.get('priority', 'Medium'),
+            str(task.get('created', ''))[:10])
+
+
+class TaskIndex:
+    COMPACT_MIN = 1024  # slots before deleted ones are worth reclaiming
+
+    def __init__(self):
+        self.slots = {}    # id -> slot
+        self.records = []  # slot -> task, None once deleted
+        self.all = 0       # bits of the live slots
+        self.by_status = defaultdict(int)
+        self.by_category = defaultdict(int)
+        self.by_priority = defaultdict(int)
+        self.by_day = defaultdict(int)  # 'YYYY-MM-DD' of created
+        self.days = []                  # sorted keys of by_day
+
+    @classmethod
+    def build(cls, tasks):
+        index = cls()
+        index.extend(tasks)
+        return index
+
+    def __len__(self):
+        return len(self.slots)
+
+    def __contains__(self, tid):
+        return tid in self.slots
+
+    def _set(self, task, slot, on):
+        bit = 1 << slot
+        status, category, priority, day = task_keys(task)
+        for bitmaps, key in ((self.by_status, status), (self.by_category, category),
+                             (self.by_priority, priority), (self.by_day, day)):
+            if on:
+                if bitmaps is self.by_day and key not in bitmaps:
+                    bisect.insort(self.days, key)
+                bitmaps[key] |= bit
+            else:
+                bitmaps[key] &= ~bit
+                if not bitmaps[key]:
+                    del bitmaps[key]
+                    if bitmaps is self.by_day:
+                        del self.days[bisect.bisect_left(self.days, key)]
+        if on:
+            self.all |= bit
+        else:
+            self.all &= ~bit
+
+    @staticmethod
+    def _bits(slots):
+        # An int with the given slots set, built as bytes rather than by
+        # OR-ing in one bit (and so one bitmap-wide int) at a time
+        low = min(slots) & ~7
+        buf = bytearray((max(slots) - low) // 8 + 1)
+        for slot in slots:
+            buf[(slot - low) >> 3] |= 1 << ((slot - low) & 7)
+        return int.from_bytes(buf, 'little') << low
+
+    def extend(self, tasks):
+        # add() for many tasks; each bitmap takes all of its new bits in
+        # one OR, so building or loading the index is linear in the tasks
+        fields = (self.by_status, self.by_category, self.by_priority, self.by_day)
+        pending = [defaultdict(list) for _ in fields]
+        new_slots = []
+
+        def flush():
+            for bitmaps, slots_by_key in zip(fields, pending):
+                for key, slots in slots_by_key.items():
+                    if bitmaps is self.by_day and key not in bitmaps:
+                        bisect.insort(self.days, key)
+                    bitmaps[key] |= self._bits(slots)
+                slots_by_key.clear()
+            if new_slots:
+                self.all |= self._bits(new_slots)
+                new_slots.clear()
+
+        for task in tasks:
+            if task['id'] in self.slots:
+                flush()  # a replacement clears bits, so the pending ones go in first
+                self.add(task)
+                continue
+            slot = self.slots[task['id']] = len(self.records)
+            self.records.append(task)
+            new_slots.append(slot)
+            for slots_by_key, key in zip(pending, task_keys(task)):
+                slots_by_key[key].append(slot)
+        flush()
+
+    def add(self, task):
+        # A known id is replaced in place, keeping its position
+        slot = self.slots.get(task['id'])
+        if slot is None:
+            slot = self.slots[task['id']] = len(self.records)
+            self.records.append(task)
+        else:
+            self._set(self.records[slot], slot, False)
+            self.records[slot] = task
+        self._set(task, slot, True)
+
+    replace = add
+
+    def remove(self, tid):
+        slot = self.slots.pop(tid, None)
+        if slot is None:
+            return
+        self._set(self.records[slot], slot, False)
+        self.records[slot] = None
+        # Deleted slots still widen every bitmap; renumber once they dominate
+        if len(self.records) >= self.COMPACT_MIN and len(self.slots) * 2 < len(self.records):
+            live = [task for task in self.records if task is not None]
+            self.__init__()
+            self.extend(live)
+
+    def clear(self):
+        self.__init__()
+
+    @staticmethod
+    def _any(bitmaps, keys):
+        mask = 0
+        for key in keys:
+            mask |= bitmaps.get(key, 0)
+        return mask
+
+    def mask(self, status=None, categories=None, priorities=None, created_from=None, created_to=None):
+        # Bits of the tasks matching every given filter. categories and
+        # priorities match any of their values; created_from/created_to are
+        # inclusive 'YYYY-MM-DD' bounds. None leaves a field unfiltered.
+        mask = self.all
+        if status is not None:
+            mask &= self.by_status.get(status, 0)
+        if categories is not None:
+            mask &= self._any(self.by_category, categories)
+        if priorities is not None:
+            mask &= self._any(self.by_priority, priorities)
+        if created_from is not None or created_to is not None:
+            lo = 0 if created_from is None else bisect.bisect_left(self.days, created_from)
+            hi = len(self.days) if created_to is None else bisect.bisect_right(self.days, created_to)
+            mask &= self._any(self.by_day, self.days[lo:hi])
+        return mask
+
+    def ids(self, mask):
+        # Ids for the set bits, in slot order; one pass over the bit string
+        bits = format(mask, 'b')[::-1] if mask else ''
+        records = self.records
+        result = []
+        slot = bits.find('1')
+        while slot >= 0:
+            result.append(records[slot]['id'])
+            slot = bits.find('1', slot + 1)
+        return result
+
+    def query(self, **filters):
+        return self.ids(self.mask(**filters))
+
+    def count(self, **filters):
+        return bin(self.mask(**filters)).count('1')
+
+
+def load_task_file(path):
+    # Tasks from a TaskStore database or a tasks_v6.json-style file
+    if str(path).endswith('.db'):
+        from TaskStore import TaskStore
+        store = TaskStore(path)
+        try:
+            return store.load()
+        finally:
+            store.close()
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query a to-do task file by status, category, "
+                                                 "priority and creation date.")
+    parser.add_argument('tasks', help="tasks_v6.json or a TaskStore database (.db)")
+    parser.add_argument('--status', choices=STATUSES)
+    parser.add_argument('--category', action='append', help="may be repeated (any of)")
+    parser.add_argument('--priority', action='append', help="may be repeated (any of)")
+    parser.add_argument('--since', type=datetime.date.fromisoformat, help="created on or after, YYYY-MM-DD")
+    parser.add_argument('--until', type=datetime.date.fromisoformat, help="created on or before, YYYY-MM-DD")
+    parser.add_argument('--count', action='store_true', help="print only the number of matches")
+    args = parser.parse_args(argv)
+
+    tasks = load_task_file(args.tasks)
+    index = TaskIndex.build(tasks)
+    filters = dict(status=args.status, categories=args.category, priorities=args.priority,
+                   created_from=args.since and args.since.isoformat(),
+                   created_to=args.until and args.until.isoformat())
+    if args.count:
+        print(index.count(**filters))
+        return 0
+    by_id = {task['id']: task for task in tasks}
+    for tid in index.query(**filters):
+        task = by_id[tid]
+        status, category, priority, day = task_keys(task)
+        print(f"{status:9} | {priority:6} | {category:8} | {task.get('created', '')} | {task['text']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
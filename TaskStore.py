@@ -0,0 +1,200 @@
+import json
+import os
+import sqlite3
+import sys
+import threading
+
+from BackgroundWriter import replace_file
+
+# SQLite storage for the to-do app: one row per task, indexed on the
+# columns the filters use, and an FTS5 trigram index on the text so
+# substring search does not scan the rows. Changes are single-row upserts
+# and deletes committed in WAL mode.
+#
+#   python TaskStore.py migrate tasks_v6.db tasks_v6.json
+#   python TaskStore.py export tasks_v6.db tasks_export.json
+
+COLUMNS = ('id', 'text', 'priority', 'category', 'done', 'created')
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS tasks (
+    rowid INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    text TEXT NOT NULL,
+    priority TEXT NOT NULL,
+    category TEXT NOT NULL,
+    done INTEGER NOT NULL,
+    created TEXT NOT NULL,
+    extra TEXT
+);
+CREATE INDEX IF NOT EXISTS tasks_done ON tasks(done);
+CREATE INDEX IF NOT EXISTS tasks_category ON tasks(category);
+CREATE INDEX IF NOT EXISTS tasks_priority ON tasks(priority);
+CREATE INDEX IF NOT EXISTS tasks_created ON tasks(created);
+'''
+
+# External-content FTS table kept in step by triggers; trigram tokens
+# make MATCH a case-insensitive substring search
+FTS_SCHEMA = '''
+CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5(
+    text, content='tasks', content_rowid='rowid', tokenize='trigram');
+CREATE TRIGGER IF NOT EXISTS tasks_fts_insert AFTER INSERT ON tasks BEGIN
+    INSERT INTO tasks_fts(rowid, text) VALUES (new.rowid, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS tasks_fts_delete AFTER DELETE ON tasks BEGIN
+    INSERT INTO tasks_fts(tasks_fts, rowid, text) VALUES ('delete', old.rowid, old.text);
+END;
+CREATE TRIGGER IF NOT EXISTS tasks_fts_update AFTER UPDATE OF text ON tasks BEGIN
+    INSERT INTO tasks_fts(tasks_fts, rowid, text) VALUES ('delete', old.rowid, old.text);
+    INSERT INTO tasks_fts(rowid, text) VALUES (new.rowid, new.text);
+END;
+'''
+
+UPSERT = '''
+INSERT INTO tasks (id, text, priority, category, done, created, extra)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(id) DO UPDATE SET text = excluded.text, priority = excluded.priority,
+    category = excluded.category, done = excluded.done, created = excluded.created,
+    extra = excluded.extra
+'''
+
+MIGRATED = 1  # PRAGMA user_version once the JSON file has been imported
+
+
+def task_params(task):
+    # Row values for a task dict; fields without a column go to extra
+    extra = {key: value for key, value in task.items() if key not in COLUMNS}
+    return (task['id'], task['text'], task.get('priority', 'Medium'),
+            task.get('category', 'General'), 1 if task.get('done') else 0,
+            task.get('created', ''), json.dumps(extra, ensure_ascii=False) if extra else None)
+
+
+def task_from_row(row):
+    task = {'id': row[0], 'text': row[1], 'priority': row[2], 'category': row[3],
+            'done': bool(row[4]), 'created': row[5]}
+    if row[6]:
+        task.update(json.loads(row[6]))
+    return task
+
+
+class TaskStore:
+    # A write connection for the save thread and a read connection for
+    # the Tk thread and loaders, each behind its own lock. In WAL mode a
+    # read sees the last commit and never waits for one in progress.
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        with self.db:
+            self.db.executescript(SCHEMA)
+        try:
+            with self.db:
+                self.db.executescript(FTS_SCHEMA)
+            self.fts = True
+        except sqlite3.OperationalError:
+            self.fts = False  # no FTS5 or no trigram tokenizer in this SQLite build
+        self.read_lock = threading.Lock()
+        self.reader = sqlite3.connect(path, check_same_thread=False)
+
+    def close(self):
+        with self.read_lock:
+            self.reader.close()
+        with self.lock:
+            self.db.close()
+
+    def migrate_json(self, json_file):
+        # One-shot import of the JSON file of earlier versions; returns the
+        # number of tasks imported. The JSON file is left in place.
+        with self.lock:
+            if self.db.execute('PRAGMA user_version').fetchone()[0] >= MIGRATED:
+                return 0
+            tasks = []
+            if os.path.exists(json_file):
+                with open(json_file, 'r', encoding='utf-8') as f:
+                    tasks = json.load(f)
+            # Checked before anything is written, so a bad file leaves the
+            # database unmigrated and the caller can fall back to it
+            if not isinstance(tasks, list):
+                raise ValueError(f"{json_file}: expected a JSON list of tasks")
+            for i, task in enumerate(tasks):
+                if not isinstance(task, dict) or 'id' not in task or 'text' not in task:
+                    raise ValueError(f"{json_file}: malformed task at index {i}")
+            with self.db:
+                self.db.executemany(UPSERT, [task_params(t) for t in tasks])
+                self.db.execute(f'PRAGMA user_version={MIGRATED}')
+            return len(tasks)
+
+    def load(self):
+        with self.read_lock:
+            rows = self.reader.execute(f'SELECT {", ".join(COLUMNS)}, extra FROM tasks ORDER BY rowid')
+            return [task_from_row(row) for row in rows]
+
+    def iter_batches(self, size):
+        # The tasks in load() order as lists of up to size. The read lock
+        # is held per batch and each batch resumes after the last rowid
+        # seen, so the first ones arrive without reading the whole table
+        last = 0
+        while True:
+            with self.read_lock:
+                rows = self.reader.execute(f'SELECT rowid, {", ".join(COLUMNS)}, extra FROM tasks '
+                                           'WHERE rowid > ? ORDER BY rowid LIMIT ?',
+                                           (last, size)).fetchall()
+            if not rows:
+                return
+            last = rows[-1][0]
+            yield [task_from_row(row[1:]) for row in rows]
+
+    def apply(self, changes):
+        # changes: id -> task dict, or None to delete; one transaction
+        with self.lock, self.db:
+            for tid, task in changes.items():
+                if task is None:
+                    self.db.execute('DELETE FROM tasks WHERE id = ?', (tid,))
+                else:
+                    self.db.execute(UPSERT, task_params(task))
+
+    def search(self, text):
+        # Ids of the tasks whose text contains text, ignoring case, as of
+        # the last commit
+        with self.read_lock:
+            if self.fts and len(text) >= 3:
+                phrase = '"' + text.replace('"', '""') + '"'
+                rows = self.reader.execute('SELECT tasks.id FROM tasks_fts JOIN tasks '
+                                       'ON tasks.rowid = tasks_fts.rowid WHERE tasks_fts MATCH ?',
+                                       (phrase,))
+            else:
+                # Trigrams need three characters; shorter terms scan in SQLite
+                pattern = '%' + text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+                rows = self.reader.execute("SELECT id FROM tasks WHERE text LIKE ? ESCAPE '\\'",
+                                       (pattern,))
+            return {row[0] for row in rows}
+
+    def export_json(self, path):
+        # The same layout as tasks_v6.json, so exports load in any version
+        tasks = self.load()
+        replace_file(path, lambda f: json.dump(tasks, f, ensure_ascii=False, indent=2),
+                     encoding='utf-8')
+        return len(tasks)
+
+
+def main(argv=None):
+    args = sys.argv[1:] if argv is None else argv
+    if len(args) != 3 or args[0] not in ('migrate', 'export'):
+        print("usage: TaskStore.py migrate DB JSON | export DB JSON", file=sys.stderr)
+        return 2
+    command, db_file, json_file = args
+    store = TaskStore(db_file)
+    try:
+        if command == 'migrate':
+            print(f"imported {store.migrate_json(json_file)} tasks into {db_file}")
+        else:
+            print(f"exported {store.export_json(json_file)} tasks to {json_file}")
+    finally:
+        store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
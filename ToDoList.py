@@ -1,9 +1,79 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
-import json, os, datetime, uuid
+from tkinter import ttk, messagebox, filedialog
+import json, os, re, datetime, uuid, itertools, queue, threading
+from collections import Counter
+from VirtualTreeview import VirtualTreeview
+from BackgroundWriter import BackgroundWriter, replace_file
+from TaskIndex import TaskIndex
+
+try:
+    from sqlite3 import Error as StoreError
+    from TaskStore import TaskStore
+except ImportError:
+    TaskStore = None
+    StoreError = OSError
 
 DATA_FILE = "tasks_v6.json"
+DB_FILE = "tasks_v6.db"
+USE_SQLITE = False  # True moves the tasks into DB_FILE; DATA_FILE is then no longer written
 CATEGORIES = ["General", "Work", "Study", "Home", "Shopping", "Personal", "Health"]
+PRIORITIES = ["Low", "Medium", "High", "Urgent"]
+SAVE_DELAY_MS = 300  # edits within this window share one save
+FILTER_DELAY_MS = 200  # keystrokes within this window share one filter pass
+LOAD_CHUNK = 1000  # tasks indexed and shown per event-loop turn while loading
+LOAD_POLL_MS = 15
+
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+def iter_task_file(path):
+    # The tasks of a JSON array file one at a time, so the first screen can
+    # be shown before the rest of a large file is parsed
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    decoder = json.JSONDecoder()
+    i = WHITESPACE.match(text).end()
+    if text[i:i+1] != '[':
+        raise ValueError(f"{path}: expected a JSON list of tasks")
+    i = WHITESPACE.match(text, i + 1).end()
+    if text[i:i+1] == ']':
+        return
+    while True:
+        task, i = decoder.raw_decode(text, i)
+        if not isinstance(task, dict) or 'id' not in task or 'text' not in task:
+            raise ValueError(f"{path}: malformed task near offset {i}")
+        yield task
+        i = WHITESPACE.match(text, i).end()
+        if text[i:i+1] == ']':
+            return
+        if text[i:i+1] != ',':
+            raise ValueError(f"{path}: expected ',' or ']' at offset {i}")
+        i = WHITESPACE.match(text, i + 1).end()
+
+class TaskStats:
+    # Done/pending/category/priority counts kept in step with the task
+    # records, so the stats label and dialog never rescan the list
+    def __init__(self):
+        self.total = 0
+        self.done = 0
+        self.by_category = Counter()
+        self.by_priority = Counter()
+
+    @property
+    def pending(self):
+        return self.total - self.done
+
+    def add(self, task, sign=1):
+        self.total += sign
+        if task.get('done'):
+            self.done += sign
+        self.by_category[task.get('category', 'General')] += sign
+        self.by_priority[task.get('priority', 'Medium')] += sign
+
+    def remove(self, task):
+        self.add(task, sign=-1)
+
+    def clear(self):
+        self.__init__()
 
 class TodoApp:
     def __init__(self):
@@ -18,12 +88,33 @@ class TodoApp:
         style.configure("Treeview.Heading", font=('Segoe UI Semibold', 10), background="#2c3e50", foreground="white")
         style.map("Treeview", background=[('selected', '#cce5ff')])
 
-        self.metas = {}
+        # id -> task dict. Records are replaced, never changed in place, so a
+        # save can hand the writer thread the current values without copying
+        self.tasks = {}
+        self.stats = TaskStats()
+        self.index = TaskIndex()
+        self.filter_after = None
+        self.last_filter = None  # (search, filters, ids) of the last filter pass
+        self.loading = None  # chunk queue of the load in progress
         self.fullscreen = False
+        self.save_after = None
+        self.changed = set()  # ids added, edited or deleted since the last save
+        self.unsaved = Counter()  # id -> submitted batches the store has not committed yet
+        self.unsaved_lock = threading.Lock()
+        self.store = None
+        if USE_SQLITE and TaskStore is not None:
+            try:
+                self.store = TaskStore(DB_FILE)
+                self.store.migrate_json(DATA_FILE)
+            except (OSError, ValueError, StoreError) as e:
+                messagebox.showerror("Error", f"Task database unavailable, using {DATA_FILE}: {e}")
+                self.store = None
+        self.writer = BackgroundWriter(self.write_tasks)
         self.setup_ui()
         self.load_tasks()
 
         self.root.bind("<Escape>", lambda e: self.set_fullscreen(False))
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
         self.root.mainloop()
 
     def setup_ui(self):
@@ -44,7 +135,7 @@ class TodoApp:
         self.search_var = tk.StringVar()
         search_entry = ttk.Entry(top_frame, textvariable=self.search_var, width=30)
         search_entry.grid(row=0, column=1, padx=5)
-        search_entry.bind("<KeyRelease>", self.filter_tasks)
+        search_entry.bind("<KeyRelease>", self.schedule_filter)
 
         # Status filter
         tk.Label(top_frame, text="Status:", bg='#edf2f7', font=('Segoe UI', 10, 'bold')).grid(row=0, column=2, padx=(15,5))
@@ -60,6 +151,26 @@ class TodoApp:
         cat_combo.grid(row=0, column=5)
         cat_combo.bind("<<ComboboxSelected>>", self.filter_tasks)
 
+        # Priority filter
+        tk.Label(top_frame, text="Priority:", bg='#edf2f7', font=('Segoe UI', 10, 'bold')).grid(row=1, column=2, padx=(15,5), pady=(6,0))
+        self.priority_filter_var = tk.StringVar(value="All")
+        pri_combo = ttk.Combobox(top_frame, textvariable=self.priority_filter_var, values=["All"]+PRIORITIES, state="readonly", width=12)
+        pri_combo.grid(row=1, column=3, pady=(6,0))
+        pri_combo.bind("<<ComboboxSelected>>", self.filter_tasks)
+
+        # Created date range (YYYY-MM-DD, either end optional)
+        tk.Label(top_frame, text="Created:", bg='#edf2f7', font=('Segoe UI', 10, 'bold')).grid(row=1, column=4, padx=(15,5), pady=(6,0))
+        date_frame = tk.Frame(top_frame, bg='#edf2f7')
+        date_frame.grid(row=1, column=5, pady=(6,0))
+        self.created_from_var = tk.StringVar()
+        self.created_to_var = tk.StringVar()
+        for var, sep in ((self.created_from_var, "–"), (self.created_to_var, None)):
+            date_entry = ttk.Entry(date_frame, textvariable=var, width=10)
+            date_entry.pack(side='left')
+            date_entry.bind("<KeyRelease>", self.schedule_filter)
+            if sep:
+                tk.Label(date_frame, text=sep, bg='#edf2f7').pack(side='left', padx=2)
+
         # Divider
         ttk.Separator(self.root, orient='horizontal').pack(fill='x', padx=20, pady=10)
 
@@ -78,7 +189,7 @@ class TodoApp:
 
         tk.Label(add_frame, text="Priority:", bg='#edf2f7', font=('Segoe UI', 10)).grid(row=0, column=4, padx=(15,5))
         self.priority_var = tk.StringVar(value="Medium")
-        pri_add = ttk.Combobox(add_frame, textvariable=self.priority_var, values=["Low","Medium","High","Urgent"], state="readonly", width=10)
+        pri_add = ttk.Combobox(add_frame, textvariable=self.priority_var, values=PRIORITIES, state="readonly", width=10)
         pri_add.grid(row=0, column=5, pady=5)
 
         ttk.Button(add_frame, text="Add Task", command=self.add_task).grid(row=0, column=6, padx=(20,0))
@@ -88,7 +199,8 @@ class TodoApp:
         list_frame.pack(fill='both', expand=True, padx=20, pady=(0,10))
 
         columns = ('Status', 'Priority', 'Category', 'Task', 'Created')
-        self.tree = ttk.Treeview(list_frame, columns=columns, show='headings', height=18)
+        # Rows are task ids; only the visible ones become Tk items
+        self.tree = VirtualTreeview(list_frame, self.task_row, key=str, columns=columns, show='headings', height=18)
         for col, text in zip(columns, ['📊 Status', '🎯 Priority', '📁 Category', '📝 Task', '⏰ Created']):
             self.tree.heading(col, text=text)
         self.tree.column('Status', width=90, anchor='center')
@@ -114,6 +226,7 @@ class TodoApp:
         tk.Button(bottom, text="🗑️ Delete", bg="#ffcdd2", relief='flat', command=self.delete_selected, **btn_style).pack(side='left', padx=4)
         tk.Button(bottom, text="📊 Stats", bg="#d1c4e9", relief='flat', command=self.show_stats, **btn_style).pack(side='left', padx=4)
         tk.Button(bottom, text="🔄 Refresh", bg="#bbdefb", relief='flat', command=self.load_tasks, **btn_style).pack(side='left', padx=4)
+        tk.Button(bottom, text="💾 Export JSON", bg="#f0f4c3", relief='flat', command=self.export_tasks, **btn_style).pack(side='left', padx=4)
         tk.Button(bottom, text="⛶ Fullscreen", bg="#b2dfdb", relief='flat', command=self.toggle_fullscreen, **btn_style).pack(side='right', padx=4)
 
         self.stats_label = tk.Label(self.root, text="", bg='#edf2f7', font=('Segoe UI', 10, 'bold'))
@@ -134,90 +247,304 @@ class TodoApp:
             "done": False,
             "created": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         }
-        self.display_task(task)
+        self.register_task(task)
+        self.save_tasks([task['id']])  # before filtering: a search treats it as unsaved
+        if self.filter_active():
+            # Listed only if the active filter matches it, as the last row
+            self.filter_tasks()
+        else:
+            self.tree.rows.append(task['id'])
+        if self.tree.rows and self.tree.rows[-1] == task['id']:
+            self.tree.see_row(len(self.tree.rows) - 1)
         self.entry_text.delete(0, tk.END)
-        self.save_tasks()
         self.update_stats()
 
-    def display_task(self, task):
+    def register_task(self, task):
+        self.tasks[task['id']] = task
+        self.stats.add(task)
+        self.index.add(task)
+        self.last_filter = None
+
+    def register_tasks(self, tasks):
+        # A loaded chunk: the index takes it in one extend()
+        for task in tasks:
+            self.tasks[task['id']] = task
+            self.stats.add(task)
+        self.index.extend(tasks)
+        self.last_filter = None
+
+    def replace_task(self, task):
+        old = self.tasks[task['id']]
+        self.stats.remove(old)
+        self.tasks[task['id']] = task
+        self.stats.add(task)
+        self.index.replace(task)
+        self.last_filter = None
+
+    def remove_task(self, tid):
+        task = self.tasks.pop(tid)
+        self.stats.remove(task)
+        self.index.remove(tid)
+        self.last_filter = None
+
+    def task_row(self, tid):
+        task = self.tasks[tid]
         status = "✅" if task.get("done") else "⏰"
-        self.metas[self.tree.insert('', 'end', values=(
-            status,
-            task.get('priority', 'Medium'),
-            task.get('category', 'General'),
-            task['text'],
-            task['created']
-        ))] = json.dumps(task)
+        return (status,
+                task.get('priority', 'Medium'),
+                task.get('category', 'General'),
+                task['text'],
+                task['created']), ()
 
     def delete_selected(self):
-        sel = self.tree.selection()
+        sel = self.tree.selected_rows()
         if not sel:
             return
         if messagebox.askyesno("Confirm", "Delete selected task(s)?"):
-            for item in sel:
-                if item in self.metas: del self.metas[item]
-                self.tree.delete(item)
-            self.save_tasks(); self.update_stats()
+            for tid in sel:
+                if tid in self.tasks: self.remove_task(tid)
+            # One pass over the rows however many were selected
+            gone = set(sel)
+            self.tree.rows[:] = [tid for tid in self.tree.rows if tid not in gone]
+            self.tree.clear_selection(); self.tree.refresh()
+            self.save_tasks(sel); self.update_stats()
 
     def toggle_done_selected(self):
-        for item in self.tree.selection():
-            task = json.loads(self.metas[item])
-            task['done'] = not task.get('done', False)
-            vals = list(self.tree.item(item, 'values'))
-            vals[0] = "✅" if task['done'] else "⏰"
-            self.tree.item(item, values=vals)
-            self.metas[item] = json.dumps(task)
-        self.save_tasks(); self.update_stats()
+        sel = self.tree.selected_rows()
+        for tid in sel:
+            task = self.tasks[tid]
+            self.replace_task(dict(task, done=not task.get('done', False)))
+        self.tree.refresh()
+        self.save_tasks(sel); self.update_stats()
 
     def on_tree_double_click(self, e): self.toggle_done_selected()
     def edit_selected(self):
-        sel = self.tree.selection()
+        sel = self.tree.selected_rows()
         if not sel: return
-        item = sel[0]
-        task = json.loads(self.metas[item])
+        tid = sel[0]
+        task = self.tasks[tid]
         new_text = tk.simpledialog.askstring("Edit Task", "Edit task text:", initialvalue=task['text'])
         if new_text:
-            task['text'] = new_text
-            vals = list(self.tree.item(item, 'values'))
-            vals[3] = new_text
-            self.tree.item(item, values=vals)
-            self.metas[item] = json.dumps(task)
-            self.save_tasks()
-
-    def save_tasks(self):
-        with open(DATA_FILE, "w", encoding="utf-8") as f:
-            json.dump([json.loads(m) for m in self.metas.values()], f, ensure_ascii=False, indent=2)
+            self.replace_task(dict(task, text=new_text))
+            self.tree.refresh()
+            self.save_tasks([tid])
+
+    def save_tasks(self, tids):
+        # Only schedules a save of the tasks with these ids: a burst of edits
+        # becomes one write, and the writer thread does the encoding and I/O
+        self.changed.update(tids)
+        if self.save_after is None:
+            self.save_after = self.root.after(SAVE_DELAY_MS, self.submit_save)
+
+    def submit_save(self):
+        self.save_after = None
+        if self.loading is not None:
+            return  # self.tasks is still partial; the load saves self.changed when done
+        if self.store is not None:
+            # Only the changed rows; None deletes
+            with self.unsaved_lock:
+                self.unsaved.update(self.changed)
+            self.writer.submit({tid: self.tasks.get(tid) for tid in self.changed})
+        else:
+            self.writer.submit(list(self.tasks.values()))
+        self.changed = set()
+
+    def write_tasks(self, batches):
+        # Writer thread. SQLite gets every queued change in one transaction;
+        # the JSON file only needs the newest snapshot.
+        if self.store is not None:
+            changes = {}
+            for batch in batches:
+                changes.update(batch)
+            self.store.apply(changes)
+            with self.unsaved_lock:
+                for batch in batches:
+                    self.unsaved.subtract(batch.keys())
+                self.unsaved = +self.unsaved
+            return
+        tasks = batches[-1]
+        replace_file(DATA_FILE, lambda f: json.dump(tasks, f, ensure_ascii=False, indent=2),
+                     encoding="utf-8")
+
+    def flush_saves(self):
+        # Push pending edits to the store, e.g. before querying it
+        if self.loading is not None and self.changed:
+            self.finish_load()
+        if self.save_after is not None:
+            self.root.after_cancel(self.save_after)
+            self.submit_save()
+        self.writer.flush()
+
+    def on_close(self):
+        if self.loading is not None and self.changed:
+            self.finish_load()
+        if self.save_after is not None:
+            self.root.after_cancel(self.save_after)
+            self.submit_save()
+        try:
+            self.writer.close()
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to save tasks: {e}")
+        if self.store is not None:
+            self.store.close()
+        self.root.destroy()
 
     def load_tasks(self):
-        for i in self.tree.get_children(): self.tree.delete(i)
-        self.metas.clear()
-        if os.path.exists(DATA_FILE):
-            try:
-                with open(DATA_FILE, "r", encoding="utf-8") as f:
-                    for t in json.load(f): self.display_task(t)
-            except: pass
+        try:
+            self.flush_saves()  # Refresh must not drop edits still being saved
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to save tasks: {e}")
+            return
+        self.tasks.clear()
+        self.stats.clear()
+        self.index.clear()
+        self.last_filter = None
+        self.tree.set_rows([])  # one bulk delete of the rows on screen
+        self.stats_label.config(text="⏳ Loading tasks...")
+        # A worker thread parses; the Tk thread indexes and shows one chunk
+        # per turn, so the window stays responsive and fills from the top
+        # Until the last chunk is in, saves are held back: the JSON file
+        # would be overwritten with the tasks loaded so far
+        self.loading = chunks = queue.Queue()
+        threading.Thread(target=self.read_tasks, args=(chunks,), daemon=True).start()
+        self.root.after(LOAD_POLL_MS, self.poll_load, chunks)
+
+    def read_tasks(self, chunks):
+        # Worker thread: queues lists of up to LOAD_CHUNK tasks, then None,
+        # or the exception that stopped it. Stops early once a later
+        # Refresh has replaced this load.
+        try:
+            if self.store is not None:
+                batches = self.store.iter_batches(LOAD_CHUNK)
+            elif os.path.exists(DATA_FILE):
+                tasks = iter_task_file(DATA_FILE)
+                batches = iter(lambda: list(itertools.islice(tasks, LOAD_CHUNK)), [])
+            else:
+                batches = iter(())
+            for chunk in batches:
+                if self.loading is not chunks: break
+                chunks.put(chunk)
+            chunks.put(None)
+        except Exception as e:
+            chunks.put(e)
+
+    def poll_load(self, chunks):
+        if self.loading is not chunks:
+            return  # finished early, or a later Refresh started over
+        try:
+            chunk = chunks.get_nowait()
+        except queue.Empty:
+            self.root.after(LOAD_POLL_MS, self.poll_load, chunks)
+            return
+        self.take_chunk(chunk)
+        if self.loading is chunks:
+            self.root.after(1, self.poll_load, chunks)
+
+    def finish_load(self):
+        # Take the rest of the running load now, e.g. before saving or exporting
+        while self.loading is not None:
+            self.take_chunk(self.loading.get())
+
+    def take_chunk(self, chunk):
+        if chunk is not None and not isinstance(chunk, Exception):
+            self.register_tasks(chunk)
+            if not self.filter_active():
+                # Only the first chunks reach Tk; later ones just grow the scrollbar
+                self.tree.extend_rows([t['id'] for t in chunk])
+            self.update_stats()
+            return
+        self.loading = None
+        if isinstance(chunk, Exception):
+            messagebox.showerror("Error", f"Failed to load tasks: {chunk}")
+        if self.filter_active(): self.filter_tasks()
         self.update_stats()
+        if self.changed and self.save_after is None:
+            self.submit_save()  # edits made while loading
+
+    def export_tasks(self):
+        path = filedialog.asksaveasfilename(defaultextension=".json", initialfile="tasks_export.json",
+                                            filetypes=[("JSON files", "*.json"), ("All files", "*.*")])
+        if not path:
+            return
+        self.finish_load()
+        try:
+            tasks = list(self.tasks.values())
+            replace_file(path, lambda f: json.dump(tasks, f, ensure_ascii=False, indent=2),
+                         encoding="utf-8")
+        except OSError as e:
+            messagebox.showerror("Error", f"Failed to export tasks: {e}")
 
     def show_stats(self):
-        total=len(self.metas)
-        done=sum(1 for m in self.metas.values() if json.loads(m).get('done',False))
-        pend=total-done
-        messagebox.showinfo("Stats", f"✅ Done: {done}\n⏰ Pending: {pend}\n📈 Total: {total}")
+        st=self.stats
+        cats=', '.join(f"{k}({v})" for k, v in sorted((+st.by_category).items()))
+        pris=', '.join(f"{k}({v})" for k, v in sorted((+st.by_priority).items()))
+        messagebox.showinfo("Stats", f"✅ Done: {st.done}\n⏰ Pending: {st.pending}\n📈 Total: {st.total}\n"
+                                     f"📁 Categories: {cats or '-'}\n🎯 Priorities: {pris or '-'}")
 
     def update_stats(self):
-        total=len(self.metas)
-        done=sum(1 for m in self.metas.values() if json.loads(m).get('done',False))
-        pend=total-done
-        self.stats_label.config(text=f"📊 Tasks → {done} Done | {pend} Pending | {total} Total")
+        st=self.stats
+        self.stats_label.config(text=f"📊 Tasks → {st.done} Done | {st.pending} Pending | {st.total} Total")
+
+    def schedule_filter(self, e=None):
+        # Typing restarts the timer; the filter runs once the keys pause
+        if self.filter_after is not None:
+            self.root.after_cancel(self.filter_after)
+        self.filter_after = self.root.after(FILTER_DELAY_MS, self.filter_tasks)
 
     def filter_tasks(self, e=None):
-        s=self.search_var.get().lower(); st=self.filter_var.get(); cat=self.category_filter_var.get()
-        for i in self.tree.get_children():
-            v=self.tree.item(i)['values']; hide=False
-            if s and s not in v[3].lower(): hide=True
-            if st!="All" and st!=("Completed" if v[0]=="✅" else "Pending"): hide=True
-            if cat!="All" and cat!=v[2]: hide=True
-            self.tree.detach(i) if hide else self.tree.reattach(i,'','end')
+        if self.filter_after is not None:
+            self.root.after_cancel(self.filter_after)
+            self.filter_after = None
+        s=self.search_var.get().lower()
+
+        # Status, category, priority and dates are bitmap lookups in the
+        # index; a search that extends the previous one (the usual case
+        # while typing) only re-checks the previous matches
+        filters=self.current_filters()
+        last=self.last_filter
+        if last is not None and last[1]==filters and s.startswith(last[0]):
+            ids=last[2]
+        else:
+            ids=self.index.query(**filters)
+        if s:
+            matches=None
+            if self.store is not None:
+                # The store's text index answers the search as of its last
+                # commit; tasks with edits not committed yet are matched here
+                try:
+                    with self.unsaved_lock:
+                        stale=self.changed|self.unsaved.keys()
+                    matches=self.store.search(s)
+                except Exception:
+                    matches=None  # fall back to scanning the candidates
+            if matches is not None:
+                ids=[tid for tid in ids if (s in self.tasks[tid]['text'].lower() if tid in stale else tid in matches)]
+            else:
+                ids=[tid for tid in ids if s in self.tasks[tid]['text'].lower()]
+        self.last_filter=(s, filters, ids)
+
+        if ids!=self.tree.rows:
+            # The tree only re-renders the visible rows that changed
+            self.tree.set_rows(list(ids))
+
+    def filter_active(self):
+        return bool(self.search_var.get()) or any(v is not None for v in self.current_filters().values())
+
+    def current_filters(self):
+        # The filter widgets as TaskIndex.query arguments; a date that does
+        # not parse (yet) leaves that end of the range open
+        def choice(var):
+            return None if var.get()=="All" else var.get()
+        def day(var):
+            try:
+                return datetime.date.fromisoformat(var.get().strip()).isoformat()
+            except ValueError:
+                return None
+        category=choice(self.category_filter_var); priority=choice(self.priority_filter_var)
+        return dict(status=choice(self.filter_var),
+                    categories=None if category is None else [category],
+                    priorities=None if priority is None else [priority],
+                    created_from=day(self.created_from_var), created_to=day(self.created_to_var))
 
     def toggle_fullscreen(self):
         self.fullscreen = not self.fullscreen
@@ -0,0 +1,216 @@
+from tkinter import ttk
+
+
+class VirtualTreeview(ttk.Treeview):
+    # Treeview that only materializes the rows currently in view. Rows come
+    # from a backing sequence; row_values(row) returns (values, tags) and
+    # key(row) returns the unique string used as the item iid. Scrolling,
+    # selection and refresh cost depend on the viewport height, not on the
+    # number of rows.
+    def __init__(self, master, row_values, key=str, **kw):
+        self._yscroll = kw.pop('yscrollcommand', None) or kw.pop('yscroll', None)
+        super().__init__(master, **kw)
+        self.row_values = row_values
+        self.key = key
+        self.rows = []
+        self.offset = 0
+        self.visible_rows = int(kw.get('height', 10))
+        self._selected = {}  # key -> row, including rows scrolled out of view
+        self._window = {}    # key -> row for the materialized items
+        self._replace_selection = False
+
+        self.bind('<Configure>', self._on_configure, add='+')
+        self.bind('<<TreeviewSelect>>', self._on_select, add='+')
+        self.bind('<Button-1>', self._on_click, add='+')
+        self.bind('<MouseWheel>', self._on_wheel)
+        self.bind('<Button-4>', lambda e: self._scroll_by(-3))
+        self.bind('<Button-5>', lambda e: self._scroll_by(3))
+        self.bind('<Up>', lambda e: self._on_arrow(e, -1))
+        self.bind('<Down>', lambda e: self._on_arrow(e, 1))
+        self.bind('<Prior>', lambda e: self._scroll_by(-self.visible_rows))
+        self.bind('<Next>', lambda e: self._scroll_by(self.visible_rows))
+
+    def configure(self, cnf=None, **kw):
+        # The scrollbar follows the virtual offset, not the materialized items
+        scroll = kw.pop('yscrollcommand', None) or kw.pop('yscroll', None)
+        if scroll is not None:
+            self._yscroll = scroll
+            self._update_scrollbar()
+            if cnf is None and not kw:
+                return None
+        return super().configure(cnf, **kw)
+
+    config = configure
+
+    # --- Data ---
+    def set_rows(self, rows):
+        self.rows = rows
+        self.offset = 0
+        self._selected.clear()
+        self.refresh()
+
+    def extend_rows(self, rows):
+        # Append a chunk; Tk is only touched while the window is still filling
+        start = len(self.rows)
+        self.rows.extend(rows)
+        if start < self.offset + self.visible_rows:
+            self.refresh()
+        else:
+            self._update_scrollbar()
+
+    # Single-row changes only touch Tk when the row is in view. A change
+    # above the window shifts the offset so the visible rows stay put.
+    def insert_row(self, index, row):
+        self.rows.insert(index, row)
+        if index < self.offset:
+            self.offset += 1
+            self._update_scrollbar()
+        elif index < self.offset + self.visible_rows:
+            self.refresh()
+        else:
+            self._update_scrollbar()
+
+    def remove_row(self, index):
+        row = self.rows.pop(index)
+        self._selected.pop(self.key(row), None)
+        if index < self.offset:
+            self.offset -= 1
+            self._update_scrollbar()
+        elif index < self.offset + self.visible_rows:
+            self.refresh()
+        else:
+            self._update_scrollbar()
+
+    def update_row(self, index, row=None):
+        # row, if given, replaces the row at index under the same key
+        if row is not None:
+            self.rows[index] = row
+            iid = self.key(row)
+            if iid in self._selected:
+                self._selected[iid] = row
+            if iid in self._window:
+                self._window[iid] = row
+        if self.offset <= index < self.offset + self.visible_rows:
+            values, tags = self.row_values(self.rows[index])
+            self.item(self.key(self.rows[index]), values=values, tags=tags)
+
+    def refresh(self):
+        # Bring the materialized window in line with the backing sequence,
+        # touching only the items that actually changed position or content
+        self.offset = max(0, min(self.offset, len(self.rows) - self.visible_rows))
+        end = min(len(self.rows), self.offset + self.visible_rows)
+        window = [self.rows[i] for i in range(self.offset, end)]
+        wanted = [self.key(row) for row in window]
+
+        current = self.get_children()
+        wanted_set = set(wanted)
+        stale = [iid for iid in current if iid not in wanted_set]
+        if stale:
+            self.delete(*stale)
+        existing = set(current).difference(stale)
+
+        for index, (iid, row) in enumerate(zip(wanted, window)):
+            values, tags = self.row_values(row)
+            if iid in existing:
+                self.item(iid, values=values, tags=tags)
+                self.move(iid, '', index)
+            else:
+                self.insert('', index, iid=iid, values=values, tags=tags)
+
+        self._window = dict(zip(wanted, window))
+        self.selection_set([iid for iid in wanted if iid in self._selected])
+        super().yview_moveto(0)
+        self._update_scrollbar()
+
+    # --- Selection ---
+    def selected_rows(self):
+        return list(self._selected.values())
+
+    def clear_selection(self):
+        self._selected.clear()
+        self.selection_set([])
+
+    def _on_click(self, event):
+        # Plain clicks replace the selection; Shift/Control clicks extend it
+        self._replace_selection = not (event.state & 0x0005)
+
+    def _on_select(self, event=None):
+        selected = set(super().selection())
+        if self._replace_selection:
+            self._selected = {}
+            self._replace_selection = False
+        for iid, row in self._window.items():
+            if iid in selected:
+                self._selected[iid] = row
+            else:
+                self._selected.pop(iid, None)
+
+    # --- Scrolling ---
+    def yview(self, *args):
+        if not args:
+            return self._fractions()
+        if args[0] == 'moveto':
+            self.offset = int(float(args[1]) * len(self.rows))
+        elif args[0] == 'scroll':
+            step = int(args[1])
+            if args[2] == 'pages':
+                step *= self.visible_rows
+            self.offset += step
+        self.refresh()
+
+    def see_row(self, index):
+        if index < self.offset:
+            self.offset = index
+        elif index >= self.offset + self.visible_rows:
+            self.offset = index - self.visible_rows + 1
+        self.refresh()
+
+    def _scroll_by(self, step):
+        self.yview('scroll', step, 'units')
+        return 'break'
+
+    def _on_wheel(self, event):
+        return self._scroll_by(-1 if event.delta > 0 else 1)
+
+    def _on_arrow(self, event, step):
+        # At the edge of the window, move through the backing sequence instead
+        children = self.get_children()
+        if not children:
+            return 'break'
+        edge = children[0] if step < 0 else children[-1]
+        if self.focus() != edge:
+            self._replace_selection = not (event.state & 0x0001)
+            return None
+
+        index = self.offset + children.index(edge) + step
+        if not 0 <= index < len(self.rows):
+            return 'break'
+        self.see_row(index)
+        iid = self.key(self.rows[index])
+        self._replace_selection = not (event.state & 0x0001)
+        self.focus(iid)
+        if self._replace_selection:
+            self.selection_set(iid)
+        else:
+            self.selection_add(iid)
+        return 'break'
+
+    def _fractions(self):
+        if not self.rows:
+            return 0.0, 1.0
+        first = self.offset / len(self.rows)
+        last = min(1.0, (self.offset + self.visible_rows) / len(self.rows))
+        return first, last
+
+    def _update_scrollbar(self):
+        if self._yscroll is not None:
+            self._yscroll(*self._fractions())
+
+    def _on_configure(self, event):
+        style = ttk.Style(self)
+        rowheight = int(style.lookup(self.cget('style') or 'Treeview', 'rowheight') or 20)
+        heading = rowheight + 4 if 'headings' in str(self.cget('show')) else 0
+        rows = max(1, (event.height - heading) // rowheight)
+        if rows != self.visible_rows:
+            self.visible_rows = rows
+            self.refresh()
@@ -0,0 +1,166 @@
+import argparse
+import csv
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date
+from pathlib import Path
+
+from PersonalWallet import (CategorySpending, RecurringRules, WalletJournal, TransactionColumns,
+                            TimeRollups,
+                            np, monthly_summary, category_summary, monthly_stats_lines,
+                            category_analysis_lines, budget_status_lines,
+                            draw_category_pie, draw_trend, new_figure, render_png)
+
+# Headless batch reports for wallet files (JSON or binary snapshots): the same monthly statistics,
+# category analysis and budget status as the Tk windows, written as text,
+# CSV and PNG. Each (wallet, year) pair runs in its own worker process.
+#
+#   python WalletReport.py wallets/*.json -o reports --year 2023 --year 2024
+
+
+def load_wallet(path):
+    # Snapshot, closed-month segments and any journal next to it, exactly
+    # as the app loads them
+    journal = WalletJournal(path)
+    transactions, budgets, rules = journal.load()
+    transactions.extend(journal.load_history({t['id'] for t in transactions}))
+    return transactions, budgets, RecurringRules(rules)
+
+
+def build_columns(transactions):
+    if np is None or not transactions:
+        return None
+    try:
+        return TransactionColumns.build(transactions)
+    except (ValueError, KeyError):
+        return None
+
+
+def write_png(path, width, height, draw, *args):
+    fig = new_figure(width, height)
+    draw(fig, *args)
+    path.write_bytes(render_png(fig))
+
+
+def report_wallet(path, out_dir, year=None, as_of=None, charts=True):
+    # Runs in a worker process; returns (output directory, transaction count)
+    if not path.exists():
+        raise FileNotFoundError(f"no such wallet: {path}")
+    transactions, budgets, recurring = load_wallet(path)
+    # Budget periods can straddle a year boundary, so spending covers every row
+    spending = CategorySpending()
+    spending.rebuild(transactions)
+    as_of = as_of or date.today()
+    # Recurring rules contribute their occurrences up to the as-of date
+    first, last = None, as_of
+    if year is not None:
+        transactions = [t for t in transactions if t['date'][:4] == year]
+        first, last = date(int(year), 1, 1), min(as_of, date(int(year), 12, 31))
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    columns = build_columns(transactions)
+    monthly_data = recurring.add_monthly(monthly_summary(transactions, columns), first, last)
+    by_type = {trans_type: recurring.add_categories(category_summary(transactions, trans_type, columns),
+                                                    trans_type, first, last)
+               for trans_type in ('expense', 'income')}
+
+    (out_dir / 'monthly_stats.txt').write_text(
+        ''.join(monthly_stats_lines(monthly_data)), encoding='utf-8')
+    with open(out_dir / 'monthly_stats.csv', 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['Month', 'Income', 'Expense', 'Balance', 'Count'])
+        for m in sorted(monthly_data.keys(), reverse=True):
+            data = monthly_data[m]
+            writer.writerow([m, data['income'], data['expense'],
+                             data['income'] - data['expense'], data['count']])
+
+    with open(out_dir / 'category_analysis.txt', 'w', encoding='utf-8') as f:
+        f.write("Expenses\n\n" + ''.join(category_analysis_lines(by_type['expense'])))
+        f.write("\nIncome\n\n" + ''.join(category_analysis_lines(by_type['income'])))
+    with open(out_dir / 'categories.csv', 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['Type', 'Category', 'Total', 'Count', 'Average'])
+        for trans_type, by_category in by_type.items():
+            for category, data in sorted(by_category.items()):
+                writer.writerow([trans_type, category, data['total'], data['count'],
+                                 data['total'] / data['count']])
+
+    # A per-year report only covers the budgets when the as-of date falls in that year
+    if year is None or as_of.year == int(year):
+        (out_dir / 'budget_status.txt').write_text(
+            ''.join(text for text, tag in budget_status_lines(budgets, spending, as_of, recurring)),
+            encoding='utf-8')
+
+    if charts:
+        for trans_type, title, colormap in (('expense', 'Expense Distribution by Category', 'Set3'),
+                                            ('income', 'Income Distribution by Category', 'Set2')):
+            totals = {category: data['total'] for category, data in by_type[trans_type].items()}
+            if totals:
+                write_png(out_dir / f'{trans_type}_pie.png', 800, 600,
+                          draw_category_pie, totals, title, colormap)
+
+        rollups = TimeRollups()
+        rollups.rebuild(transactions)
+        extents = [extent for extent in (rollups.extent(), recurring.extent(last)) if extent is not None]
+        if extents:
+            start = max(min(start for start, end in extents), first or date.min)
+            end = max(end for start, end in extents)
+        if extents and start <= end:
+            level = TimeRollups.pick_level(start, end)
+            write_png(out_dir / 'trend.png', 1000, 600, draw_trend, level,
+                      *recurring.add_series(level, rollups.series(level, start, end), start, min(end, last)))
+
+    return out_dir, len(transactions)
+
+
+def plan_jobs(paths, out_root, years):
+    # One job per wallet, or per wallet and year; output directories are
+    # named after the wallet file and made unique when stems repeat
+    jobs = []
+    seen = {}
+    for path in paths:
+        name = path.stem
+        seen[name] = seen.get(name, 0) + 1
+        if seen[name] > 1:
+            name = f"{name}-{seen[name]}"
+        for year in years or [None]:
+            out_dir = out_root / name if year is None else out_root / name / year
+            jobs.append((path, out_dir, year))
+    return jobs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write wallet reports without opening the app.")
+    parser.add_argument('wallets', nargs='+', type=Path, help="wallet files (JSON or binary snapshots)")
+    parser.add_argument('-o', '--output', type=Path, default=Path('reports'),
+                        help="directory for the reports (default: reports)")
+    parser.add_argument('--year', action='append', default=[],
+                        help="report on one year only (YYYY); may be repeated")
+    parser.add_argument('--as-of', type=date.fromisoformat,
+                        help="date whose budget periods are reported, YYYY-MM-DD (default: today)")
+    parser.add_argument('--no-charts', action='store_true', help="skip the PNG charts")
+    parser.add_argument('-j', '--workers', type=int, default=os.cpu_count(),
+                        help="worker processes (default: CPU count)")
+    args = parser.parse_args(argv)
+
+    jobs = plan_jobs(args.wallets, args.output, args.year)
+    failures = 0
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = {pool.submit(report_wallet, path, out_dir, year, args.as_of,
+                               not args.no_charts): path
+                   for path, out_dir, year in jobs}
+        for future in as_completed(futures):
+            try:
+                out_dir, count = future.result()
+            except Exception as e:
+                failures += 1
+                print(f"{futures[future]}: failed: {e}", file=sys.stderr)
+            else:
+                print(f"{futures[future]}: {count} transactions -> {out_dir}")
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+import itertools
+import random
+import unittest
+
+from TaskIndex import TaskIndex, task_keys
+
+CATEGORIES = ['General', 'Work', 'Study', 'Home']
+PRIORITIES = ['Low', 'Medium', 'High', 'Urgent']
+
+
+def random_task(rng, tid):
+    return {'id': tid, 'text': f'task {tid}', 'done': rng.random() < 0.3,
+            'category': rng.choice(CATEGORIES), 'priority': rng.choice(PRIORITIES),
+            'created': f'2024-01-{rng.randrange(1, 29):02d} 09:00:00'}
+
+
+def brute_force(tasks, status=None, categories=None, priorities=None,
+                created_from=None, created_to=None):
+    result = []
+    for task in tasks:
+        task_status, category, priority, day = task_keys(task)
+        if ((status is None or task_status == status)
+                and (categories is None or category in categories)
+                and (priorities is None or priority in priorities)
+                and (created_from is None or day >= created_from)
+                and (created_to is None or day <= created_to)):
+            result.append(task['id'])
+    return result
+
+
+def filter_combinations():
+    statuses = [None, 'Pending', 'Completed']
+    categories = [None, ['Work'], ['Home', 'Study'], ['Missing']]
+    priorities = [None, ['Urgent'], ['Low', 'High']]
+    ranges = [(None, None), ('2024-01-10', None), (None, '2024-01-05'), ('2024-01-07', '2024-01-20')]
+    for status, category, priority, (low, high) in itertools.product(
+            statuses, categories, priorities, ranges):
+        yield dict(status=status, categories=category, priorities=priority,
+                   created_from=low, created_to=high)
+
+
+class TaskIndexTest(unittest.TestCase):
+    def assert_matches(self, index, tasks):
+        # tasks in slot order (the order they were first added)
+        for filters in filter_combinations():
+            with self.subTest(**filters):
+                expected = brute_force(tasks, **filters)
+                self.assertEqual(index.query(**filters), expected)
+                self.assertEqual(index.count(**filters), len(expected))
+
+    def test_build_matches_brute_force(self):
+        rng = random.Random(1)
+        tasks = [random_task(rng, str(i)) for i in range(500)]
+        self.assert_matches(TaskIndex.build(tasks), tasks)
+
+    def test_extend_equals_one_add_at_a_time(self):
+        rng = random.Random(2)
+        tasks = [random_task(rng, str(i)) for i in range(300)]
+        # Repeated ids replace the earlier task in its slot
+        tasks += [dict(tasks[5], done=not tasks[5]['done']), dict(tasks[7], category='Missing')]
+        extended, added = TaskIndex(), TaskIndex()
+        for start in range(0, len(tasks), 64):
+            extended.extend(tasks[start:start + 64])
+        for task in tasks:
+            added.add(task)
+        for filters in filter_combinations():
+            self.assertEqual(extended.mask(**filters), added.mask(**filters))
+        self.assertEqual(extended.days, added.days)
+
+    def test_replace_and_remove_with_compaction(self):
+        rng = random.Random(3)
+        index = TaskIndex()
+        live = {}
+        for i in range(3000):
+            task = random_task(rng, str(i))
+            index.add(task)
+            live[task['id']] = task
+        for tid in list(live)[:2000]:  # more than half: the slots are renumbered
+            index.remove(tid)
+            del live[tid]
+        for tid in list(live)[:100]:
+            live[tid] = dict(live[tid], done=not live[tid]['done'], priority='Urgent')
+            index.replace(live[tid])
+        self.assertEqual(len(index), len(live))
+        self.assert_matches(index, list(live.values()))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import json
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+
+from TaskStore import TaskStore
+
+
+def task(tid, text, **fields):
+    return dict({'id': tid, 'text': text, 'priority': 'Medium', 'category': 'General',
+                 'done': False, 'created': '2024-03-10 09:00:00'}, **fields)
+
+
+class TaskStoreTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+        self.store = TaskStore(str(self.directory / 'tasks.db'))
+        self.addCleanup(self.store.close)
+
+    def write_json(self, content):
+        path = self.directory / 'tasks.json'
+        path.write_text(content if isinstance(content, str) else json.dumps(content),
+                        encoding='utf-8')
+        return str(path)
+
+    def test_migrate_once(self):
+        tasks = [task('a', 'Buy milk'), task('b', 'Call Sam', done=True, tags=['home'])]
+        path = self.write_json(tasks)
+        self.assertEqual(self.store.migrate_json(path), 2)
+        self.assertEqual(self.store.load(), tasks)
+        # Already migrated: later edits to the JSON file are not imported again
+        self.write_json(tasks + [task('c', 'Later')])
+        self.assertEqual(self.store.migrate_json(path), 0)
+        self.assertEqual(len(self.store.load()), 2)
+
+    def test_malformed_file_is_not_migrated(self):
+        for content in ['{"id": "a"}', '[{"text": "no id"}]', '["text"]']:
+            with self.subTest(content=content):
+                with self.assertRaises(ValueError):
+                    self.store.migrate_json(self.write_json(content))
+                self.assertEqual(self.store.load(), [])
+        self.assertEqual(self.store.migrate_json(self.write_json([task('a', 'ok')])), 1)
+
+    def test_apply_upserts_and_deletes(self):
+        self.store.apply({'a': task('a', 'one'), 'b': task('b', 'two'), 'c': task('c', 'three')})
+        self.store.apply({'a': task('a', 'one, edited', done=True, note='kept'), 'b': None})
+        self.assertEqual(self.store.load(), [task('a', 'one, edited', done=True, note='kept'),
+                                             task('c', 'three')])
+
+    def test_iter_batches_in_load_order(self):
+        self.store.apply({str(i): task(str(i), f'task {i}') for i in range(25)})
+        self.store.apply({'3': None, '17': None})
+        batches = list(self.store.iter_batches(10))
+        self.assertEqual([len(batch) for batch in batches], [10, 10, 3])
+        self.assertEqual([t for batch in batches for t in batch], self.store.load())
+
+    def test_search(self):
+        self.store.apply({
+            'a': task('a', 'Buy MILK and bread'),
+            'b': task('b', 'Pay 50% deposit'),
+            'c': task('c', 'rename file_name'),
+            'd': task('d', 'filename without underscore'),
+            'e': task('e', 'say "hello"'),
+        })
+        self.assertTrue(self.store.fts)
+        cases = {
+            'milk': {'a'},           # trigram index, case-insensitive
+            'ilk and': {'a'},
+            'mi': {'a'},             # under three characters: LIKE scan
+            '50%': {'b'},
+            '%': {'b'},
+            'e_n': {'c'},            # _ is a literal, not a wildcard
+            '_': {'c'},
+            '"hello"': {'e'},
+            'missing': set(),
+        }
+        for term, expected in cases.items():
+            with self.subTest(term=term):
+                self.assertEqual(self.store.search(term), expected)
+
+    def test_search_without_fts(self):
+        self.store.apply({'a': task('a', 'Buy milk'), 'b': task('b', 'Pay 50% deposit')})
+        self.store.fts = False
+        self.assertEqual(self.store.search('MILK'), {'a'})
+        self.assertEqual(self.store.search('0% d'), {'b'})
+
+    def test_text_index_follows_updates_and_deletes(self):
+        self.store.apply({'a': task('a', 'water plants'), 'b': task('b', 'water bill')})
+        self.store.apply({'a': task('a', 'feed the cat'), 'b': None})
+        self.assertEqual(self.store.search('water'), set())
+        self.assertEqual(self.store.search('the cat'), {'a'})
+        # Changes that leave the text alone keep it searchable
+        self.store.apply({'a': task('a', 'feed the cat', done=True)})
+        self.assertEqual(self.store.search('feed'), {'a'})
+        db = sqlite3.connect(str(self.directory / 'tasks.db'))
+        try:
+            db.execute("INSERT INTO tasks_fts(tasks_fts, rank) VALUES ('integrity-check', 1)")
+        finally:
+            db.close()
+
+    def test_export_json(self):
+        tasks = [task('a', 'one', extra={'nested': True}), task('b', 'two')]
+        self.store.apply({t['id']: t for t in tasks})
+        path = self.directory / 'export.json'
+        self.assertEqual(self.store.export_json(str(path)), 2)
+        self.assertEqual(json.loads(path.read_text(encoding='utf-8')), tasks)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+import random
+import unittest
+from datetime import date, timedelta
+
+from PersonalWallet import (CategorySpending, FenwickTree, RecurringRules, budget_usage,
+                            budget_window, month_summary)
+
+
+def expense(i, day, amount, category='Food', trans_type='expense'):
+    return {'id': f't{i}', 'type': trans_type, 'amount': amount, 'category': category,
+            'date': day.isoformat(), 'description': '', 'timestamp': ''}
+
+
+class FenwickTreeTest(unittest.TestCase):
+    def test_range_sums_match_brute_force(self):
+        rng = random.Random(19)
+        tree, values = FenwickTree(), {}
+        for _ in range(500):
+            i = rng.randrange(1, 5000)
+            amount = rng.choice([-1, 1]) * rng.randrange(1, 50)
+            tree.add(i, amount)
+            values[i] = values.get(i, 0) + amount
+        for _ in range(200):
+            lo = rng.randrange(1, 5000)
+            hi = rng.randrange(lo, 5001)
+            self.assertAlmostEqual(tree.range_sum(lo, hi),
+                                   sum(v for i, v in values.items() if lo <= i <= hi))
+        # Ordinals of real dates, up to the largest one
+        tree.add(date.max.toordinal(), 7.0)
+        self.assertAlmostEqual(tree.range_sum(date.max.toordinal(), date.max.toordinal()), 7.0)
+
+
+class CategorySpendingTest(unittest.TestCase):
+    def test_spent_matches_brute_force(self):
+        rng = random.Random(20)
+        first = date(2023, 1, 1)
+        rows = [expense(i, first + timedelta(days=rng.randrange(400)), float(rng.randrange(1, 90)),
+                        rng.choice(['Food', 'Bills']), rng.choice(['expense', 'expense', 'income']))
+                for i in range(600)]
+        rows.append(dict(expense(600, first, 5.0), date='undated'))
+        spending = CategorySpending()
+        spending.rebuild(rows)
+        for t in rows[:100]:
+            spending.remove(t)
+        live = rows[100:]
+        for _ in range(100):
+            start = first + timedelta(days=rng.randrange(400))
+            end = start + timedelta(days=rng.randrange(120))
+            for category in ('Food', 'Bills', 'Travel'):
+                expected = sum(t['amount'] for t in live
+                               if t['type'] == 'expense' and t['category'] == category
+                               and start.isoformat() <= t['date'] <= end.isoformat())
+                self.assertAlmostEqual(spending.spent(category, start, end), expected)
+
+    def test_closed_month_summary(self):
+        rows = [expense(0, date(2024, 2, 3), 10.0), expense(1, date(2024, 2, 20), 5.0),
+                expense(2, date(2024, 2, 21), 99.0, trans_type='income')]
+        spending = CategorySpending()
+        spending.add_summary('2024-02', month_summary(rows))
+        self.assertEqual(spending.spent('Food', date(2024, 2, 1), date(2024, 2, 10)), 10.0)
+        self.assertEqual(spending.spent('Food', date(2024, 2, 1), date(2024, 2, 29)), 15.0)
+        # Older manifests only have the month's totals, placed on its first day
+        legacy = month_summary(rows)
+        del legacy['spending']
+        spending = CategorySpending()
+        spending.add_summary('2024-02', legacy)
+        self.assertEqual(spending.spent('Food', date(2024, 2, 1), date(2024, 2, 1)), 15.0)
+
+
+class BudgetWindowTest(unittest.TestCase):
+    def test_periods(self):
+        today = date(2024, 8, 14)  # a Wednesday
+        cases = {
+            'monthly': (date(2024, 8, 1), date(2024, 8, 31)),
+            'weekly': (date(2024, 8, 12), date(2024, 8, 18)),
+            'rolling30': (date(2024, 7, 16), date(2024, 8, 14)),
+            'quarterly': (date(2024, 7, 1), date(2024, 9, 30)),
+            'yearly': (date(2024, 1, 1), date(2024, 12, 31)),
+        }
+        for period, window in cases.items():
+            with self.subTest(period=period):
+                self.assertEqual(budget_window({'limit': 1.0, 'period': period}, today), window)
+        custom = {'limit': 1.0, 'period': 'custom', 'start': '2024-05-01', 'end': '2024-06-15'}
+        self.assertEqual(budget_window(custom, today), (date(2024, 5, 1), date(2024, 6, 15)))
+        self.assertEqual(budget_window({'limit': 1.0}, date(2024, 2, 10)),
+                         (date(2024, 2, 1), date(2024, 2, 29)))
+        self.assertEqual(budget_window({'limit': 1.0, 'period': 'quarterly'}, date(2024, 12, 31)),
+                         (date(2024, 10, 1), date(2024, 12, 31)))
+
+    def test_usage_counts_recurring_occurrences_up_to_today(self):
+        spending = CategorySpending()
+        spending.rebuild([expense(0, date(2024, 8, 2), 30.0), expense(1, date(2024, 7, 30), 99.0)])
+        rule = {'id': 'r1', 'type': 'expense', 'amount': 10.0, 'category': 'Food',
+                'description': '', 'frequency': 'weekly', 'interval': 1,
+                'start': '2024-08-01', 'end': None}
+        recurring = RecurringRules({'r1': rule})
+        budget = {'limit': 100.0, 'period': 'monthly'}
+        # Occurrences on Aug 1, 8 and 15; only the first two are due on the 14th
+        self.assertEqual(budget_usage('Food', budget, spending, date(2024, 8, 14), recurring),
+                         (100.0, date(2024, 8, 1), date(2024, 8, 31), 50.0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+import csv
+import tempfile
+import unittest
+import uuid
+from pathlib import Path
+from unittest import mock
+
+from PersonalWallet import AdvancedWallet
+
+
+class FakeTree:
+    # Stands in for the Transactions tab's VirtualTreeview
+    def __init__(self):
+        self.rows = []
+
+    def set_rows(self, rows):
+        self.rows = rows
+
+
+def transaction(date, amount, trans_type='expense', category='Food', description=''):
+    return {'id': str(uuid.uuid4()), 'type': trans_type, 'amount': amount, 'category': category,
+            'date': date, 'description': description, 'timestamp': date + 'T12:00:00'}
+
+
+def make_wallet(directory, transactions=()):
+    # AdvancedWallet's data side, with a stand-in tree and no Tk window
+    wallet = AdvancedWallet.__new__(AdvancedWallet)
+    wallet.init_data(Path(directory) / 'wallet.wbin')
+    wallet.add_transactions_batch(list(transactions))
+    wallet.trans_tree = FakeTree()
+    wallet.update_dashboard = lambda: None
+    wallet.update_budget_alerts = lambda: None
+    return wallet
+
+
+class ImportTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.existing = [transaction('2024-03-10', 50.0), transaction('2024-03-20', 12.5, 'income')]
+        self.wallet = make_wallet(self.directory.name, self.existing)
+        self.addCleanup(self.wallet.journal.close)
+
+    def assert_listed(self, transactions):
+        ordered_ids = [t['id'] for t in self.wallet.ordered]
+        for t in transactions:
+            self.assertIn(t['id'], ordered_ids)
+            self.assertIn(t['id'], [row['id'] for row in self.wallet.trans_tree.rows])
+        stamps = [t['timestamp'] for t in self.wallet.ordered]
+        self.assertEqual(stamps, sorted(stamps, reverse=True))
+        self.assertEqual(len(self.wallet.ordered), len(self.wallet.transactions))
+
+    def test_merge_import_lists_new_rows(self):
+        new = [transaction('2024-03-15', 7.0), transaction('2024-01-02', 99.0, 'income')]
+        duplicate = dict(self.existing[0], id=str(uuid.uuid4()))
+        with mock.patch('PersonalWallet.messagebox'):
+            self.wallet.merge_import(new + [duplicate], None, None,
+                                     {'added': 3, 'skipped': 0, 'conflicting': 0})
+        self.assertEqual(len(self.wallet.transactions), 4)
+        self.assert_listed(new)
+
+    def run_bank_import(self, lines, window_days=3):
+        path = Path(self.directory.name) / 'statement.csv'
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['Date', 'Amount', 'Description'])
+            writer.writerows(lines)
+
+        def finish_now(job, title, on_finish):
+            job.thread.join()
+            on_finish(job)
+
+        self.wallet.show_job_progress = finish_now
+        with mock.patch('PersonalWallet.messagebox') as messagebox:
+            self.wallet.run_bank_csv_import(
+                str(path), {'date': 'Date', 'amount': 'Amount', 'description': 'Description'},
+                '%Y-%m-%d', [('restaurant', 'Food')], window_days)
+        self.assertFalse(messagebox.showerror.called)
+        return [t for t in self.wallet.transactions if t not in self.existing]
+
+    def test_bank_import_reconciles_within_window(self):
+        added = self.run_bank_import([
+            ('2024-03-12', '-50.00', 'Restaurant'),  # 2 days from the existing expense
+            ('2024-03-08', '-50.00', 'Restaurant'),  # in the window, but that row is taken
+            ('2024-03-14', '-50.00', 'Restaurant'),  # 4 days away
+            ('2024-03-20', '12.50', 'Refund'),       # matches the existing income
+            ('2024-03-21', '-12.50', 'Refund'),      # same amount, other type
+            ('not a date', '-5.00', 'Broken'),
+        ])
+        self.assertEqual(sorted((t['date'], t['type'], t['amount']) for t in added),
+                         [('2024-03-08', 'expense', 50.0), ('2024-03-14', 'expense', 50.0),
+                          ('2024-03-21', 'expense', 12.5)])
+        self.assertEqual({t['category'] for t in added if t['amount'] == 50.0}, {'Food'})
+        self.assert_listed(added)
+
+    def test_bank_import_skips_short_trailer_row(self):
+        added = self.run_bank_import([
+            ('2024-04-02', '-8.00', 'Coffee'),
+            ('End of statement',),
+        ])
+        self.assertEqual([(t['date'], t['amount']) for t in added], [('2024-04-02', 8.0)])
+        self.assert_listed(added)
+
+    def test_each_existing_row_absorbs_one_line(self):
+        counts = {'matched': 0, 'invalid': 0}
+        new_transactions = []
+        lines = [transaction('2024-03-10', 50.0) for _ in range(3)]
+        self.wallet.reconcile_rows(lines, dict, 0, set(), new_transactions, counts)
+        self.assertEqual(counts, {'matched': 1, 'invalid': 0})
+        self.assertEqual(len(new_transactions), 2)
+
+    def test_zero_day_window_needs_same_date(self):
+        counts = {'matched': 0, 'invalid': 0}
+        new_transactions = []
+        lines = [transaction('2024-03-11', 50.0), transaction('2024-03-10', 50.0)]
+        self.wallet.reconcile_rows(lines, dict, 0, set(), new_transactions, counts)
+        self.assertEqual(counts['matched'], 1)
+        self.assertEqual([t['date'] for t in new_transactions], ['2024-03-11'])
+
+
+if __name__ == '__main__':
+    unittest.main()
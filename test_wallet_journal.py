@@ -0,0 +1,195 @@
+import os
+import tempfile
+import time
+import unittest
+from datetime import date
+from pathlib import Path
+from unittest import mock
+
+from PersonalWallet import (AdvancedWallet, WalletJournal, WalletSnapshot, category_summary,
+                            monthly_summary)
+
+
+def transaction(i):
+    return {'id': f't{i}', 'type': 'expense', 'amount': 1.0 + i, 'category': 'Food',
+            'date': '2024-03-10', 'description': '', 'timestamp': f'2024-03-10T12:00:{i:02d}'}
+
+
+class JournalTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = Path(directory.name) / 'wallet.wbin'
+
+    def current(self, i):
+        # A row of the current month, which stays in the hot snapshot
+        return dict(transaction(i), date=date.today().isoformat())
+
+    def test_log_is_replayed_over_the_snapshot(self):
+        a, b, c = self.current(0), self.current(1), self.current(2)
+        rule = {'id': 'r1', 'type': 'expense', 'amount': 9.0, 'category': 'Bills',
+                'frequency': 'monthly', 'interval': 1, 'start': '2024-01-01', 'end': None}
+        journal = WalletJournal(self.path)
+        journal.write_snapshot([a, b], {'Food': {'limit': 100.0, 'period': 'monthly'}}, {})
+        journal.append_transactions([c])
+        journal.append('update', transaction=dict(a, amount=5.0), date=a['date'])
+        journal.append('delete', id=b['id'], date=b['date'])
+        journal.append('budget', category='Food', budget={'limit': 50.0, 'period': 'weekly'})
+        journal.append('budget', category='Gifts', limit=20)  # written by older versions
+        journal.append('rule', id='r1', rule=rule)
+        journal.close()
+        with open(self.path.with_suffix('.journal'), 'a') as f:
+            f.write('{"op": "add", "transa')  # torn by a crash mid-write
+
+        journal = WalletJournal(self.path)
+        transactions, budgets, rules = journal.load()
+        self.assertEqual(transactions, [dict(a, amount=5.0), c])
+        self.assertEqual(budgets, {'Food': {'limit': 50.0, 'period': 'weekly'},
+                                   'Gifts': {'limit': 20.0, 'period': 'monthly'}})
+        self.assertEqual(rules, {'r1': rule})
+        self.assertEqual(journal.records, 6)
+        self.assertFalse(journal.needs_compaction())
+
+    def test_interrupted_compaction_replays_the_rotated_log_once(self):
+        a, c = self.current(0), self.current(2)
+        journal = WalletJournal(self.path)
+        journal.write_snapshot([a], {}, {})
+        journal.append_transactions([c])
+        journal.close()
+        # Compaction rotated the log and wrote the snapshot, then stopped
+        # before it could drop the rotated log
+        os.replace(self.path.with_suffix('.journal'), self.path.with_suffix('.journal.old'))
+        with open(self.path, 'wb') as f:
+            WalletSnapshot.write(f, [a, c], {}, months={})
+
+        journal = WalletJournal(self.path)
+        transactions, budgets, rules = journal.load()
+        self.assertEqual(transactions, [a, c])
+        self.assertTrue(journal.needs_compaction())
+        journal.compact(transactions, budgets, rules)
+        journal.close()
+        self.assertFalse(self.path.with_suffix('.journal.old').exists())
+        self.assertEqual(WalletJournal(self.path).load()[0], [a, c])
+
+    def test_failed_append_is_retried_without_a_torn_line(self):
+        journal = WalletJournal(self.path)
+        journal.append_transactions([transaction(0)])
+        journal.flush()
+
+        # The next batch reaches the file, then fsync fails as on a full disk
+        real_fsync = os.fsync
+        failures = []
+
+        def fsync_once(fd):
+            if not failures:
+                failures.append(fd)
+                raise OSError(28, "No space left on device")
+            real_fsync(fd)
+
+        with mock.patch('PersonalWallet.os.fsync', fsync_once):
+            journal.append_transactions([transaction(1), transaction(2)])
+            with self.assertRaises(OSError):
+                journal.flush()
+            self.assertEqual(self.path.with_suffix('.journal').read_text().count('\n'), 1)
+            # flush() reports the error until the writer's own retry succeeds
+            for _ in range(100):
+                try:
+                    journal.flush()
+                    break
+                except OSError:
+                    time.sleep(0.05)
+        journal.close()
+
+        transactions, budgets, rules = WalletJournal(self.path).load()
+        self.assertEqual([t['id'] for t in transactions], ['t0', 't1', 't2'])
+
+    def test_analytics_columns_cover_closed_months_on_disk(self):
+        today = date.today().isoformat()
+        rows = [dict(transaction(i), date=f'2024-0{1 + i % 3}-10') for i in range(6)]
+        rows.append(dict(transaction(6), date=today, type='income', category='Salary'))
+        journal = WalletJournal(self.path)
+        journal.write_snapshot(rows, {}, {})
+        journal.close()
+
+        wallet = AdvancedWallet.__new__(AdvancedWallet)
+        wallet.init_data(self.path)
+        self.addCleanup(wallet.journal.close)
+        self.assertFalse(wallet.journal.history_loaded)
+
+        columns = wallet.analytics_columns()
+        self.assertIsNotNone(columns)
+        self.assertEqual(columns.size, len(rows))
+        self.assertEqual(columns.monthly_summary(), dict(monthly_summary(rows)))
+        self.assertEqual(columns.category_summary('expense'),
+                         dict(category_summary(rows, 'expense')))
+        self.assertIs(wallet.analytics_columns(), columns)
+
+    def test_chart_worker_joins_closed_months(self):
+        today = date.today()
+        rows = [dict(transaction(i), date=f'2024-0{1 + i % 3}-10') for i in range(6)]
+        rows.append(dict(transaction(6), date='2024-02-30', category='Bills'))  # no such day
+        rows.append(dict(transaction(7), date=today.isoformat(), category='Rent'))
+        journal = WalletJournal(self.path)
+        journal.write_snapshot(rows, {}, {})
+        journal.close()
+
+        wallet = AdvancedWallet.__new__(AdvancedWallet)
+        wallet.init_data(self.path)
+        self.addCleanup(wallet.journal.close)
+        version = (wallet.data_version, today)
+        with mock.patch('PersonalWallet.new_figure'), mock.patch('PersonalWallet.draw_category_pie'), \
+                mock.patch('PersonalWallet.render_png', return_value=b'png'):
+            png = wallet.render_chart('expense', version, None, wallet.working_columns().snapshot(),
+                                      400, 300, months=wallet.journal.history_summaries())
+        self.assertEqual(png, b'png')
+        expected = {category: totals['total']
+                    for category, totals in category_summary(rows, 'expense').items()}
+        self.assertEqual(wallet.chart_data[('expense', version)], expected)
+        # 2024-02 holds a row the columns cannot place, so it is grouped row by row
+        self.assertIsNone(wallet.month_columns['2024-02'][1])
+        self.assertIsNone(wallet.analytics_columns())
+
+    def test_update_moving_a_row_out_of_a_closed_month_survives_restart(self):
+        today = date.today().isoformat()
+        old = dict(transaction(0), date='2024-02-10')
+        journal = WalletJournal(self.path)
+        journal.write_snapshot([old, dict(transaction(1), date=today)], {}, {})
+        journal.close()
+
+        journal = WalletJournal(self.path)
+        journal.load()
+        self.assertFalse(journal.history_loaded)
+        edited = dict(old, date=today, amount=99.0)
+        journal.append('update', transaction=edited, date=old['date'])
+        journal.close()
+
+        journal = WalletJournal(self.path)
+        transactions, budgets, rules = journal.load()
+        journal.compact(transactions, budgets, rules)
+        journal.close()
+
+        transactions, budgets, rules = WalletJournal(self.path).load()
+        by_id = {t['id']: t for t in transactions}
+        self.assertEqual(len(transactions), 2)
+        self.assertEqual((by_id['t0']['date'], by_id['t0']['amount']), (today, 99.0))
+
+    def test_unreadable_wallet_is_set_aside_before_saving(self):
+        legacy = self.path.with_name('wallet.json')
+        legacy.write_text('{"transactions": [')
+        wallet = AdvancedWallet.__new__(AdvancedWallet)
+        with mock.patch('PersonalWallet.messagebox') as messagebox:
+            wallet.init_data(self.path, legacy_file=legacy)
+        self.addCleanup(wallet.journal.close)
+        self.assertTrue(messagebox.showerror.called)
+        self.assertEqual(wallet.transactions, [])
+
+        wallet.add_transactions_batch([dict(transaction(0), date=date.today().isoformat())])
+        wallet.save_data()
+        self.assertEqual(legacy.with_name('wallet.json.corrupt').read_text(), '{"transactions": [')
+        self.assertFalse(legacy.exists())
+        transactions, budgets, rules = WalletJournal(self.path).load()
+        self.assertEqual([t['id'] for t in transactions], ['t0'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,28 @@
+import unittest
+from datetime import date
+
+from PersonalWallet import RecurringRules
+
+
+def rule(start, end=None):
+    return {'id': 'r1', 'type': 'expense', 'amount': 10.0, 'category': 'Bills', 'description': '',
+            'frequency': 'monthly', 'interval': 1, 'start': start, 'end': end}
+
+
+class EndRuleTest(unittest.TestCase):
+    def test_open_rule_ends_on_the_day(self):
+        self.assertEqual(RecurringRules.ended(rule('2024-01-15'), date(2024, 6, 1))['end'],
+                         '2024-06-01')
+
+    def test_earlier_end_is_kept(self):
+        ended = RecurringRules.ended(rule('2024-01-15', '2024-03-01'), date(2024, 6, 1))
+        self.assertEqual(ended['end'], '2024-03-01')
+        self.assertEqual(RecurringRules().count(ended, None, date(2024, 6, 1)), 2)
+
+    def test_end_is_not_before_the_start(self):
+        self.assertEqual(RecurringRules.ended(rule('2024-09-01'), date(2024, 6, 1))['end'],
+                         '2024-09-01')
+
+
+if __name__ == '__main__':
+    unittest.main()
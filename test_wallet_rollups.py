@@ -0,0 +1,84 @@
+import random
+import unittest
+from collections import defaultdict
+from datetime import date, timedelta
+
+from PersonalWallet import TimeRollups, month_summary
+
+
+def random_transactions(rng, count, first=date(2022, 11, 20), days=500):
+    return [{'id': f't{i}', 'type': rng.choice(['income', 'expense']),
+             'amount': float(rng.randrange(1, 100)), 'category': 'Food',
+             'date': (first + timedelta(days=rng.randrange(days))).isoformat(),
+             'description': '', 'timestamp': ''} for i in range(count)]
+
+
+def brute_force(transactions, level, start, end):
+    # Totals per period of every row whose period touches [start, end]
+    low, high = TimeRollups.period_key(level, start), TimeRollups.period_key(level, end)
+    totals = defaultdict(lambda: [0.0, 0.0])
+    for t in transactions:
+        key = TimeRollups.period_key(level, date.fromisoformat(t['date']))
+        if low <= key <= high:
+            totals[key][0 if t['type'] == 'income' else 1] += t['amount']
+    labels = sorted(totals)
+    return labels, [totals[k][0] for k in labels], [totals[k][1] for k in labels]
+
+
+class TimeRollupsTest(unittest.TestCase):
+    def assert_series(self, rollups, transactions, rng):
+        for _ in range(40):
+            start = date(2022, 11, 1) + timedelta(days=rng.randrange(540))
+            end = start + timedelta(days=rng.randrange(400))
+            for level in TimeRollups.LEVELS:
+                with self.subTest(level=level, start=start, end=end):
+                    labels, income, expense = rollups.series(level, start, end)
+                    expected = brute_force(transactions, level, start, end)
+                    self.assertEqual(labels, expected[0])
+                    for got, want in zip((income, expense), expected[1:]):
+                        self.assertEqual(len(got), len(want))
+                        for a, b in zip(got, want):
+                            self.assertAlmostEqual(a, b)
+
+    def test_series_match_brute_force(self):
+        rng = random.Random(13)
+        transactions = random_transactions(rng, 800)
+        rollups = TimeRollups()
+        rollups.rebuild(transactions)
+        self.assert_series(rollups, transactions, rng)
+        days = sorted(t['date'] for t in transactions)
+        self.assertEqual(rollups.extent(), (date.fromisoformat(days[0]), date.fromisoformat(days[-1])))
+
+    def test_remove_drops_empty_periods(self):
+        rng = random.Random(14)
+        transactions = random_transactions(rng, 300)
+        rollups = TimeRollups()
+        rollups.rebuild(transactions)
+        for t in transactions[100:]:
+            rollups.remove(t)
+        self.assert_series(rollups, transactions[:100], rng)
+        for level in TimeRollups.LEVELS:
+            self.assertEqual(rollups.keys[level], sorted(rollups.buckets[level]))
+
+    def test_summary_counts_like_its_rows(self):
+        rng = random.Random(15)
+        transactions = random_transactions(rng, 200, first=date(2023, 3, 1), days=31)
+        from_rows, from_summary = TimeRollups(), TimeRollups()
+        from_rows.rebuild(transactions)
+        from_summary.add_summary(month_summary(transactions))
+        self.assertEqual(from_summary.keys, from_rows.keys)
+        for level in TimeRollups.LEVELS:
+            for key, bucket in from_rows.buckets[level].items():
+                self.assertEqual(from_summary.buckets[level][key][2], bucket[2])
+                self.assertAlmostEqual(from_summary.buckets[level][key][0], bucket[0])
+                self.assertAlmostEqual(from_summary.buckets[level][key][1], bucket[1])
+
+    def test_pick_level(self):
+        start = date(2024, 1, 1)
+        for days, level in ((30, 'day'), (62, 'day'), (63, 'week'), (366, 'week'),
+                            (367, 'month'), (5 * 366, 'quarter'), (20 * 366, 'year')):
+            self.assertEqual(TimeRollups.pick_level(start, start + timedelta(days=days - 1)), level)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import itertools
+import random
+import unittest
+
+from PersonalWallet import TransactionSearchIndex
+
+WORDS = ['Coffee', 'coffee beans', 'Rent', 'Groceries at Market', 'market', 'Bus', 'bonus', 'xy', '']
+CATEGORIES = ['Food', 'Transport', 'Bills', 'Salary', 'Freelance']
+
+
+def random_transaction(rng, i):
+    return {'id': f't{i}', 'type': rng.choice(['income', 'expense']),
+            'category': rng.choice(CATEGORIES), 'description': rng.choice(WORDS),
+            'amount': 1.0, 'date': '2024-03-10', 'timestamp': '2024-03-10T12:00:00'}
+
+
+def brute_force(transactions, search_term, type_filter, category_filter):
+    # The rule the Transactions tab applies to a single row
+    return {t['id'] for t in transactions
+            if (type_filter == 'all' or t['type'] == type_filter)
+            and (category_filter == 'all' or t['category'] == category_filter)
+            and (search_term in t['description'].lower() or search_term in t['category'].lower())}
+
+
+class SearchIndexTest(unittest.TestCase):
+    def assert_matches(self, index, transactions):
+        terms = ['', 'c', 'co', 'cof', 'coffee', 'market', 'ar', 'bus', 'bon', 'food', 'ood',
+                 'lance', 'zzz', 'xy']
+        for term, trans_type, category in itertools.product(
+                terms, ['all', 'income', 'expense'], ['all', 'Food', 'Salary', 'None']):
+            with self.subTest(term=term, type=trans_type, category=category):
+                ids = index.search(term, trans_type, category)
+                if ids is None:  # nothing filtered
+                    self.assertEqual((term, trans_type, category), ('', 'all', 'all'))
+                    ids = {t['id'] for t in transactions}
+                self.assertEqual(ids, brute_force(transactions, term, trans_type, category))
+
+    def test_search_matches_brute_force(self):
+        rng = random.Random(7)
+        transactions = [random_transaction(rng, i) for i in range(300)]
+        index = TransactionSearchIndex()
+        index.rebuild(transactions)
+        self.assert_matches(index, transactions)
+
+    def test_remove_and_edit_keep_postings_in_step(self):
+        rng = random.Random(8)
+        transactions = [random_transaction(rng, i) for i in range(200)]
+        index = TransactionSearchIndex()
+        index.rebuild(transactions)
+        for t in transactions[:50]:
+            index.remove(t)
+        for i, t in enumerate(transactions[50:100], 50):
+            edited = dict(t, description='edited coffee', category='Bills')
+            index.remove(t)
+            index.add(edited)
+            transactions[i] = edited
+        self.assert_matches(index, transactions[50:])
+        # Postings emptied by the removals are dropped
+        self.assertTrue(all(index.grams.values()))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import io
+import struct
+import tempfile
+import unittest
+from pathlib import Path
+
+from PersonalWallet import WalletSnapshot
+
+
+def rows():
+    return [
+        {'id': 'a', 'type': 'expense', 'amount': 12.5, 'category': 'Food', 'date': '2024-03-10',
+         'description': 'lunch ☕', 'timestamp': '2024-03-10T12:00:00'},
+        {'id': 'b', 'type': 'income', 'amount': 1000, 'category': 'Salary', 'date': '2024-03-01',
+         'description': '', 'timestamp': '2024-03-01T09:00:00'},
+        # Values the columns cannot hold go through the extras
+        {'id': 'c', 'type': 'refund', 'amount': '7', 'category': None, 'date': '2024-3-1',
+         'description': 'a\0b', 'timestamp': '2024-03-02T09:00:00', 'note': 'kept'},
+    ]
+
+
+def snapshot_bytes(transactions, budgets=None, months=None, rules=None):
+    f = io.BytesIO()
+    WalletSnapshot.write(f, transactions, budgets or {}, months, rules)
+    return f.getvalue()
+
+
+class SnapshotTest(unittest.TestCase):
+    def test_round_trip(self):
+        budgets = {'Food': {'limit': 200.0, 'period': 'monthly'}}
+        rules = {'r1': {'id': 'r1', 'frequency': 'monthly'}}
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = Path(directory.name) / 'wallet.wbin'
+        path.write_bytes(snapshot_bytes(rows(), budgets, rules=rules))
+
+        self.assertTrue(WalletSnapshot.is_snapshot(path))
+        transactions, loaded_budgets, loaded_rules = WalletSnapshot.load(path)
+        self.assertEqual(transactions, rows())
+        self.assertEqual(loaded_budgets, budgets)
+        self.assertEqual(loaded_rules, rules)
+
+    def test_empty_wallet(self):
+        snapshot = WalletSnapshot(snapshot_bytes([]))
+        try:
+            self.assertEqual(snapshot.records(), [])
+        finally:
+            snapshot.close()
+
+    def test_truncated_file_is_rejected(self):
+        data = snapshot_bytes(rows())
+        for size in range(len(data)):
+            with self.subTest(size=size):
+                with self.assertRaises((ValueError, struct.error)):
+                    snapshot = WalletSnapshot(data[:size])
+                    try:
+                        snapshot.records()
+                    finally:
+                        snapshot.close()
+
+    def test_heap_that_does_not_split_into_rows_is_rejected(self):
+        data = bytearray(snapshot_bytes(rows()[:2]))
+        # Same length, one separator fewer
+        data[data.rindex(b'\0')] = ord('x')
+        snapshot = WalletSnapshot(bytes(data))
+        try:
+            with self.assertRaises(ValueError):
+                snapshot.records()
+        finally:
+            snapshot.close()
+
+
+if __name__ == '__main__':
+    unittest.main()